@@ -0,0 +1,3 @@
+@echo off
+cd /d %~dp0
+start cmd /k "py -3.12 import_nasr.py %*"
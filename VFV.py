@@ -6,6 +6,62 @@ Configuration:
 Edit config.ini to change settings:
 - PTT_KEY: The keyboard key to hold while speaking (default: shift)
 - MODEL_SIZE: Whisper model size (default: small)
+- [settings] BACKEND: torch (PyTorch) or onnx (ONNX Runtime, run export_onnx.py first)
+- [onnx] INT8: Use the int8-quantized ONNX models (default: false)
+- [performance] WARMUP: Run a warm-up pass at startup so the first command is fast (default: true)
+- [performance] PREALLOCATE: Reuse one audio buffer for every transmission (default: true)
+- [performance] MMAP_WEIGHTS: Convert the model to <model>.safetensors once and mmap it on later launches (default: true)
+- [performance] STREAMING_MEL: Compute the log-mel spectrogram while recording (default: true)
+- [performance] BATCH_MAX_SIZE / BATCH_MAX_WAIT_MS: Decode up to N pending transmissions together,
+  waiting at most this long for more to arrive (default: 4 / 0, i.e. never delay a lone transmission)
+- [cache] COMMAND_CACHE_SIZE: Remember this many transcript -> command results (0 = off, default: 512)
+- [cache] PERSIST / FILE: Keep the cache between sessions in command_cache.json; it is
+  cleared automatically when tables.json, fixes.json or the airport changes
+- tables.json: Transcript correction tables (word replacements, phrase patterns, airline patterns).
+  They and fixes.json are compiled into tables.cache, rebuilt automatically when either file changes
+- [parser] MULTI_AIRCRAFT: One command per aircraft when a transmission addresses several ("Delta 123
+  descend and maintain 5000, American 456 turn left heading 270"), typed into VICE in one go. A new aircraft
+  starts only where a callsign opens a clause after a comma or period (default: true)
+- [parser] NUMBER_PARSER: Read spoken numbers with spoken_numbers.py ("one one thousand", "squawk four
+  two one seven") instead of the plain number-word replacements in tables.json (default: true)
+- fix_variants.py: Generate spoken variants and phonetic keys for fixes.json and the NASR database
+  (fix_variants.json); hand-written variants in fixes.json still come first
+- [fixdb] MAX_EDIT_DISTANCE / MATCH_CUTOFF: Fuzzy fix matching radius and minimum score (0-100)
+- [fixdb] DIR: Fix database built by import_nasr.py from FAA NASR data (any airport, blank folder = off)
+- [fixdb] RADIUS_NM / MAX_EXPANSIONS: Fixes within this radius of the airport are active; an unmatched
+  fix doubles the radius up to MAX_EXPANSIONS times, loading neighbouring ARTCC partitions on demand
+- [ai] LLM_FALLBACK: Ask a local llama.cpp server (llama-server with [ai] LOCAL_MODEL as GGUF) for
+  transcripts the parser can't turn into a command (default: false)
+- [ai] SERVER_URL / DEADLINE_MS / MAX_TOKENS: Where it runs, how long to wait, how much it may write
+- [logging] LEVEL / CONSOLE_LEVEL: vfv.log and terminal verbosity; DEBUG adds per-chunk and parser detail
+- [logging] MAX_BYTES / BACKUP_COUNT: vfv.log rotation
+- [archive] ENABLED: Record every transmission's audio, Whisper text and command in a background thread
+  (default: false); DIR / FORMAT (flac or npz) / MAX_MB / QUEUE_SIZE. session_archive.py export copies a
+  session into replay/
+- [profiling] HOTKEY / CONTROL_FILE: Press ctrl+alt+p or create profile.request (containing N, default
+  UTTERANCES) to profile the next N transmissions with cProfile and tracemalloc into [profiling] DIR
+- [speculative] ENABLED: Decode the first PARTIAL_SECONDS of a transmission while the controller is still
+  talking, bring VICE to the front and type ';CALLSIGN ' early; the final command completes it, or it is
+  erased on a different callsign, "disregard" or no command (default: false). MIN_LOGPROB: confidence a
+  partial decode needs; STAGE_PREFIX = false only pre-activates the window
+- [scheduler] LATENCY_BUDGET_MS: Transmissions not turned into a command this long after PTT release are
+  dropped rather than sent late (0 = never, default: 8000). A newer instruction of the same kind for the
+  same aircraft replaces an unsent one, and "disregard" (or "cancel that", "cancel last") cancels the
+  seat's unsent or still queued command
+- [cpu] INTRA_OP_THREADS / INTEROP_THREADS: Torch CPU threads, 0 = torch default
+- [cpu] ASR_CORES: Cores to pin transcription to, e.g. 0-3 (blank = no pinning). Applied before the model
+  loads, so torch's worker threads inherit it, as in autotune.py's trials
+- [cpu] FLUSH_DENORMAL: Flush denormal floats to zero (default: true)
+Multiple seats in one process (shared model and fixes): add one section per seat
+  [seat:<name>] with PTT_KEY, INPUT_DEVICE (PyAudio device index, blank = default)
+  and VICE_WINDOW (text in that seat's VICE window title, blank = first VICE window)
+Server mode (one model for several seats, see vfv_server.py):
+- py VFV.py --server: Load the model and serve [server] HOST/PORT for [server] AIRPORT
+- py VFV.py --client [URL]: Record with the local PTT key and let the server transcribe
+Run autotune.py to sweep the [cpu] settings on recordings in replay/ and save the fastest.
+Run bench_parser.py to measure parser speed and accuracy on synthetic transcripts (synth_transcripts.py).
+Run batch_eval.py to re-run recordings in replay/ through Whisper and the parser on a process pool.
+Run mine_logs.py to turn vfv.log and archived sessions into candidate word_replacements and fix variants.
 
 """
 import numpy as np
@@ -20,31 +76,39 @@ import os
 import pygetwindow as gw
 import logging
 import re
-from thefuzz import process, fuzz
 from typing import Optional, List
 import ctypes
 import io
 import torch
-from threading import Thread
+from threading import Thread, Lock, RLock
 from scipy import signal  # For audio filtering
-from queue import Queue
+from queue import Queue, Empty
 import json
-from fuzzywuzzy import fuzz
-import phonetics
 from datetime import datetime
-
-# Setup logging
-logging.basicConfig(
-    filename='vfv.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+from vfv_server import serve, StreamingUpload
+from scheduler import FairQueue, Utterance
+from vfv_tables import load_tables, TABLES_FILE
+from fixdb import FixDatabase
+from fix_index import FixIndex
+from llm_fallback import LLMFallback
+from spoken_numbers import NumberParser
+from session_archive import SessionArchive
+from vfv_profiler import UtteranceProfiler
+import wave
+import argparse
+import atexit
+import sys
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 # Configuration
 CONFIG_FILE = "config.ini"
+LOG_FILE = "vfv.log"
+FIXES_FILE = "fixes.json"
 DEFAULT_PTT_KEY = 'shift'
 DEFAULT_MODEL_SIZE = 'base'
+WARMUP_SECONDS = (1.0, 3.0, 6.0)  # Representative transmission lengths for warm-up
+MAX_RECORD_SECONDS = 30  # Whisper pads/trims everything to a 30s window
 FASTER_AUDIO_SETTINGS = {
     'format': pyaudio.paInt16,
     'channels': 1,
@@ -53,19 +117,447 @@ FASTER_AUDIO_SETTINGS = {
     'input': True,
     }
 
-class VoiceATC:
+
+def setup_logging() -> QueueListener:
+    """Route all logging through a queue so capture/parsing threads never wait on disk or terminal I/O.
+
+    A background listener writes vfv.log (rotating) and echoes the 'vfv.console' logger to the terminal.
+    """
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    file_level = getattr(logging, config.get('logging', 'LEVEL', fallback='INFO').upper(), logging.INFO)
+    console_level = getattr(logging, config.get('logging', 'CONSOLE_LEVEL', fallback='INFO').upper(), logging.INFO)
+
+    file_handler = RotatingFileHandler(
+        LOG_FILE,
+        maxBytes=config.getint('logging', 'MAX_BYTES', fallback=5_000_000),
+        backupCount=config.getint('logging', 'BACKUP_COUNT', fallback=3),
+        encoding='utf-8'
+    )
+    file_handler.setLevel(file_level)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(console_level)
+    console_handler.setFormatter(logging.Formatter('%(message)s'))
+    console_handler.addFilter(lambda record: record.name == 'vfv.console')
+
+    log_queue = Queue()  # Unbounded, so logging calls never block
+    root = logging.getLogger()
+    root.setLevel(min(file_level, console_level))
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+log_listener = setup_logging()
+logger = logging.getLogger(__name__)
+console = logging.getLogger('vfv.console')  # User-facing messages, also written to vfv.log
+# Whisper front-end constants (see whisper/audio.py)
+N_FFT = 400
+HOP_LENGTH = 160
+N_FRAMES = 3000  # 30s of 10ms mel frames
+ONNX_DIR = "onnx"  # Models exported by export_onnx.py
+REPLAY_DIR = "replay"  # Recorded transmissions (16 kHz mono 16-bit .wav) used for tuning
+# Words that mention another aircraft rather than address it ("traffic is a united 789", "departing jetblue 12")
+CALLSIGN_MENTIONS = {'traffic', 'follow', 'following', 'behind', 'departing', 'arriving', 'landing', 'preceding'}
+# Whole phrases only: "cancel approach clearance" or "cancel the hold" are instructions, not a disregard
+DISREGARD = re.compile(r'\bdisregard\b|\bcancel (?:that|(?:the |my )?last)\b')
+WHISPER_PROMPT = "Aircraft radio transmissions using ATC phrases like descend and maintain, heading, expect ILS runway"
+
+def is_disregard(text: str) -> bool:
+    """True when the controller takes back the transmission ("disregard", "cancel that", "cancel last")"""
+    return bool(DISREGARD.search(text.lower()))
+
+def parse_core_list(value: str) -> List[int]:
+    """Parse a core list like '0-3' or '0,2,4' (empty means no pinning)"""
+    cores = []
+    for part in value.replace(' ', '').split(','):
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            cores.extend(range(int(first), int(last) + 1))
+        else:
+            cores.append(int(part))
+    return cores
+
+
+def apply_cpu_tuning(intra_threads: int = 0, interop_threads: int = 0, flush_denormal: bool = True):
+    """Apply torch CPU thread settings. Must run before the model does any work."""
+    if intra_threads > 0:
+        torch.set_num_threads(intra_threads)
+    if interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # Can only be set once, before any inter-op parallel work has started
+            logger.warning(f"Could not set inter-op threads: {str(e)}")
+    if flush_denormal and not torch.set_flush_denormal(True):
+        logger.warning("Denormal flushing not supported on this CPU")
+    logger.info(f"Torch CPU threads: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}")
+
+
+def pin_current_thread(cores: List[int]):
+    """Pin the calling thread to the given CPU cores"""
+    if not cores:
+        return
+    try:
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, cores)
+        else:
+            mask = 0
+            for core in cores:
+                mask |= 1 << core
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask)
+        logger.info(f"Pinned ASR worker to cores {cores}")
+    except Exception as e:
+        logger.warning(f"Failed to pin thread to cores {cores}: {str(e)}")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB (0 if it can't be measured)"""
+    if sys.platform == 'win32':
+        # Only Windows reports a peak (the working set's); psutil's rss elsewhere is the current size
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except ImportError:
+            return 0.0
+    import resource
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)  # Bytes on macOS, KB on Linux
+
+
+def save_mmap_checkpoint(model, path: str):
+    """Write the loaded model as fp32 safetensors so later launches can mmap it"""
+    from safetensors.torch import save_file
+    state = {name: tensor.detach().float().contiguous().cpu() for name, tensor in model.state_dict().items()}
+    save_file(state, path, metadata={'dims': json.dumps(model.dims.__dict__)})
+
+
+def load_mmap_model(path: str, model_size: str, device: str):
+    """Build a Whisper model whose weights stay in the page cache backed by the safetensors file"""
+    from safetensors import safe_open
+    from safetensors.torch import load_file
+    from whisper.model import AudioEncoder, ModelDimensions, TextDecoder, Whisper
+
+    with safe_open(path, framework='pt') as f:
+        dims = ModelDimensions(**json.loads(f.metadata()['dims']))
+    state = load_file(path)  # mmap'd, pages are read on first use
+
+    # Build on the meta device so no memory is spent on random initial weights.
+    # Whisper.__init__ itself can't run on meta (to_sparse), so assemble it by hand.
+    model = Whisper.__new__(Whisper)
+    torch.nn.Module.__init__(model)
+    model.dims = dims
+    with torch.device('meta'):
+        model.encoder = AudioEncoder(dims.n_mels, dims.n_audio_ctx, dims.n_audio_state, dims.n_audio_head, dims.n_audio_layer)
+        model.decoder = TextDecoder(dims.n_vocab, dims.n_text_ctx, dims.n_text_state, dims.n_text_head, dims.n_text_layer)
+    model.load_state_dict(state, assign=True)
+
+    # Non-persistent buffers aren't in the checkpoint and have to be rebuilt
+    mask = torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-np.inf).triu_(1)
+    model.decoder.register_buffer("mask", mask, persistent=False)
+    alignment_heads = whisper._ALIGNMENT_HEADS.get(model_size)
+    if alignment_heads is not None:
+        model.set_alignment_heads(alignment_heads)
+    else:
+        all_heads = torch.zeros(dims.n_text_layer, dims.n_text_head, dtype=torch.bool)
+        all_heads[dims.n_text_layer // 2:] = True
+        model.register_buffer("alignment_heads", all_heads.to_sparse(), persistent=False)
+
+    if any(t.is_meta for t in list(model.parameters()) + list(model.buffers())):
+        raise RuntimeError(f"'{path}' is missing weights")
+    return model.to(device)
+
+
+def load_wav_frames(path: str, chunk: int = 1024) -> List[bytes]:
+    """Read a 16 kHz mono 16-bit wav into chunks shaped like record_audio's output"""
+    with wave.open(path, 'rb') as wf:
+        data = wf.readframes(wf.getnframes())
+    step = chunk * 2
+    return [data[i:i + step] for i in range(0, len(data), step)]
+
+
+class StreamingFeatures:
+    """Incremental version of the VFV audio front-end plus whisper's log-mel spectrogram.
+
+    Applies the same gain, high-pass filter and clipping as transcribe_audio chunk by chunk
+    and computes STFT/mel frames as soon as a full window is available, so the features
+    are ready when the PTT key is released.
+    """
+
+    def __init__(self, n_mels: int = 80, filters_path: str = 'mel_filters.npz'):
+        self.n_mels = n_mels
+        with np.load(filters_path, allow_pickle=False) as f:
+            self.filters = f[f"mel_{n_mels}"].astype(np.float32)
+        # torch.hann_window is periodic by default
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)).astype(np.float32)
+        self.sos = signal.butter(4, 100, 'hp', fs=FASTER_AUDIO_SETTINGS['rate'], output='sos')
+        self.reset()
+
+    def reset(self):
+        """Start a new transmission"""
+        self.zi = np.zeros((self.sos.shape[0], 2))
+        self.head = np.zeros(0, dtype=np.float32)
+        self.buffer = None
+        self.frames = []
+        self.frame_count = 0
+        self.abs_sum = 0.0
+        self.sample_count = 0
+
+    @property
+    def mean_amplitude(self) -> float:
+        return self.abs_sum / self.sample_count if self.sample_count else 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.sample_count / FASTER_AUDIO_SETTINGS['rate']
+
+    def add_chunk(self, data: bytes):
+        """Feed one raw 16-bit PCM chunk from the input stream"""
+        x = np.frombuffer(data, dtype=np.int16).astype(np.float32) * (3.0 / 32768.0)
+        x, self.zi = signal.sosfilt(self.sos, x, zi=self.zi)
+        x = np.clip(x, -1.0, 1.0).astype(np.float32)
+        self.abs_sum += float(np.abs(x).sum())
+        self.sample_count += len(x)
+        self._push(x)
+
+    def _push(self, x: np.ndarray):
+        pad = N_FFT // 2
+        if self.buffer is None:
+            # torch.stft(center=True) reflect-pads the start, which needs pad + 1 samples
+            self.head = np.concatenate([self.head, x])
+            if len(self.head) <= pad:
+                return
+            self.buffer = np.concatenate([self.head[1:pad + 1][::-1], self.head])
+            self.head = None
+        else:
+            self.buffer = np.concatenate([self.buffer, x])
+        self._compute_frames()
+
+    def _compute_frames(self):
+        count = (len(self.buffer) - N_FFT) // HOP_LENGTH + 1
+        count = min(count, N_FRAMES - self.frame_count)
+        if count <= 0:
+            return
+        windows = np.lib.stride_tricks.sliding_window_view(self.buffer, N_FFT)[::HOP_LENGTH][:count]
+        power = np.abs(np.fft.rfft(windows * self.window, axis=-1)) ** 2
+        mel = self.filters @ power.T.astype(np.float32)
+        self.frames.append(np.log10(np.maximum(mel, 1e-10)))
+        self.frame_count += count
+        self.buffer = self.buffer[count * HOP_LENGTH:]
+
+    def finalize(self) -> np.ndarray:
+        """Return the (n_mels, 3000) log-mel segment whisper.decode expects"""
+        # transcribe() appends 30s of silence before the STFT, so flush the tail with zeros
+        if self.buffer is None:
+            self.head = np.concatenate([self.head, np.zeros(N_FFT // 2 + 1 - len(self.head), dtype=np.float32)])
+            self._push(np.zeros(0, dtype=np.float32))
+        self.buffer = np.concatenate([self.buffer, np.zeros(N_FFT, dtype=np.float32)])
+        self._compute_frames()
+        return self.snapshot()
+
+    def snapshot(self) -> np.ndarray:
+        """Log-mel segment of the frames computed so far; recording can go on afterwards"""
+        log_spec = np.full((self.n_mels, N_FRAMES), -10.0, dtype=np.float32)  # log10 of silence
+        if self.frames:
+            computed = np.concatenate(self.frames, axis=1)
+            log_spec[:, :computed.shape[1]] = computed
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+
+# VICE command tokens -> the instruction they give, so a newer one of the same kind can replace it
+COMMAND_KINDS = [
+    ('altitude', re.compile(r'[DC]\d{3}|E[DC]')),
+    ('heading', re.compile(r'[lrH]\d{3}')),
+    ('speed', re.compile(r'S\d{2,3}|SS|S')),
+    ('squawk', re.compile(r'SQ\d{4}')),
+    ('approach', re.compile(r'[EC][IRV]\d{1,2}[LRC]?|[EC](?:MTV|RIV)|CAC|CVS')),
+    ('direct', re.compile(r'D[A-Z]{2,5}')),
+]
+
+
+def token_kind(token: str) -> str:
+    return next((kind for kind, pattern in COMMAND_KINDS if pattern.fullmatch(token)), token)
+
+
+def command_kinds(line: str) -> set:
+    """Kinds of instruction in one VICE command line (';452 D050 l270' -> {'altitude', 'heading'})"""
+    return {token_kind(token) for token in line.split()[1:]}
+
+
+class CommandCache:
+    """Bounded LRU map from normalized transcript to formatted VICE command (None = no command).
+
+    Optionally persisted to a JSON file; the file is discarded when its fingerprint
+    (tables.json/fixes.json hash and airport) no longer matches.
+    """
+
+    def __init__(self, max_size: int = 512, path: Optional[str] = None, fingerprint: str = ''):
+        self.max_size = max_size
+        self.path = path
+        self.fingerprint = fingerprint
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def get(self, key: str):
+        """Return (found, command) and mark the entry as recently used"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: str, command: Optional[str]):
+        with self.lock:
+            self.entries[key] = command
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('fingerprint') != self.fingerprint:
+                logger.info(f"Command cache '{self.path}' is stale (fixes changed), starting empty")
+                return
+            for key, command in data.get('entries', [])[-self.max_size:]:
+                self.entries[key] = command
+            logger.info(f"Loaded {len(self.entries)} cached commands from '{self.path}'")
+        except Exception as e:
+            logger.error(f"Error loading command cache: {str(e)}")
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            data = {'fingerprint': self.fingerprint, 'entries': list(self.entries.items())}
+        try:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            logger.info(f"Saved {len(data['entries'])} cached commands to '{self.path}' "
+                        f"(hit rate {self.hit_rate:.0%} over {self.hits + self.misses} lookups)")
+        except Exception as e:
+            logger.error(f"Error saving command cache: {str(e)}")
+
+
+class Seat:
+    """One controller position: its PTT key, microphone and VICE window"""
+
+    def __init__(self, name: str, ptt_key: str, input_device: Optional[int] = None, vice_window: str = ''):
+        self.name = name
+        self.ptt_key = ptt_key
+        self.input_device = input_device
+        self.vice_window = vice_window.lower()  # Matched against the VICE window title
+        self.stream = None
+        self.features = None
+        # Filled by the PyAudio callback between the PTT press and release edges; a new queue per press,
+        # so a press can't touch the chunks (or the None end marker) of a recording still being read
+        self.chunks = Queue()
+        self.presses = Queue()  # Each press's chunk queue, for the capture thread in press order
+        self.recording = False
+        self.press_time = 0.0
+        self.release_time = 0.0
+        self.speculation = None  # The transmission's Speculation while VICE holds its staged prefix
+
+
+class Speculation:
+    """Callsign guessed from the first seconds of a transmission and what was staged in VICE for it"""
+
     def __init__(self):
+        self.lock = Lock()
+        self.started = False
+        self.closed = False  # The final command arrived; speculate() must not touch VICE any more
+        self.window = None
+        self.callsign = None
+        self.staged = ''  # Text typed into VICE ahead of the final command, e.g. ";452 "
+        self.disregarded = False  # Its "disregard" already cancelled a queued transmission
+
+
+class VoiceATC:
+    def __init__(self, airport_code: Optional[str] = None, interactive: bool = True, backend: Optional[str] = None,
+                 server_url: Optional[str] = None, text_only: bool = False, cpu_threads: int = 0,
+                 batch: bool = False):
         self.model = None
+        self.model_lock = RLock()  # Speculative partial decodes share the model with the processing thread
         self.audio = None
-        self.stream = None
+        self.config = configparser.ConfigParser()
         self.ptt_key, self.model_size = self.load_config()
-        self.command_cache = {}
-        self.audio_queue = Queue()
-        self.load_model()
+        self.command_cache = None  # Created once the airport (and so the fix set) is known
+        self.audio_queue = FairQueue(on_discard=self.discard_transmission)
+        self.metrics = {
+            'cold_latency': None,
+            'warm_latency': None,
+            'transcriptions': 0,
+            'transcribe_time': 0.0,
+        }
+        self.audio_buffer = None
+        self.features = None
+        self.onnx_model = None
+        self.n_mels = None
+        self.mel_filters_path = None
+        self.backend = (backend or self.config.get('settings', 'BACKEND', fallback='torch')).lower()
+        # Intra-op threads for torch or ONNX Runtime; batch_eval's workers each pass their share of the cores
+        self.cpu_threads = cpu_threads or self.config.getint('cpu', 'INTRA_OP_THREADS', fallback=0)
+        # Thin client mode: a VFV server holds the model and fixes
+        self.server_url = server_url
+        # text_only: benchmarks and tools that only exercise the transcript parser skip Whisper
+        # batch: batch_eval's pool workers, which get no command cache (command_cache.json) or session archive
+        if not self.server_url and not text_only:
+            self.load_model()
+
+        self.seats = self.load_seats()
+        # Early callsign resolution while the controller is still talking (VICE seats only)
+        self.speculative = (not self.server_url and not text_only
+                            and self.config.getboolean('speculative', 'ENABLED', fallback=False))
+
+        # Correction tables and fixes, loaded from the precompiled tables.cache
+        self.tables = load_tables(TABLES_FILE, FIXES_FILE)
+        self.word_replacements = self.tables.word_replacements
+        self.phrase_patterns = self.tables.phrase_patterns
+        self.protected_phrases = self.tables.protected_phrases
+        self.airline_patterns = self.tables.airline_patterns
+        self.number_words = self.tables.number_words
+        # Context-aware spoken numbers instead of the plain number-word replacements
+        self.number_parser = None
+        if self.config.getboolean('parser', 'NUMBER_PARSER', fallback=True):
+            self.number_parser = NumberParser(self.tables.number_vocabulary)
+            self.word_replacements = self.tables.text_replacements
+        # Split "delta 123 descend ..., american 456 turn ..." into one command per aircraft
+        self.multi_aircraft = self.config.getboolean('parser', 'MULTI_AIRCRAFT', fallback=True)
+        # Optional NASR fix database (import_nasr.py) for airports beyond fixes.json
+        self.fix_db = FixDatabase.open(self.config.get('fixdb', 'DIR', fallback='fixdb'))
+        self.fix_expansions = 0
 
         #fixes init
-        self.airport_code = self.prompt_airport_code()
+        if self.server_url:
+            self.airport_code = None
+        else:
+            self.airport_code = self.prompt_airport_code() if interactive else airport_code
         self.faa_fixes = self.load_faa_fixes()
+        self.fix_variations = self.load_fix_variations()
+        self.command_cache = None if batch else self.create_command_cache()
 
         # Add this to your VoiceATC class initialization
         self.command_examples = """
@@ -80,6 +572,19 @@ class VoiceATC:
             - "Westjet 890, reduce speed to 210 knots" → ";890 S210"
             """
         self.command_history = []
+        self.llm_fallback = self.create_llm_fallback()
+        self.archive = None if batch else self.create_session_archive()
+        self.profiler = UtteranceProfiler(
+            self.config.get('profiling', 'DIR', fallback='profiles'),
+            self.config.get('profiling', 'CONTROL_FILE', fallback='profile.request'),
+            self.config.getint('profiling', 'UTTERANCES', fallback=5)
+        )
+        self.last_raw_text = None  # Whisper's text before preprocess_text, for the archive
+        self.last_raw_texts = []  # The same for each item of the last transcribe_batch
+
+        # Airline names as Whisper spells them before the word replacements ("sky watch", "jet blue")
+        airline_words = '|'.join([pattern.pattern for pattern, replacement in self.word_replacements
+                                  if replacement in self.airline_patterns] + list(self.airline_patterns))
 
         # Initialize all pre-compiled regex patterns
         self.regex_patterns = {
@@ -91,358 +596,109 @@ class VoiceATC:
             'rnav_expect': re.compile(r'rnav runway (\d{1,2})(?:([lrc])|\s+(left|right|center))', re.IGNORECASE),
             'ils_cleared': re.compile(r'ils.*?runway (\d{1,2})(?:([lrc])|\s+(left|right|center))', re.IGNORECASE),
             'rnav_cleared': re.compile(r'rnav.*?runway (\d{1,2})(?:([lrc])|\s+(left|right|center))', re.IGNORECASE),
+            # Where a callsign starts a clause: the N-number and airline patterns of extract_callsign
+            'callsign_start': re.compile(r'\bn\s*[a-z]?\d{1,5}[a-z]{0,2}\b|\b(?:southwest|swa|american|aal|delta|dal|united'
+                                        r'|ual|jetblue|jbu|skywest|skw|westjet|wj|envoy|eny)\s+\d{2,4}[a-z]?\b', re.IGNORECASE),
+            'clause_comma': re.compile(rf',\s*(?=n\s*[a-z]?\d|november\b|{airline_words})', re.IGNORECASE),
             }
 
-        # Start processing thread
-        self.processing_thread = Thread(target=self.process_audio_queue, daemon=True)
-        self.processing_thread.start()
-
-        # Enhanced word replacements dictionary with additions from log analysis
-        self.word_replacements = {
-            # Improved airline names with more variations
-            r'\b(?:sky\s?west|skywest|skw|sky\s?w|sky\s?watch|sky\s?ward|sky\s?wide|sky\s?wire|sky\s?wast|sky\s?ways|sky\s?way|sky\s?lar)\b': 'skywest',
-            r'\b(?:west\s?jet|westjet|wj|west\s?j)\b': 'westjet',
-            r'\b(?:american|american airlines|aal|america)\b': 'american',
-            r'\b(?:delta|delta airlines|dal|delta air)\b': 'delta',
-            r'\b(?:united|united airlines|ual|you nighted)\b': 'united',
-            r'\b(?:southwest|southwest airlines|swa|south west)\b': 'southwest',
-            r'\b(?:jet\s?blue|jetblue|jbu|jet blue|jet\s?b)\b': 'jetblue',
-            r'\b(?:envoy|envy|envoi|onvoi|on board)\b': 'envoy',
-            r'\b(?:blue\s?streak|blue\s?shriek)\b': 'bluestreak',
-
-            r'\bmount vernon\b': 'mt vernon',
-            r'\bmt vernon\b': 'mt vernon',
-            r'\bmount v\b': 'mt vernon',
-            r'\bmt v\b': 'mt vernon',
-
-            # Enhanced phonetic alphabet with more misrecognitions
-            'alpha': 'a', 'alfa': 'a', 'owl fa': 'a', 'alba': 'a',
-            'bravo': 'b', 'brah vo': 'b', 'bray vo': 'b', 'bravo': 'b',
-            'charlie': 'c', 'char lee': 'c', 'shar lee': 'c', 'charley': 'c',
-            'delta': 'd', 'dell ta': 'd', 'dell tuh': 'd', 'della': 'd',
-            'echo': 'e', 'eck oh': 'e', 'eh ko': 'e', 'eco': 'e',
-            'foxtrot': 'f', 'fox trot': 'f', 'focks trot': 'f', 'fox trot': 'f', 'fox drop':'f', 'foxstap' : 'f',
-            'golf': 'g', 'gulf': 'g', 'goal f': 'g', 'gulf': 'g',
-            'hotel': 'h', 'hoe tell': 'h', 'ho tell': 'h', 'hotel': 'h',
-            'india': 'i', 'in dee ah': 'i', 'in dia': 'i', 'indigo': 'i',
-            'juliet': 'j', 'jew lee et': 'j', 'jool yet': 'j', 'juliet': 'j',
-            'kilo': 'k', 'key low': 'k', 'kee lo': 'k', 'kilo': 'k',
-            'lima': 'l', 'lee ma': 'l', 'lye ma': 'l', 'lima': 'l',
-            'mike': 'm', 'my ke': 'm', 'mic': 'm', 'mike': 'm',
-            'november': 'n', 'no vem ber': 'n', 'know vem ber': 'n', 'november': 'n',
-            'oscar': 'o', 'oss car': 'o', 'aws car': 'o', 'oscar': 'o',
-            'papa': 'p', 'pah pah': 'p', 'paw paw': 'p', 'papa': 'p',
-            'quebec': 'q', 'kay beck': 'q', 'kweh beck': 'q', 'quebec': 'q',
-            'romeo': 'r', 'row me oh': 'r', 'roh me oh': 'r', 'romeo': 'r', 'romio': 'r',
-            'sierra': 's', 'see air ah': 's', 'sigh air ah': 's', 'sierra': 's',
-            'tango': 't', 'tan go': 't', 'tang oh': 't', 'tango': 't',
-            'uniform': 'u', 'you knee form': 'u', 'yoo nee form': 'u', 'uniform': 'u',
-            'victor': 'v', 'vic tor': 'v', 'vik tor': 'v', 'victor': 'v',
-            'whiskey': 'w', 'wiss key': 'w', 'whis key': 'w', 'whiskey': 'w',
-            'xray': 'x', 'ex ray': 'x', 'ecks ray': 'x', 'xray': 'x', 'x-ray': 'x',
-            'yankee': 'y', 'yang key': 'y', 'yank ee': 'y', 'yankee': 'y',
-            'zulu': 'z', 'zoo loo': 'z', 'zoo lu': 'z', 'zulu': 'z',
-            'emir8s' :'emirites',
-
-            # Enhanced numbers with more misrecognitions
-            'zero': '0', 'hero': '0', 'hear oh': '0', 'ze ro': '0',
-            'one': '1', 'won': '1', 'wan': '1', 'wun': '1',
-            'two': '2', 'too': '2', 'true': '2', 'to': '2',
-            'three': '3', 'tree': '3', 'threw': '3', 'free': '3', 'through': '3',
-            'four': '4', 'for': '4', 'fore': '4', 'fower': '4',
-            'five': '5', 'fife': '5', 'fyve': '5', 'fife': '5',
-            'six': '6', 'sicks': '6', 'sex': '6', 'sax': '6',
-            'seven': '7', 'sebben': '7', 'sven': '7', 'sevin': '7',
-            'eight': '8', 'ait': '8', 'ate': '8', 'ait': '8',
-            'nine': '9', 'niner': '9', 'nyne': '9', 'niner': '9', '9 or': '9',
-            'ten': '10', 'tin': '10', 'tenne': '10', 
-            'eleven': '11', 'leven': '11', 'e leven': '11',
-            'twelve': '12', 'twelf': '12', 'twelv': '12',
-            'thirteen': '13', 'thur teen': '13', 'ter teen': '13',
-            'twenty': '20', 'twen ty': '20', 'twunty': '20',
-            'thirty': '30', 'thurty': '30', 'dirty': '30',
-            'forty': '40', 'for ty': '40', 'farty': '40',
-            'fifty': '50', 'fif ty': '50', 'fivety': '50',
-            'sixty': '60', 'six ty': '60', 'siksty': '60',
-            'seventy': '70', 'seven ty': '70', 'sevendy': '70',
-            'eighty': '80', 'eight ty': '80', 'aydee': '80',
-            'ninety': '90', 'nine ty': '90', 'nindy': '90',
-
-            # Common command words with more variations
-            'maintain': 'maintain', 'man tain': 'maintain', 'men tain': 'maintain', 'main tain': 'maintain',
-            'descend': 'descend', 'de scend': 'descend', 'the send': 'descend', 'decent': 'descend',
-            'climb': 'climb', 'clime': 'climb', 'cly me': 'climb', 'climb': 'climb',
-            'heading': 'heading', 'hed ing': 'heading', 'head in': 'heading', 'head ing': 'heading',
-            'speed': 'speed', 'sped': 'speed', 'spee dee': 'speed', 'speed': 'speed',
-            'knots': 'knots', 'nauts': 'knots', 'notes': 'knots', 'knots': 'knots',
-            'runway': 'runway', 'run way': 'runway', 'r and a': 'runway', 'run way': 'runway',
-            'ils': 'ils', 'ill ess': 'ils', 'ill s': 'ils', 'ils': 'ils',
-            'visual': 'visual', 'vizh ul': 'visual', 'viz you all': 'visual', 'visual': 'visual',
-            'cleared': 'cleared', 'cleard': 'cleared', 'cleer ed': 'cleared', 'cleared': 'cleared',
-            'expect': 'expect', 'ex pect': 'expect', 'ex pekt': 'expect', 'expect': 'expect',
-            'contact': 'contact', 'con tact': 'contact', 'conn tacked': 'contact', 'contact': 'contact',
-            'intercept': 'intercept', 'in ter sept': 'intercept', 'inner sept': 'intercept', 'intercept': 'intercept',
-            'localizer': 'localizer', 'low kal izer': 'localizer', 'local ize her': 'localizer', 'localizer': 'localizer',
-            'expedite': 'expedite', 'ex pe dite': 'expedite', 'exped ite': 'expedite', 'expedite': 'expedite',
-            'fire heading': 'fly heading',  # Fix common misrecognition
-            'clte maintain': 'climb and maintain',  # Fix common misrecognition
-            'turn lap heading': 'turn left heading',  # Fix common misrecognition
-            'expect the ils' : 'expect ils',
-            'radar contact': '',
-            'claire, direct': 'cleared direct',
-            'klamen maintain': 'climb and maintain',
-            'the set of maintain' : 'descend and maintain',
-            'to set and maintain' : 'descend and maintain',
-            'heading': 'fly heading',
-            'expect the rnav': 'expect rnav',
-            "rnap": "rnav",
-            "clear direct": "cleared direct",
-            ",": "",
-            "intercept the localizer": "intercept localizer",
-            "clare": "cleared",
-            "claire" : "cleared",
-            "klederik": "cleared direct",
-            "maintain a": "maintain",
-            "-":"",
-            "newark approuch" : "",
-            "clear 2": "cleared",
-            "quiderac" : "cleared direct",
-            "onvoice": "envoy",
-            "are now": "rnav",
-            "our nav": "rnav",
-            "rnaw": "rnav",
-            "r now": "rnav",
-            "common": "climb",
-            "realmio" :"r",
-            "r9": "rnav",
-            "i10t": "ident",
-            "derek": "direct",
-            "2wer": "tower",
-            "mromio": "mr",
-            "cleared 2 rnav": "cleared rnav",
-            "r and r":"rnav",
-            "screen 4":"springfield",
-            "cladrack":"cleared direct",
-            "remember":"november",
-            "claderick": "cleared direct",
-            "this regard":"disregard",
-            "glair": "clear",
-            "clair": "clear",
-            'foxtrap': 'f',
-            'rnab': 'rnav',
-            'glader': 'cleared',
-            'rna' : 'rnav',
-            'foxrock' : 'f',
-            'cleareddrac':'cleared direct',
-            'moc c': 'moxy',
-            'moxc': 'moxy',
-            'on voice': 'envoy',
-            'rnavv': 'rnav',
-            ' mountain': 'mt',
-            'clte': 'climb and maintain',
-            'ritter' :'radar',
-
-            
-            'themt burn'   : 'mt vernon',
-            'po2mac approach': '',
-            'cloud remain': 'climb and maintain',
-            'amount 4an unveasured': 'mt vernon',
-            'amount burn on': 'mt vernon',
-            'clamana maintain': 'climb and maintain',
-            'mount burn': 'mt vernon',
-            'send and maintain': 'descend and maintain',
-            'clominant maintain': 'climb and maintain',
-            'recard': 'brickyard',
-            'them out vernon visual': 'mt vernon visual',
-            'them out learn on visual runway 1': 'mt vernon visual runway 1',
-            'and receptor': 'intercept',
-            'mount run on a': 'mt vernon',
-            'themt vernav on the': 'mt vernon',
-            'themtvernon': 'mt vernon',
-            'them out very nonvisual': 'mt vernon visual',
-            'mount run on visual': 'mt vernon visual',
-            ' clominimaintain': 'climb and maintain',
-            'mount 4 nonvisual': 'mt vernon visual',
-            ' them out run on a': 'mt vernon',
-            'clamant maintain': 'climb and maintain',
-            ' themtvern on visual': 'mt vernon visual',
-            'renouts': 'knots',
-            'contact potomac approach': 'contact approach',
-            'maverine individual approach': 'mt vernon visual',
-            'cladwick': 'cleared direct',
-            'themtvern on visual': 'mt vernon visual',
-            'renouts': 'knots',
-            'contact potomac approach': 'contact approach',
-            'maverine individual approach': 'mt vernon visual',
-            'mount burn on visual': 'mt vernon visual',
-            'mount vernon vegl': 'mt vernon visual',
-            'mountain vernon visual': 'mt vernon visual',
-            'mt burn on visual': 'mt vernon visual',
-            'mt vernon vegl': 'mt vernon visual',
-            'them out vernon visual': 'mt vernon visual',
-            'mount vernon on visual': 'mt vernon visual',
-            'mt vernon on visual': 'mt vernon visual',
-            'mount vernon visual': 'mt vernon visual',
-            'mt vernon visual runway 1': 'mt vernon visual',
-            'mt vernon visual runway 1 approach': 'mt vernon visual',
-            'mt vernon on a visual runway 1': 'mt vernon visual',
-            'the mount vernon visual': 'mt vernon visual',
-            'the mt vernon visual': 'mt vernon visual',
-            'the mount burn on visual': 'mt vernon visual',
-            'themt vernon visual': 'mt vernon visual',
-            'themt burn on visual': 'mt vernon visual',
-            'the mount run on a visual': 'mt vernon visual',
-            'themt vernav on the visual': 'mt vernon visual'  ,
-            '222':'22'     
-     }
-
-        # New protected phrases list
-        self.protected_phrases = [
-            'runway',
-            'ils runway',
-            'rnav runway',
-            'visual approach',
-            'skywest',
-            'westjet',
-            'american',
-            'delta',
-            'united',
-            'southwest',
-            'jetblue',
-            'contact tower',
-            'tam',
-            'cleared',
-            '40',
-            'tower',
-            'ident'
-        ]
-
-        # Enhanced airline patterns for callsign extraction
-        self.airline_patterns = {
-            'skywest': r'\b(?:sky\s?west|skw)\s*(\d{2,4})([a-z])?\b',
-            'westjet': r'\b(?:west\s?jet|wj)\s*(\d{2,4})([a-z])?\b',
-            'american': r'\b(?:american|aal)\s*(\d{2,4})([a-z])?\b',
-            'delta': r'\b(?:delta|dal)\s*(\d{2,4})([a-z])?\b',
-            'united': r'\b(?:united|ual)\s*(\d{2,4})([a-z])?\b',
-            'southwest': r'\b(?:southwest|swa)\s*(\d{2,4})([a-z])?\b',
-            'jetblue': r'\b(?:jet\s?blue|jbu)\s*(\d{2,4})([a-z])?\b',
-            'alaska': r'\b(?:alaska|asa)\s*(\d{2,4})([a-z])?\b',
-            'generic': r'\b([a-z]{2,3})\s*(\d{2,4})([a-z])?\b',
-            'envoy': r'\b(?:ENVOY|ENY)\s*(\d{2,4})([A-Z])?\b',
-            'commuter': r'\b(?:commut[ae]r\s*air|com\s*air|comm\s*air|comair|cma|cmair)\s*(\d{2,4})([a-z])?\b'
-        }
-        self.number_words = {
-            "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4",
-            "five": "5", "six": "6", "seven": "7", "eight": "8", "niner": "9",
-            "ten": "10", "eleven": "11", "twelve": "12", "thirteen": "13",
-            "fourteen": "14", "fifteen": "15", "sixteen": "16", "seventeen": "17",
-            "eighteen": "18", "nineteen": "19", "twenty": "20", "thirty": "30",
-            "forty": "40", "fifty": "50", "sixty": "60", "seventy": "70",
-            "eighty": "80", "ninety": "90"
-        }
-        self.phrase_patterns = [
-            # Number formatting
-            (r'(\d)-(\d)-(\d)-(\d)', r'\1\2\3\4'),  # Convert 8-2-1-0 to 8210
-            (r'(\d)-(\d)-(\d)', r'\1\2\3'),        # Convert 3-1-0 to 310
-            (r'(\d)-(\d)', r'\1\2'),               # Convert 3-1 to 31
-            (r'(\d)\s(\d)\s(\d)', r'\1\2\3'),      # Convert "3 2 0" to "320"
-            (r'(\d)\s(\d)', r'\1\2'),              # Convert "3 2" to "32"
-            (r'(\d)\.(\d+)', r'\1\2'),             # Convert 43.91 to 4391
-            (r'(\d+)\s*,\s*(\d+)', r'\1\2'),       # Convert 4,000 to 4000
-
-            (r'expect (?:the )?mt vernon visual', 'expect mt vernon visual'),
-            (r'mt vernon visual runway', 'mt vernon visual runway'),
-            
-            # Command standardization
-            (r'fly heading[s]?', 'heading'),
-            (r'clear(?:ed)? to', 'cleared'),
-            (r'runway (\d+)\s*([lrc])', r'runway \1\2'),
-            (r'descend (?:and )?to maintain', 'descend and maintain'),
-            (r'climb (?:and )?to maintain', 'climb and maintain'),
-            (r'(\d)\s*([a-z])\b', r'\1\2'),        # Combine numbers with letters (e.g., "981 d" -> "981d")
-            (r'(\d+)\s*delta\b', r'\1d'),          # Handle "981 Delta" -> "981d"
-            (r'\bby\b', 'fly'),                    # Fix "by heading" -> "fly heading"
-            (r'\bif i\b', 'fly'),
-            (r'expect ils runwestjetay', 'expect ils runway'),
-            (r'sky westjetest', 'skywest'),
-            (r'runwestjetay', 'runway'),
-            (r'rwy\s*(\d+)', r'runway \1'),
-            (r'expect\s*ils', 'expect ils'),
-            (r'turn lap heading', 'turn left heading'),
-            (r'fire heading', 'fly heading'),
-            (r'clte maintain', 'climb and maintain'),
-            (r'(\d+)\s*june', r'\1'),  # Fix "4 june 76th" -> "476"
-            (r'(\d+)(?:st|nd|rd|th)\b', r'\1'),  # Remove ordinal suffixes
-            (r'(\d+)\s*trigger\s*(\d+)', r'\1'),  # Remove trigger numbers
-            (r'(\d)\s*([a-z])\s*([a-z])\b', r'\1\2\3'),  # For "252 v i" -> "252vi"
-            (r'(\d)([a-z])\s+([a-z])\b', r'\1\2\3'),     # For "252v i" -> "252vi"
-        ]
+        # Start processing thread (tools that drive VoiceATC directly don't need it)
+        self.processing_thread = None
+        if interactive:
+            target = self.process_remote_queue if self.server_url else self.process_audio_queue
+            self.processing_thread = Thread(target=target, daemon=True)
+            self.processing_thread.start()
 
     #--------------------------------------------------------------------------------FAA FIXES
 
     def prompt_airport_code(self) -> str:
         """Prompt user to enter their airport code and validate it"""
-        json_file = 'fixes.json'  # Change to 'fixes.json' if keeping that name
-        try:
-            with open(json_file, 'r') as f:
-                data = json.load(f)
-                available_airports = [k for k in data if k != "GENERAL"]
-                
-                while True:
-                    print(f"\nAvailable airports: {', '.join(available_airports)}")
-                    print("THIS IS FOR FIXES NOT ALL FIXES ARE IMPLIMENTED\nPlease enter your airport code or just hit enter if your airport is not listed:")
-                    code = input("Airport Code: ").strip().upper()
-                    
-                    if code in data or code == "ALL":
-                        return code
-                    elif code == "":
-                        return None
-                    print(f"Invalid code. Please choose from: {', '.join(available_airports)} or ALL")
-        
-        except FileNotFoundError:
-            logger.error(f"FAA fixes file '{json_file}' not found")
-            print(f"Error: FAA fixes file '{json_file}' not found. Using ALL fixes only.")
-            return "GENERAL"
-        except Exception as e:
-            logger.error(f"Error reading '{json_file}': {str(e)}")
-            print(f"Error reading FAA fixes file: {str(e)}. Using ALL fixes only.")
+        data = self.tables.fixes
+        if data is None:
+            logger.error(self.tables.fixes_error)
+            print(f"Error: {self.tables.fixes_error}. Using ALL fixes only.")
             return "GENERAL"
 
+        available_airports = [k for k in data if k != "GENERAL"]
+        while True:
+            print(f"\nAvailable airports: {', '.join(available_airports)}")
+            if self.fix_db:
+                print("Any airport in the imported NASR fix database is also accepted.")
+            print("THIS IS FOR FIXES NOT ALL FIXES ARE IMPLIMENTED\nPlease enter your airport code or just hit enter if your airport is not listed:")
+            code = input("Airport Code: ").strip().upper()
+
+            if code in data or code == "ALL" or (self.fix_db and self.fix_db.locate(code)):
+                return code
+            elif code == "":
+                return None
+            print(f"Invalid code. Please choose from: {', '.join(available_airports)} or ALL")
+
     def load_faa_fixes(self):
         """Load FAA fixes with multiple spoken forms"""
+        if self.tables.fixes is None:
+            logger.error(f"Error loading fixes: {self.tables.fixes_error}")
+            print(f"Error loading fixes: {self.tables.fixes_error}")
+            return {}
+
+        # Handle both the specific airport and GENERAL (GENERAL wins on conflicts)
+        fixes = {}
+        for airport in (self.airport_code, "GENERAL"):
+            fixes.update(self.tables.fix_index.get(airport, {}))
+        return fixes
+
+    def create_command_cache(self) -> Optional[CommandCache]:
+        """Transcript -> command LRU cache, invalidated whenever the tables, fixes or airport change"""
+        max_size = self.config.getint('cache', 'COMMAND_CACHE_SIZE', fallback=512)
+        if max_size <= 0:
+            return None
+        path = None
+        if self.config.getboolean('cache', 'PERSIST', fallback=True):
+            path = self.config.get('cache', 'FILE', fallback='command_cache.json')
+        fix_db_version = self.fix_db.manifest.get('effective') if self.fix_db else None
+        fingerprint = f"{self.tables.source_hash}:{fix_db_version}:{self.airport_code}:{bool(self.number_parser)}:{self.multi_aircraft}"
+        cache = CommandCache(max_size, path, fingerprint)
+        if path:
+            atexit.register(cache.save)
+        return cache
+
+    def create_llm_fallback(self) -> Optional[LLMFallback]:
+        """Local LLM for transcripts the parser can't handle ([ai] LLM_FALLBACK, off by default)"""
+        if self.server_url or not self.config.getboolean('ai', 'LLM_FALLBACK', fallback=False):
+            return None
+        fallback = LLMFallback(
+            self.config.get('ai', 'SERVER_URL', fallback='http://127.0.0.1:8080'),
+            self.command_examples,
+            deadline_ms=self.config.getint('ai', 'DEADLINE_MS', fallback=1500),
+            max_tokens=self.config.getint('ai', 'MAX_TOKENS', fallback=32)
+        )
+        model = self.config.get('ai', 'LOCAL_MODEL', fallback='')
+        if fallback.healthy():
+            logger.info(f"LLM fallback enabled ({model})")
+        else:
+            logger.warning(f"LLM fallback enabled but no llama.cpp server answers at {fallback.host}:{fallback.port}")
+        return fallback
+
+    def create_session_archive(self) -> Optional[SessionArchive]:
+        """Background recorder of audio, transcripts and commands ([archive] ENABLED, off by default)"""
+        if self.server_url or not self.config.getboolean('archive', 'ENABLED', fallback=False):
+            return None
         try:
-            with open('fixes.json', 'r', encoding='utf-8-sig') as f:
-                try:
-                    data = json.load(f)
-                    fixes = {}
-                    
-                    # Handle both the specific airport and GENERAL
-                    airports_to_load = []
-                    if self.airport_code in data:
-                        airports_to_load.append(self.airport_code)
-                    if "GENERAL" in data:
-                        airports_to_load.append("GENERAL")
-                    
-                    for airport in airports_to_load:
-                        for written, spoken in data[airport].items():
-                            # Handle both single string and list of variations
-                            variations = [spoken] if isinstance(spoken, str) else spoken
-                            for variation in variations:
-                                # Clean and normalize the variation
-                                clean_var = re.sub(r'[^\w\s-]', '', variation.upper()).strip()
-                                if clean_var:  # Only add if we have a valid string
-                                    fixes[clean_var] = written.upper()
-                    
-                    return fixes
-                    
-                except json.JSONDecodeError as e:
-                    print(f"JSON decode error at line {e.lineno}, column {e.colno}: {e}")
-                    return {}
-                    
+            archive = SessionArchive(
+                self.config.get('archive', 'DIR', fallback='archive'),
+                self.config.get('archive', 'FORMAT', fallback='flac').lower(),
+                max_mb=self.config.getfloat('archive', 'MAX_MB', fallback=2000),
+                queue_size=self.config.getint('archive', 'QUEUE_SIZE', fallback=64)
+            )
         except Exception as e:
-            logger.error(f"Error loading fixes: {str(e)}")
-            print(f"Error loading fixes: {str(e)}")
-            return {}
+            logger.error(f"Error starting session archive: {str(e)}")
+            return None
+        atexit.register(archive.close)
+        return archive
+
+    def archive_transmission(self, seat: str, frames: List[bytes], raw: Optional[str], text: Optional[str],
+                             command: Optional[str]):
+        if self.archive:
+            self.archive.submit(seat, frames, raw, text, command)
 
     def create_fix_replacements(self):
         """Create word replacements for FAA fixes"""
@@ -485,9 +741,19 @@ class VoiceATC:
         time.sleep(0.05)
         ctypes.windll.user32.keybd_event(VK_RETURN, 0, KEYEVENTF_KEYUP, 0)
 
+    def press_backspace_raw(self, count: int):
+        """Erases count characters from the focused input using Windows API."""
+        KEYEVENTF_KEYUP = 0x0002
+        VK_BACK = 0x08
+
+        for _ in range(count):
+            ctypes.windll.user32.keybd_event(VK_BACK, 0, 0, 0)
+            ctypes.windll.user32.keybd_event(VK_BACK, 0, KEYEVENTF_KEYUP, 0)
+            time.sleep(0.01)
+
     def load_config(self) -> tuple:
         """Load or create configuration with PTT key and model size"""
-        config = configparser.ConfigParser()
+        config = self.config
         
         if os.path.exists(CONFIG_FILE):
             config.read(CONFIG_FILE)
@@ -511,11 +777,43 @@ class VoiceATC:
         print(f"Using Whisper model: {model_size}")
         return ptt_key, model_size
     
+    def load_seats(self) -> List[Seat]:
+        """Seats from [seat:<name>] sections, or a single seat from [settings]"""
+        seats = []
+        for section in self.config.sections():
+            if not section.lower().startswith('seat:'):
+                continue
+            device = self.config.get(section, 'INPUT_DEVICE', fallback='').strip()
+            seats.append(Seat(
+                section.split(':', 1)[1].strip(),
+                self.config.get(section, 'PTT_KEY', fallback=self.ptt_key),
+                int(device) if device else None,
+                self.config.get(section, 'VICE_WINDOW', fallback='')
+            ))
+        if not seats:
+            seats.append(Seat(self.config.get('server', 'SEAT', fallback='default'), self.ptt_key))
+        for seat in seats:
+            logger.info(f"Seat '{seat.name}': PTT {seat.ptt_key}, input device {seat.input_device}, "
+                        f"VICE window '{seat.vice_window or 'any'}'")
+        return seats
+
     def setup_audio(self):
-        """Initialize optimized audio input stream"""
+        """Initialize optimized audio input streams, one per seat"""
         try:
             self.audio = pyaudio.PyAudio()
-            self.stream = self.audio.open(**FASTER_AUDIO_SETTINGS)
+            for seat in self.seats:
+                settings = dict(FASTER_AUDIO_SETTINGS)
+                if seat.input_device is not None:
+                    settings['input_device_index'] = seat.input_device
+                # Callback mode: PortAudio hands us audio, nobody polls the stream
+                settings['stream_callback'] = self.make_audio_callback(seat)
+                seat.stream = self.audio.open(**settings)
+                seat.features = None if self.server_url else self.create_features()
+                keyboard.on_press_key(seat.ptt_key, lambda event, seat=seat: self.ptt_pressed(seat, event))
+                keyboard.on_release_key(seat.ptt_key, lambda event, seat=seat: self.ptt_released(seat, event))
+            hotkey = self.config.get('profiling', 'HOTKEY', fallback='ctrl+alt+p').strip()
+            if hotkey:
+                keyboard.add_hotkey(hotkey, self.profiler.request)
             logger.info("Optimized audio stream initialized")
         except Exception as e:
             logger.error(f"Audio initialization failed: {str(e)}")
@@ -523,35 +821,136 @@ class VoiceATC:
 
     def load_model(self):
         print("Loading optimized Whisper model...")
+        load_start = time.perf_counter()
+        # Get the directory where the script is located
+        script_dir = os.path.dirname(os.path.abspath(__file__))
         try:
-            # Get the directory where the script is located
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            
             # Set the device (CUDA if available, otherwise CPU)
-            device = "cuda" if torch.cuda.is_available() else "cpu"
+            device = "cuda" if torch.cuda.is_available() and self.backend == 'torch' else "cpu"
             
-            if torch.cuda.is_available():
+            if device == "cuda":
                 torch.backends.cudnn.benchmark = True
-            
-            # Load the model and specify the download location
-            self.model = whisper.load_model(
-                self.model_size,
-                device=device,
-                download_root=script_dir  # This ensures the model is downloaded to the script's directory
-            )
-            print(f"Whisper model loaded successfully on {device}")
-            print(f"Model files are located in: {script_dir}")
+            else:
+                # Before torch or ONNX Runtime start their thread pools, so those threads inherit the cores
+                pin_current_thread(parse_core_list(self.config.get('cpu', 'ASR_CORES', fallback='')))
+                apply_cpu_tuning(
+                    self.cpu_threads,
+                    self.config.getint('cpu', 'INTEROP_THREADS', fallback=0),
+                    self.config.getboolean('cpu', 'FLUSH_DENORMAL', fallback=True)
+                )
+
+            if self.backend == 'onnx':
+                from onnx_backend import OnnxWhisper
+                model_dir = os.path.join(script_dir, ONNX_DIR, self.model_size)
+                self.onnx_model = OnnxWhisper(
+                    model_dir,
+                    int8=self.config.getboolean('onnx', 'INT8', fallback=False),
+                    threads=self.cpu_threads
+                )
+                n_mels = self.onnx_model.n_mels
+                print(f"Whisper ONNX model loaded successfully from {model_dir}")
+            else:
+                self.model = self.load_whisper_weights(script_dir, device)
+                n_mels = self.model.dims.n_mels
+                print(f"Whisper model loaded successfully on {device}")
+                print(f"Model files are located in: {script_dir}")
         except Exception as e:
             logger.error(f"Failed to load Whisper model: {str(e)}")
             raise
 
+        self.metrics['load_time'] = time.perf_counter() - load_start
+        self.metrics['load_peak_rss_mb'] = peak_rss_mb()
+        logger.info(f"Model load took {self.metrics['load_time']:.2f}s, peak RSS {self.metrics['load_peak_rss_mb']:.0f} MB")
+
+        if self.config.getboolean('performance', 'PREALLOCATE', fallback=True):
+            # Reusable input buffer so each transmission doesn't allocate a new float array
+            self.audio_buffer = np.zeros(FASTER_AUDIO_SETTINGS['rate'] * MAX_RECORD_SECONDS, dtype=np.float32)
+        self.n_mels = n_mels
+        self.mel_filters_path = os.path.join(script_dir, 'mel_filters.npz')
+        self.features = self.create_features()
+        if self.config.getboolean('performance', 'WARMUP', fallback=True):
+            self.warmup_model()
+
+    def create_features(self) -> Optional[StreamingFeatures]:
+        """New streaming front-end for one audio source, or None if disabled"""
+        # The ONNX backend has no front-end of its own, so it always uses streaming features
+        if self.backend == 'onnx' or self.config.getboolean('performance', 'STREAMING_MEL', fallback=True):
+            return StreamingFeatures(self.n_mels, self.mel_filters_path)
+        return None
+
+    def load_whisper_weights(self, script_dir: str, device: str):
+        """Load from the mmap-able safetensors copy, creating it on the first launch"""
+        use_mmap = self.config.getboolean('performance', 'MMAP_WEIGHTS', fallback=True)
+        mmap_path = os.path.join(script_dir, f"{self.model_size}.safetensors")
+        if use_mmap and os.path.exists(mmap_path):
+            try:
+                model = load_mmap_model(mmap_path, self.model_size, device)
+                logger.info(f"Loaded memory-mapped weights from {mmap_path}")
+                return model
+            except Exception as e:
+                logger.warning(f"Memory-mapped load failed, falling back to {self.model_size}.pt: {str(e)}")
+
+        # Load the model and specify the download location
+        model = whisper.load_model(
+            self.model_size,
+            device=device,
+            download_root=script_dir  # This ensures the model is downloaded to the script's directory
+        )
+        if use_mmap and not os.path.exists(mmap_path):
+            try:
+                print(f"Converting weights to {mmap_path} for faster startup...")
+                save_mmap_checkpoint(model, mmap_path)
+            except Exception as e:
+                logger.warning(f"Could not write memory-mapped weights: {str(e)}")
+        return model
+
+    def warmup_model(self):
+        """Run the model over synthetic audio so the first real command isn't the slow one"""
+        print("Warming up Whisper model...")
+        rate = FASTER_AUDIO_SETTINGS['rate']
+        rng = np.random.default_rng(0)
+        # Low-level noise exercises mel filters, tokenizer, encoder and decoder
+        clips = [(rng.standard_normal(int(rate * seconds)) * 0.05).astype(np.float32) for seconds in WARMUP_SECONDS]
+        timings = []
+        try:
+            # The first clip again at the end, so cold vs warm compares the same audio
+            for audio in clips + clips[:1]:
+                start = time.perf_counter()
+                if self.features:
+                    self.features.reset()
+                    pcm = (np.clip(audio / 3.0, -1.0, 1.0) * 32767).astype(np.int16)
+                    self.features.add_chunk(pcm.tobytes())
+                    self.decode_mel(self.features.finalize())
+                else:
+                    self.model.transcribe(
+                        audio,
+                        language='en',
+                        fp16=False,
+                        temperature=0.0,
+                        beam_size=1,
+                        initial_prompt=WHISPER_PROMPT
+                    )
+                timings.append(time.perf_counter() - start)
+        except Exception as e:
+            logger.warning(f"Model warm-up failed: {str(e)}")
+            return
+
+        self.metrics['cold_latency'] = timings[0]
+        self.metrics['warm_latency'] = timings[-1]
+        passes = [f"{seconds:g}s clip {t:.3f}s" for seconds, t in zip(WARMUP_SECONDS + WARMUP_SECONDS[:1], timings)]
+        logger.info(f"Warm-up latency per pass: {', '.join(passes)}")
+        logger.info(f"Cold latency: {timings[0]:.3f}s, warm latency: {timings[-1]:.3f}s "
+                    f"(both on the {WARMUP_SECONDS[0]:g}s clip)")
+        print(f"Model warm-up done (cold {timings[0]:.2f}s, warm {timings[-1]:.2f}s on the same clip)")
+
     #--------------------------------------------------Vice stuff 
 
-    def find_vice_window(self) -> Optional[gw.Window]:
-        """Find the VICE ATC window with retries"""
+    def find_vice_window(self, title: str = '') -> Optional[gw.Window]:
+        """Find the VICE ATC window (whose title contains `title`, if given) with retries"""
         max_attempts = 3
         for attempt in range(max_attempts):
-            windows = [w for w in gw.getAllWindows() if w.title.lower().startswith("vice:")]
+            windows = [w for w in gw.getAllWindows()
+                       if w.title.lower().startswith("vice:") and title in w.title.lower()]
             if windows:
                 vice_window = windows[0]
                 logger.info(f"Found VICE window: {vice_window.title}")
@@ -561,84 +960,217 @@ class VoiceATC:
         logger.warning("VICE window not found after multiple attempts")
         return None
 
-    def send_to_vice(self, command: str):
-        """Send command to VICE ATC window with focus handling"""
+    def send_to_vice(self, command: str, seat: Optional[Seat] = None):
+        """Send command(s), one per line, to the seat's VICE ATC window with focus handling"""
         if not command.strip():
             return
 
-        vice_window = self.find_vice_window()
+        vice_window = self.find_vice_window(seat.vice_window if seat else '')
         if not vice_window:
-            print("VICE ATC window not found!")
-            logger.error("VICE ATC window not found!")
+            console.warning("VICE ATC window not found!")
             return
 
         try:
-            # Activate window with retries
-            for _ in range(3):
-                vice_window.activate()
-                time.sleep(0.3)
-                if vice_window.isActive:
-                    break
-
-            if not vice_window.isActive:
+            if not self.activate_window(vice_window):
                 logger.warning("Failed to activate VICE window")
                 return
 
-            # Type the command and press ENTER twice (for reliability)
-            # Use Windows API to send the text directly
-            for c in command:
-                ctypes.windll.user32.SendMessageA(vice_window._hWnd, 0x102, ord(c), 0)
-            self.press_enter_raw()
+            self.type_commands(vice_window, command)
 
-            logger.info(f"Command executed: {command}")
+            self.log_executed(command, seat)
 
         except Exception as e:
             logger.error(f"Error sending command to VICE: {str(e)}")
 
-    def record_audio(self) -> List[bytes]:
+    def activate_window(self, window: gw.Window) -> bool:
+        """Bring the window to the front with retries (no wait if it already is)"""
+        for _ in range(3):
+            if window.isActive:
+                return True
+            window.activate()
+            time.sleep(0.3)
+        return window.isActive
+
+    def type_text(self, window: gw.Window, text: str):
+        """Send the text to the window's input directly with the Windows API (WM_CHAR)"""
+        for c in text:
+            ctypes.windll.user32.SendMessageA(window._hWnd, 0x102, ord(c), 0)
+
+    def type_commands(self, window: gw.Window, command: str, staged: str = ''):
+        """Type each command line and press ENTER after it, in one go; staged is already typed"""
+        for i, line in enumerate(command.split('\n')):
+            if i:
+                time.sleep(0.05)  # Let VICE take the previous command
+            self.type_text(window, line[len(staged):] if i == 0 else line)
+            self.press_enter_raw()
+
+    def log_executed(self, command: str, seat: Optional[Seat], note: str = ''):
+        since_release = f", {time.time() - seat.release_time:.3f}s after PTT release" if seat else ''
+        commands = command.replace('\n', ' ')
+        logger.info(f"Command executed: {commands}{note}{since_release}")
+
+    def speculate(self, speculation: Speculation, seat: Seat, log_spec: np.ndarray):
+        """Resolve the callsign from a partial decode, then activate VICE and stage ';CALLSIGN '"""
+        # A busy model means the final decode would have to wait behind this one: don't speculate
+        if not self.model_lock.acquire(blocking=False):
+            logger.info(f"Speculation skipped ({seat.name}): model busy")
+            return
+        try:
+            start = time.perf_counter()
+            text, no_speech_prob, avg_logprob = self.decode_mel(log_spec)
+        except Exception as e:
+            logger.error(f"Speculative decode failed: {str(e)}")
+            return
+        finally:
+            self.model_lock.release()
+
+        min_logprob = self.config.getfloat('speculative', 'MIN_LOGPROB', fallback=-0.7)
+        confident = no_speech_prob < 0.6 and avg_logprob >= min_logprob
+        processed_text = self.preprocess_text(text)
+        callsign = self.extract_callsign(processed_text) if confident else ''
+        logger.info(f"Speculative decode ({seat.name}) in {time.perf_counter() - start:.3f}s: '{text}' "
+                    f"(logprob {avg_logprob:.2f}) -> callsign '{callsign}'")
+        speculation.callsign = callsign or None
+        if confident and is_disregard(processed_text):
+            # Cancel the transmission being disregarded before it is even decoded
+            speculation.disregarded = bool(self.audio_queue.cancel(
+                seat.name,
+                lambda utterance: not callsign or getattr(utterance.item[3], 'callsign', None) == callsign,
+                latest_only=True
+            ))
+            return
+        if not callsign or speculation.closed:
+            return
+
+        try:
+            window = self.find_vice_window(seat.vice_window)
+            if not window or not self.activate_window(window):
+                return
+            with speculation.lock:
+                if speculation.closed:
+                    return
+                speculation.window = window
+                if self.config.getboolean('speculative', 'STAGE_PREFIX', fallback=True):
+                    speculation.staged = f";{callsign} "
+                    self.type_text(window, speculation.staged)
+        except Exception as e:
+            logger.error(f"Error preparing VICE for {callsign}: {str(e)}")
+
+    def deliver_command(self, command: Optional[str], seat: Seat, speculation: Optional[Speculation]):
+        """Send the final command, committing or aborting what speculate() staged in VICE"""
+        if speculation is None:
+            if command:
+                self.send_to_vice(command, seat)
+            return
+        with speculation.lock:
+            speculation.closed = True
+            staged, window = speculation.staged, speculation.window
+            speculation.staged = ''
+        if seat.speculation is speculation:
+            seat.speculation = None
+
+        if staged:
+            try:
+                if not self.activate_window(window):
+                    logger.warning(f"Failed to activate VICE window, '{staged}' is left in its command line")
+                elif command and command.startswith(staged):
+                    self.type_commands(window, command, staged)
+                    self.metrics['speculation_commits'] = self.metrics.get('speculation_commits', 0) + 1
+                    self.log_executed(command, seat, " (speculative callsign)")
+                    return
+                else:
+                    # Wrong callsign, "disregard" or no command at all
+                    self.press_backspace_raw(len(staged))
+                    self.metrics['speculation_aborts'] = self.metrics.get('speculation_aborts', 0) + 1
+                    logger.info(f"Speculative '{staged.strip()}' aborted, final command: {command}")
+            except Exception as e:
+                logger.error(f"Error completing speculative command: {str(e)}")
+        if command:
+            self.send_to_vice(command, seat)
+
+    def make_audio_callback(self, seat: Seat):
+        """PyAudio stream callback that only keeps audio while the seat's PTT key is down"""
+        def callback(in_data, frame_count, time_info, status):
+            if seat.recording:
+                seat.chunks.put(in_data)
+            return (None, pyaudio.paContinue)
+        return callback
+
+    def ptt_pressed(self, seat: Seat, event):
+        """Keyboard hook: PTT down edge (key repeat while held is ignored)"""
+        if seat.recording:
+            return
+        seat.chunks = Queue()  # The capture thread may still be reading the previous one
+        seat.press_time = event.time
+        seat.recording = True
+        seat.presses.put(seat.chunks)
+
+    def ptt_released(self, seat: Seat, event):
+        """Keyboard hook: PTT up edge; wakes the capture thread straight away"""
+        if not seat.recording:
+            return
+        seat.recording = False
+        seat.release_time = event.time
+        seat.chunks.put(None)
+
+    def record_audio(self, seat: Seat, chunks: Queue, on_chunk=None) -> List[bytes]:
         frames = []
-        print("\nRecording... ")
-        logger.info("\nRecording... ")
+        pending = b''
+        chunk_bytes = 1024 * 2  # Keep 1024-sample frames regardless of the stream buffer size
+        console.info(f"\nRecording ({seat.name})... ")
+        if seat.features:
+            seat.features.reset()
         
         try:
-            # Test if microphone is working
-            test_audio = self.stream.read(1024, exception_on_overflow=False)
-            logger.info(f"Debug: Audio chunk size: {len(test_audio)} bytes")
-            
-            while keyboard.is_pressed(self.ptt_key):
-                data = self.stream.read(1024, exception_on_overflow=False)
-                frames.append(data)
-                print(".", end='', flush=True)
+            while True:
+                data = chunks.get()
+                if data is None:  # Release edge
+                    break
+                if seat.features:
+                    # Compute mel frames while the controller is still talking
+                    seat.features.add_chunk(data)
+                if on_chunk:
+                    on_chunk(data)
+                pending += data
+                if len(pending) >= chunk_bytes:
+                    frames.append(pending[:chunk_bytes])
+                    pending = pending[chunk_bytes:]
+                    logger.debug(f"Captured chunk {len(frames)} ({seat.name})")
+            if pending:
+                frames.append(pending)
             
-            print("\nStopped recording")
-            logger.info("\nStopped recording")
+            console.info(f"Stopped recording after {seat.release_time - seat.press_time:.2f}s")
             return frames
         except Exception as e:
-            print(f"\nError during recording: {e}")
-            logger.error(f"\nError during recording: {e}")
+            console.error(f"Error during recording: {e}")
             return []
         
-    def transcribe_audio(self, frames: List[bytes]) -> Optional[str]:
+    def transcribe_audio(self, frames: List[bytes], mel: Optional[tuple] = None) -> Optional[str]:
         if not frames or len(frames) < 10:
-            print("Error: No audio frames or too short.")
-            logger.error("Error: No audio frames or too short.")
+            console.error("Error: No audio frames or too short.")
             return None
 
+        if mel is None and self.onnx_model is not None:
+            # Only the first 30s window is decoded on the ONNX backend
+            self.features.reset()
+            for data in frames:
+                self.features.add_chunk(data)
+            mel = (self.features.finalize(), self.features.mean_amplitude)
+        if mel is not None:
+            return self.transcribe_features(*mel)
+
         try:
             audio_data = b''.join(frames)
-            
-            # DEBUG: Save audio to a file for playback
-            """with wave.open("debug_recording.wav", "wb") as wf:
-                wf.setnchannels(1)
-                wf.setsampwidth(2)  # 16-bit audio
-                wf.setframerate(16000)
-                wf.writeframes(audio_data)
-            logger.info("Saved audio to 'debug_recording.wav'")  # Check this file in a media player"""
-            
+            # Recordings for playback: [archive] ENABLED (session_archive.py)
+
             # Convert to numpy array and apply amplification
-            audio_array = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-            
-            audio_array *= 3.0
+            samples = np.frombuffer(audio_data, dtype=np.int16)
+            if self.audio_buffer is not None and len(samples) <= len(self.audio_buffer):
+                audio_array = self.audio_buffer[:len(samples)]
+                np.multiply(samples, 3.0 / 32768.0, out=audio_array, casting='unsafe')
+            else:
+                audio_array = samples.astype(np.float32) / 32768.0
+                audio_array *= 3.0
             audio_array = self.filter_audio(audio_array)
             audio_array = np.clip(audio_array, -1.0, 1.0)
             audio_array = audio_array.astype(np.float32)  # <-- Fix the dtype mismatch
@@ -650,37 +1182,169 @@ class VoiceATC:
             
             # Check if audio is silent (with more lenient threshold)
             if avg_amplitude < 0.02:  # Increased threshold from 0.01
-                print(f"Warning: Audio is too quiet (amplitude = {avg_amplitude:.4f})")
+                console.warning(f"Warning: Audio is too quiet (amplitude = {avg_amplitude:.4f})")
                 return None
                 
-            result = self.model.transcribe(
-                audio_array,
-                language='en',
-                fp16=False,
-                temperature=0.0,
-                beam_size=1,
-                initial_prompt="Aircraft radio transmissions using ATC phrases like descend and maintain, heading, expect ILS runway"
-
-            )
+            start = time.perf_counter()
+            with self.model_lock:
+                result = self.model.transcribe(
+                    audio_array,
+                    language='en',
+                    fp16=False,
+                    temperature=0.0,
+                    beam_size=1,
+                    initial_prompt=WHISPER_PROMPT
+                )
+            self.record_transcribe_time(time.perf_counter() - start)
 
             audio_array = self.filter_audio(audio_array)
 
             
             text = result.get("text", "").strip()
+            self.last_raw_text = text
             text = self.preprocess_text(text)
 
-            logger.info(f"Raw Whisper output: '{text}'")  # Debug transcription
+            # mine_logs.py pairs these two lines to see what preprocess_text corrected
+            logger.info(f"Raw Whisper output: '{self.last_raw_text}'")
+            logger.info(f"Normalized text: '{text}'")
             
             if not text or text.isdigit() or len(text) < 3:
-                print("Warning: Whisper returned empty or invalid text.")
+                console.warning("Warning: Whisper returned empty or invalid text.")
                 return None
                 
             return text
             
         except Exception as e:
-            print(f"Transcription error: {e}")
+            console.error(f"Transcription error: {e}")
             return None
     
+    def transcribe_frames(self, frames: List[bytes]) -> Optional[str]:
+        """Run recorded frames through the same path a live transmission takes"""
+        mel = None
+        if self.features:
+            self.features.reset()
+            for data in frames:
+                self.features.add_chunk(data)
+            if self.features.duration < MAX_RECORD_SECONDS:
+                mel = (self.features.finalize(), self.features.mean_amplitude)
+        return self.transcribe_audio(frames, mel)
+
+    def transcribe_features(self, log_spec: np.ndarray, avg_amplitude: float) -> Optional[str]:
+        """Decode a log-mel segment computed during recording, skipping whisper's own front-end"""
+        try:
+            logger.info(f"Debug: Audio mean amplitude = {avg_amplitude:.4f}")
+            if avg_amplitude < 0.02:
+                console.warning(f"Warning: Audio is too quiet (amplitude = {avg_amplitude:.4f})")
+                return None
+
+            start = time.perf_counter()
+            decoded = self.decode_mel(log_spec)
+            self.record_transcribe_time(time.perf_counter() - start)
+            return self.finish_transcript(*decoded)
+
+        except Exception as e:
+            console.error(f"Transcription error: {e}")
+            return None
+
+    def finish_transcript(self, text: str, no_speech_prob: float, avg_logprob: float) -> Optional[str]:
+        """Apply the silence rule and text cleanup to a decoded segment"""
+        # Same silence rule transcribe() applies with its default thresholds
+        if no_speech_prob > 0.6 and avg_logprob < -1.0:
+            text = ""
+        self.last_raw_text = text
+        text = self.preprocess_text(text)
+
+        logger.info(f"Raw Whisper output: '{self.last_raw_text}'")
+        logger.info(f"Normalized text: '{text}'")
+
+        if not text or text.isdigit() or len(text) < 3:
+            console.warning("Warning: Whisper returned empty or invalid text.")
+            return None
+
+        return text
+
+    def transcribe_batch(self, items: List[tuple]) -> List[Optional[str]]:
+        """Transcribe several (frames, mel) transmissions, batching those with streaming features"""
+        results = [None] * len(items)
+        raw_texts = [None] * len(items)
+        batchable = []
+        for i, (frames, mel) in enumerate(items):
+            if mel is not None and len(frames) >= 10 and mel[1] >= 0.02:
+                batchable.append(i)
+            else:
+                # Too short, too quiet or no features: the single path reports why
+                self.last_raw_text = None
+                results[i] = self.transcribe_audio(frames, mel)
+                raw_texts[i] = self.last_raw_text
+
+        # Similar lengths together so short transmissions don't wait on long decodes
+        batchable.sort(key=lambda i: len(items[i][0]))
+        max_size = self.config.getint('performance', 'BATCH_MAX_SIZE', fallback=4)
+        for start_index in range(0, len(batchable), max_size):
+            group = batchable[start_index:start_index + max_size]
+            try:
+                start = time.perf_counter()
+                decoded = self.decode_mel_batch(np.stack([items[i][1][0] for i in group]))
+                elapsed = time.perf_counter() - start
+            except Exception as e:
+                console.error(f"Transcription error: {e}")
+                continue
+            self.metrics['batches'] = self.metrics.get('batches', 0) + 1
+            self.metrics['batched_utterances'] = self.metrics.get('batched_utterances', 0) + len(group)
+            logger.info(f"Decoded batch of {len(group)} in {elapsed:.3f}s")
+            for i, result in zip(group, decoded):
+                # Each transmission's share of the batch, so averages compare with single decodes
+                self.record_transcribe_time(elapsed / len(group))
+                results[i] = self.finish_transcript(*result)
+                raw_texts[i] = result[0]
+        self.last_raw_texts = raw_texts
+        return results
+
+    def collect_batch(self, queue: Queue) -> list:
+        """Block for one queued item, then gather more for up to BATCH_MAX_WAIT_MS"""
+        max_size = self.config.getint('performance', 'BATCH_MAX_SIZE', fallback=4)
+        max_wait = self.config.getint('performance', 'BATCH_MAX_WAIT_MS', fallback=0) / 1000
+        items = [queue.get()]
+        deadline = time.perf_counter() + max_wait
+        while len(items) < max_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                items.append(queue.get(timeout=remaining) if remaining > 0 else queue.get_nowait())
+            except Empty:
+                break
+        return items
+
+    def decode_mel(self, log_spec: np.ndarray) -> tuple:
+        """Decode one log-mel segment. Returns (text, no_speech_prob, avg_logprob)"""
+        return self.decode_mel_batch(log_spec[None])[0]
+
+    def decode_mel_batch(self, log_specs: np.ndarray) -> List[tuple]:
+        """Decode a (batch, n_mels, 3000) stack in one encoder/decoder pass"""
+        if self.onnx_model is not None:
+            with self.model_lock:
+                return self.onnx_model.decode_batch(log_specs, prompt=WHISPER_PROMPT)
+
+        options = whisper.DecodingOptions(
+            language='en',
+            fp16=False,
+            temperature=0.0,
+            beam_size=1,
+            prompt=WHISPER_PROMPT,
+            without_timestamps=True
+        )
+        with self.model_lock:
+            results = whisper.decode(self.model, torch.from_numpy(log_specs).to(self.model.device), options)
+        return [(r.text.strip(), r.no_speech_prob, r.avg_logprob) for r in results]
+
+    def record_transcribe_time(self, elapsed: float):
+        """Track per-transmission latency so cold vs warm behaviour shows up in the log"""
+        self.metrics['transcriptions'] += 1
+        self.metrics['transcribe_time'] += elapsed
+        if self.metrics['transcriptions'] == 1:
+            self.metrics['first_latency'] = elapsed
+        average = self.metrics['transcribe_time'] / self.metrics['transcriptions']
+        logger.info(f"Transcription took {elapsed:.3f}s (avg {average:.3f}s over {self.metrics['transcriptions']})")
+
     def filter_audio(self, audio_array: np.ndarray) -> np.ndarray:
         """Apply basic audio filtering to improve quality"""
         try:
@@ -694,17 +1358,104 @@ class VoiceATC:
                 
     def process_audio_queue(self):
         """Background thread to process audio chunks"""
-        print("Background processing thread started.")
+        console.info("Background processing thread started.")
+        # Again for this thread: Windows threads don't inherit the loading thread's mask
+        pin_current_thread(parse_core_list(self.config.get('cpu', 'ASR_CORES', fallback='')))
         while True:
-            frames = self.audio_queue.get()
-            print(f"Processing {len(frames)} audio frames...")
-            text = self.transcribe_audio(frames)
-            if text:
-                print(f"Transcribed text: {text}")
-                command = self.format_command(text)
-                if command:
-                    print(f"Formatted command: {command}")
-                    self.send_to_vice(command)
+            items = self.collect_batch(self.audio_queue)
+            profiling = self.profiler.begin()
+            console.info(f"Processing {sum(len(utterance.item[1]) for utterance in items)} audio frames...")
+            texts = self.transcribe_batch([utterance.item[1:3] for utterance in items])
+            results = []
+            for utterance, text, raw in zip(items, texts, self.last_raw_texts):
+                command = None
+                if text:
+                    console.info(f"Transcribed text ({utterance.seat}): {text}")
+                    command = self.format_command(text)
+                    if command:
+                        commands = command.replace('\n', ' ')
+                        console.info(f"Formatted command: {commands}")
+                results.append((utterance, text, raw, command))
+            for utterance, text, raw, command in self.schedule_commands(results):
+                seat, frames, _, speculation = utterance.item
+                self.deliver_command(command, seat, speculation)
+                self.archive_transmission(seat.name, frames, raw, text, command)
+            self.metrics['scheduler'] = self.audio_queue.counts()
+            if profiling:
+                self.profiler.end(len(items))
+
+    def schedule_commands(self, results: List[tuple]) -> List[tuple]:
+        """Apply disregards, newer commands and latency budgets to a decoded batch.
+
+        results are (utterance, text, raw, command) in arrival order; the same list comes back with
+        each command reduced to the lines still worth sending (None when nothing is left).
+        """
+        pending = []  # [utterance, seat, [command lines], reason if lines were removed]
+        for utterance, text, _, command in results:
+            if utterance.expired():
+                pending.append([utterance, utterance.seat, [], 'expired' if command else None])
+                continue
+            # Unless speculate() has already cancelled the transmission this one disregards
+            if text and is_disregard(text) and not getattr(utterance.item[3], 'disregarded', False):
+                # "Delta 123, disregard" cancels Delta 123's unsent command; a bare "disregard" the seat's last one
+                clause = next(clause for clause in self.split_clauses(text) if is_disregard(clause))
+                callsign = self.extract_callsign(clause)
+                for entry in reversed(pending):
+                    if entry[1] == utterance.seat and entry[2]:
+                        kept = [line for line in entry[2] if callsign and not line.startswith(f";{callsign} ")]
+                        if len(kept) < len(entry[2]):
+                            entry[2], entry[3] = kept, 'cancelled'
+                            break
+            lines = command.split('\n') if command else []
+            for line in lines:
+                callsign, kinds = line.split(' ', 1)[0], command_kinds(line)
+                for entry in pending:
+                    # A newer instruction of the same kind for the same aircraft makes the older one stale
+                    kept = []
+                    for old in entry[2]:
+                        tokens = old.split()
+                        if tokens[0] == callsign:
+                            tokens = tokens[:1] + [t for t in tokens[1:] if token_kind(t) not in kinds]
+                        if len(tokens) > 1:
+                            kept.append(' '.join(tokens))
+                    if kept != entry[2]:
+                        entry[2], entry[3] = kept, entry[3] or 'dropped'
+            pending.append([utterance, utterance.seat, lines, None])
+
+        scheduled = []
+        for (utterance, text, raw, command), (_, _, lines, reason) in zip(results, pending):
+            if reason and not lines:
+                self.audio_queue.discard(utterance, reason)
+            elif reason:
+                logger.info(f"Removed {reason} instructions from '{command}'")
+            scheduled.append((utterance, text, raw, '\n'.join(lines) or None))
+        return scheduled
+
+    def discard_transmission(self, utterance: Utterance, reason: str):
+        """FairQueue callback for a transmission that won't reach VICE: undo any staged prefix"""
+        seat, _, _, speculation = utterance.item
+        counts = self.audio_queue.counts()
+        console.info(f"Transmission from {seat.name} {reason} after {utterance.age:.2f}s "
+                     f"({counts['dropped']} dropped, {counts['expired']} expired, {counts['cancelled']} cancelled)")
+        if speculation:
+            self.deliver_command(None, seat, speculation)
+
+    def process_remote_queue(self):
+        """Client mode: wait for the server's reply to each upload and send it to VICE"""
+        console.info("Background client thread started.")
+        while True:
+            seat, upload = self.audio_queue.get()
+            result = upload.finish()
+            if result.get('error'):
+                console.error(f"VFV server error: {result['error']}")
+                continue
+            if result.get('text'):
+                console.info(f"Transcribed text ({seat.name}): {result['text']}")
+            command = result.get('command')
+            if command:
+                commands = command.replace('\n', ' ')
+                console.info(f"Formatted command: {commands}")
+                self.send_to_vice(command, seat)
 
     def preprocess_text(self, text: str) -> str:
         """Enhanced text preprocessing with multi-stage correction"""
@@ -715,6 +1466,10 @@ class VoiceATC:
         text = text.lower()
         text = re.sub(r'[^\w\s,.-]', '', text)
         
+        # A comma before a callsign ends a clause (split_clauses); keep it as a period, which the replacements leave alone
+        if self.multi_aircraft:
+            text = self.regex_patterns['clause_comma'].sub('. ', text)
+
         # Stage 1: Protect critical phrases from modification
         protected = {}
         for i, phrase in enumerate(self.protected_phrases):
@@ -723,12 +1478,16 @@ class VoiceATC:
             text = text.replace(phrase, placeholder)
         
         # Stage 2: Apply word replacements with regex patterns
-        for pattern, replacement in self.word_replacements.items():
-            text = re.sub(pattern, replacement, text)
+        for pattern, replacement in self.word_replacements:
+            text = pattern.sub(replacement, text)
+
+        # Stage 2b: Spoken numbers ("one one thousand" -> "11 thousand", "to" only where it is a digit)
+        if self.number_parser:
+            text = self.number_parser.parse(text).text
         
         # Stage 3: Apply phrase patterns for common multi-word patterns
         for pattern, replacement in self.phrase_patterns:
-            text = re.sub(pattern, replacement, text)
+            text = pattern.sub(replacement, text)
         
         # Stage 4: Restore protected phrases
         for placeholder, phrase in protected.items():
@@ -908,56 +1667,91 @@ class VoiceATC:
         # Get all possible fixes
         all_fixes = self.get_all_fix_variations()
         if not all_fixes:
-            print("⚠️ No fixes loaded in database")
+            console.warning("⚠️ No fixes loaded in database")
             return None
 
-        # Try exact match first
-        for written, spoken_list in all_fixes.items():
-            if spoken_fix in [s.upper() for s in spoken_list] or spoken_fix == written:
+        while True:
+            written = self.match_fix(spoken_fix)
+            if written:
                 return written
+            # Not near the airport: lazily widen the NASR search area and try again
+            if not self.expand_fixes():
+                break
 
-        # Try fuzzy matching
-        all_possible = []
-        for written, spoken_list in all_fixes.items():
-            all_possible.extend(spoken_list)
-            all_possible.append(written)
-        
-        best_match, score = process.extractOne(
-            spoken_fix,
-            all_possible,
-            scorer=fuzz.token_set_ratio,
-            score_cutoff=70
-        )
-        
-        if score >= 70:
-            for written, spoken_list in all_fixes.items():
-                if best_match in spoken_list or best_match == written:
-                    return written
-
-        # Try phonetic matching
-        spoken_meta = phonetics.metaphone(spoken_fix)
-        for written, spoken_list in all_fixes.items():
-            for variation in spoken_list + [written]:
-                if phonetics.metaphone(variation) == spoken_meta:
-                    return written
-
-        print(f"⚠️ No match for '{spoken_fix}'. Similar fixes: {list(all_fixes.keys())[:5]}")
+        console.info(f"⚠️ No match for '{spoken_fix}'. Similar fixes: {list(all_fixes.keys())[:5]}")
+        return None
+
+    def fix_phrases(self, spoken_fix: str) -> List[str]:
+        """The captured text runs to the end of the transmission; the fix is the whole of it or its first 1-3 words"""
+        words = spoken_fix.split()
+        return list(dict.fromkeys([spoken_fix] + [' '.join(words[:n]) for n in range(min(3, len(words)), 0, -1)]))
+
+    def match_fix(self, spoken_fix: str) -> Optional[str]:
+        """Exact lookup, then BK-tree/phonetic index match of a spoken fix against the loaded fixes"""
+        phrases = self.fix_phrases(spoken_fix)
+        for phrase in phrases:
+            if phrase in self.fix_lookup:
+                return self.fix_lookup[phrase]
+
+        cutoff = self.config.getint('fixdb', 'MATCH_CUTOFF', fallback=70)
+        best = None
+        for phrase in phrases:
+            match = self.fix_index.best(phrase, cutoff)
+            if match and (best is None or match[1] > best[1]):
+                best = match
+        if best:
+            logger.info(f"Matched fix '{spoken_fix}' -> {best[0]} (score {best[1]})")
+            return best[0]
         return None
 
     def get_all_fix_variations(self):
         """Return all fix variations grouped by written form"""
+        return self.fix_variations
+
+    def load_fix_variations(self) -> dict:
+        """fixes.json and generated variations for the airport and GENERAL, plus nearby NASR fixes"""
+        self.fix_lookup = {}  # SPOKEN FORM -> written, for exact matches
+        self.fix_index = FixIndex(self.config.getint('fixdb', 'MAX_EDIT_DISTANCE', fallback=2))
         variations = {}
-        try:
-            with open('fixes.json', 'r') as f:
-                data = json.load(f)
-                for airport in [self.airport_code, "GENERAL"]:
-                    if airport in data:
-                        for written, spoken in data[airport].items():
-                            variations[written] = [spoken] if isinstance(spoken, str) else spoken
-        except Exception as e:
-            logger.error(f"Error loading fix variations: {str(e)}")
+        for airport in [self.airport_code, "GENERAL"]:
+            variations.update((self.tables.fixes or {}).get(airport, {}))
+        for written, spoken_list in list(variations.items()):
+            entry = self.tables.generated_variants.get(written.upper(), {})
+            variations[written] = list(spoken_list) + [v for v in entry.get('variants', []) if v not in spoken_list]
+            self.index_fix(written, variations[written], entry.get('keys'))
+
+        if self.fix_db and self.fix_db.locate(self.airport_code):
+            radius = self.config.getfloat('fixdb', 'RADIUS_NM', fallback=60)
+            nearby = self.fix_db.select(self.airport_code, radius)
+            for ident, row in nearby.items():
+                if ident not in variations:
+                    variations[ident] = row[4]
+                    self.index_fix(ident, row[4], row[5])
+            logger.info(f"Activated {len(nearby)} NASR fixes within {radius:.0f} NM of {self.airport_code}")
         return variations
-      
+
+    def index_fix(self, written: str, spoken_list: List[str], keys: Optional[List[str]] = None):
+        """Add a fix to the exact lookup (earlier fixes win, as in a linear scan) and the fuzzy index"""
+        for spoken in [*spoken_list, written]:
+            self.fix_lookup.setdefault(spoken.upper(), written)
+        self.fix_index.add(written, spoken_list, keys)
+
+    def expand_fixes(self) -> bool:
+        """Pull in fixes from further out (loading neighbouring partitions); False once nothing more is allowed"""
+        max_expansions = self.config.getint('fixdb', 'MAX_EXPANSIONS', fallback=3)
+        while self.fix_db and self.fix_db.origin and self.fix_expansions < max_expansions:
+            self.fix_expansions += 1
+            added = self.fix_db.expand()
+            for ident in added:
+                if ident not in self.fix_variations:
+                    row = self.fix_db.active[ident]
+                    self.fix_variations[ident] = row[4]
+                    self.index_fix(ident, row[4], row[5])
+            logger.info(f"Expanded fix search to {self.fix_db.radius_nm:.0f} NM (+{len(added)} fixes)")
+            if added:
+                return True
+        return False
+
     def extract_altitude(self, text: str) -> str:
         """Altitude extraction that explicitly avoids callsign numbers and headings"""
         # First get callsign to exclude it from altitude search
@@ -1010,22 +1804,81 @@ class VoiceATC:
     def format_command(self, text):
         if not text:
             return None
-        
-            
-        processed_text = self.preprocess_text(text)
 
+        processed_text = self.preprocess_text(text)
+        if self.command_cache is None:
+            command = self.parse_transmission(processed_text)
+        else:
+            found, command = self.command_cache.get(processed_text)
+            if found:
+                logger.debug(f"Command cache hit: '{processed_text}' -> {command}")
+            else:
+                command = self.parse_transmission(processed_text)
+                self.command_cache.put(processed_text, command)
+            self.metrics['cache_hits'] = self.command_cache.hits
+            self.metrics['cache_misses'] = self.command_cache.misses
+            logger.info(f"Command cache hit rate {self.command_cache.hit_rate:.0%} "
+                        f"({self.command_cache.hits}/{self.command_cache.hits + self.command_cache.misses})")
+
+        # No fallback for a deliberate no-command: its grammar would force one ("disregard" -> ";123 D050")
+        if command is None and self.llm_fallback and not is_disregard(processed_text):
+            command = self.llm_fallback.complete(processed_text, set(self.fix_variations))
+            self.metrics['llm_fallback'] = dict(self.llm_fallback.stats)
+            logger.info(self.llm_fallback.summary())
+        return command
+
+    def parse_transmission(self, processed_text: str) -> Optional[str]:
+        """VICE commands for every aircraft addressed in the transmission, one per line in spoken order"""
+        if not self.multi_aircraft:
+            return self.parse_command(processed_text)
+        commands = [self.parse_command(clause) for clause in self.split_clauses(processed_text)]
+        return '\n'.join(command for command in commands if command) or None
+
+    def split_clauses(self, processed_text: str) -> List[str]:
+        """Cut the transcript where a different callsign is addressed"""
+        starts = []
+        current = None
+        for match in self.regex_patterns['callsign_start'].finditer(processed_text):
+            # Only a callsign that opens a clause (transcript start or after ". ") addresses a new aircraft,
+            # and not one the current clause has already announced as traffic ("follow the delta 123")
+            before = processed_text[:match.start()].rstrip()
+            if starts and not before.endswith('.'):
+                continue
+            clause = processed_text[starts[-1] if starts else 0:match.start()]
+            if CALLSIGN_MENTIONS.intersection(word.strip('.') for word in clause.split()):
+                continue
+            callsign = self.extract_callsign(match.group())
+            if callsign and callsign != current:
+                starts.append(match.start())
+                current = callsign
+        if len(starts) < 2:
+            return [processed_text]
+        # Anything said before the first callsign stays with the first clause
+        bounds = [0] + starts[1:] + [len(processed_text)]
+        clauses = [processed_text[start:end].strip(' .,') for start, end in zip(bounds, bounds[1:])]
+        logger.info(f"Split into {len(clauses)} clauses: {clauses}")
+        return clauses
+
+    def parse_command(self, processed_text: str) -> Optional[str]:
+        """Build the VICE command for an already preprocessed transcript"""
         # Extract callsign
         callsign = self.extract_callsign(processed_text)
         if not callsign:
-            print("No valid callsign found")
+            console.info("No valid callsign found")
             return None
-        print(f"Extracted callsign: {callsign}")
+        logger.debug(f"Extracted callsign: {callsign}")
 
         cmds = []
+        # Typed altitude/heading/speed/squawk values; the regex extractors below are the fallback
+        numbers = self.number_parser.parse(processed_text) if self.number_parser else None
 
         # 1. Altitude Commands (descend/climb/maintain)
         if any(x in processed_text for x in ["descend", "descend and maintain", "climb", "maintain altitude", "climb and maintain"]):
-            alt = self.extract_altitude(processed_text)
+            number = numbers.first('altitude', 'flight_level') if numbers else None
+            if number:
+                alt = str(number.value * 100 if number.kind == 'flight_level' else number.value)
+            else:
+                alt = self.extract_altitude(processed_text)
             if alt:
                 formatted_alt = self.format_altitude_for_vice(alt)
                 if "descend" in processed_text:
@@ -1048,18 +1901,23 @@ class VoiceATC:
             elif "turn left heading" in processed_text:
                 turn_dir = "l"
             
-            # First try strict 3-digit match
-            match = re.search(r"heading (\d)(\d)(\d)\b", processed_text)
-            if not match:
-                # Fallback to any 2-3 digit number
-                match = re.search(r"heading (\d{2,3})\b", processed_text)
-            
-            if match:
-                if len(match.groups()) == 3:  # Got three separate digits
-                    heading = f"{match.group(1)}{match.group(2)}{match.group(3)}"
-                else:  # Got combined number
-                    heading = match.group(1).ljust(3, '0')[:3]  # Pad with zeros if needed
-                
+            heading = None
+            number = numbers.first('heading') if numbers else None
+            if number and 2 <= len(number.digits) <= 3:
+                heading = number.digits.ljust(3, '0')
+            else:
+                # First try strict 3-digit match
+                match = re.search(r"heading (\d)(\d)(\d)\b", processed_text)
+                if not match:
+                    # Fallback to any 2-3 digit number
+                    match = re.search(r"heading (\d{2,3})\b", processed_text)
+                if match:
+                    if len(match.groups()) == 3:  # Got three separate digits
+                        heading = f"{match.group(1)}{match.group(2)}{match.group(3)}"
+                    else:  # Got combined number
+                        heading = match.group(1).ljust(3, '0')[:3]  # Pad with zeros if needed
+
+            if heading:
                 try:
                     heading_num = int(heading)
                     if 1 <= heading_num <= 360:  # Validate heading range
@@ -1072,8 +1930,11 @@ class VoiceATC:
 
         # 3. Speed Commands
         if any(x in processed_text for x in ["speed", "knots", "maintain speed", "reduce speed to", "increase speed to"]):
+            number = numbers.first('speed') if numbers else None
             match = re.search(r'(\d{2,3})\s*knots?|\bspeed\s+(\d{2,3})\b', processed_text)
-            if match:
+            if number and 2 <= len(number.digits) <= 3:
+                cmds.append(f"S{number.value}")
+            elif match:
                 speed = match.group(1) or match.group(2)
                 cmds.append(f"S{speed}")
             elif "say speed" in processed_text:
@@ -1156,25 +2017,22 @@ class VoiceATC:
                     match = re.search(r'(?:cleared|proceed) direct (\w+(?:\s+\w+)*)', processed_text, re.IGNORECASE)
                     if match:
                         spoken_fix = match.group(1).upper()
-                        all_fixes = []
-                        fix_variations = self.get_all_fix_variations()
-                        if fix_variations:  # Only proceed if we have fixes loaded
-                            for written, spoken_list in fix_variations.items():
-                                all_fixes.extend(spoken_list)
-                                all_fixes.append(written)
-                            
-                            print(f"Couldn't find fix '{spoken_fix}'. Did you mean one of these?")
-                            suggestions = process.extract(spoken_fix, all_fixes, scorer=fuzz.token_set_ratio, limit=5)
-                            for fix, score in suggestions:
+                        if self.get_all_fix_variations():  # Only proceed if we have fixes loaded
+                            console.info(f"Couldn't find fix '{spoken_fix}'. Did you mean one of these?")
+                            suggestions = {}
+                            for phrase in self.fix_phrases(spoken_fix):
+                                for fix, score in self.fix_index.lookup(phrase, limit=5, max_distance=3):
+                                    suggestions[fix] = max(score, suggestions.get(fix, 0))
+                            for fix, score in sorted(suggestions.items(), key=lambda item: -item[1])[:5]:
                                 if score > 50:
-                                    print(f" - {fix} (similarity: {score}%)")
+                                    console.info(f" - {fix} (similarity: {score}%)")
                     
                     # Instead of returning None, just skip this command but continue processing others
-                    print("Skipping direct clearance due to unknown fix")
+                    console.info("Skipping direct clearance due to unknown fix")
             
             except Exception as e:
                 logger.error(f"Error processing direct clearance: {str(e)}")
-                print(f"Error processing direct clearance, continuing with other commands")
+                console.warning("Error processing direct clearance, continuing with other commands")
                 # Continue with other commands instead of returning None
 
         # 6. Special Commands
@@ -1191,50 +2049,92 @@ class VoiceATC:
         if "say present heading" in processed_text.lower() or "what's your heading" in processed_text.lower():
             cmds.append("SH")
         if "squawk" in processed_text.lower():
+            number = numbers.first('squawk') if numbers else None
             match = re.search(r'squawk\s*(\d{4})', processed_text, re.IGNORECASE)
-            if match:
+            if number and len(number.digits) == 4:
+                cmds.append(f"SQ{number.digits}")
+            elif match:
                 squawk_code = match.group(1)
                 cmds.append(f"SQ{squawk_code}")
         if "Resume own navigation" in processed_text.lower():
             cmds.append("RON")
 
             
-        if "disregard" in processed_text.lower() or "cancel" in processed_text.lower():
-            print("Disregard command received")
+        if is_disregard(processed_text):
+            console.info("Disregard command received")
             return None
 
         if cmds:
             vice_command = f";{callsign} " + " ".join(cmds)
-            print(f"[DEBUG] Generated VICE command: {vice_command}")
+            logger.debug(f"Generated VICE command: {vice_command}")
             return vice_command
         
-        print("[DEBUG] No valid commands generated")
+        logger.debug("No valid commands generated")
         return None
     
     def cleanup(self):
         """Clean up resources"""
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
+        for seat in self.seats:
+            if seat.stream:
+                seat.stream.stop_stream()
+                seat.stream.close()
         if self.audio:
             self.audio.terminate()
         logger.info("Audio resources released")
 
+    def make_speculation_trigger(self, seat: Seat, speculation: Optional[Speculation]):
+        """record_audio chunk hook that starts speculate() once [speculative] PARTIAL_SECONDS are in"""
+        if speculation is None:
+            return None
+        partial_seconds = self.config.getfloat('speculative', 'PARTIAL_SECONDS', fallback=1.5)
+
+        def on_chunk(data):
+            if not speculation.started and seat.features.duration >= partial_seconds:
+                speculation.started = True
+                Thread(target=self.speculate, args=(speculation, seat, seat.features.snapshot()), daemon=True).start()
+        return on_chunk
+
+    def capture_loop(self, seat: Seat):
+        """Per-seat capture thread: wait for PTT, record, queue for transcription"""
+        while True:
+            chunks = seat.presses.get()
+            if self.server_url:
+                # Stream to the server while recording; the reply is handled in the background
+                upload = StreamingUpload(self.server_url, seat.name)
+                self.record_audio(seat, chunks, on_chunk=upload.send)
+                self.audio_queue.put((seat, upload), seat.name)
+                continue
+            speculation = None
+            # One staged prefix per VICE command line: wait until the previous one is resolved
+            if self.speculative and seat.features and seat.speculation is None:
+                speculation = seat.speculation = Speculation()
+            frames = self.record_audio(seat, chunks, on_chunk=self.make_speculation_trigger(seat, speculation))
+
+            if frames:
+                mel = None
+                if seat.features and seat.features.duration < MAX_RECORD_SECONDS:
+                    mel = (seat.features.finalize(), seat.features.mean_amplitude)
+                # Put frames in queue for background processing
+                budget = self.config.getint('scheduler', 'LATENCY_BUDGET_MS', fallback=8000) / 1000
+                utterance = Utterance((seat, frames, mel, speculation), seat.name, seat.release_time, budget)
+                self.audio_queue.put(utterance, seat.name)
+                logger.info(f"Queued transmission {time.time() - seat.release_time:.3f}s after PTT release")
+            elif speculation:
+                self.deliver_command(None, seat, speculation)  # Undo anything staged for nothing
+
     def run(self):
         """Main execution loop with parallel processing"""
         print("\nVoice ATC Controller - Ready (Optimized)")
-        print(f"Press and hold '{self.ptt_key}' to speak commands\n")
+        for seat in self.seats:
+            print(f"Seat '{seat.name}': press and hold '{seat.ptt_key}' to speak commands")
+        print()
         
         try:
             self.setup_audio()
-            
+            for seat in self.seats:
+                Thread(target=self.capture_loop, args=(seat,), daemon=True).start()
             while True:
-                keyboard.wait(self.ptt_key)
-                frames = self.record_audio()
-                
-                if frames:
-                    # Put frames in queue for background processing
-                    self.audio_queue.put(frames)
+                time.sleep(1)
         
         except KeyboardInterrupt:
             print("\nExiting...")
@@ -1242,10 +2142,33 @@ class VoiceATC:
             self.cleanup()
             
 def main():
+    parser = argparse.ArgumentParser(description="Voice For Vice")
+    parser.add_argument('--server', action='store_true', help="Run headless, serving transcriptions over HTTP")
+    parser.add_argument('--client', nargs='?', const='', metavar='URL',
+                        help="Record locally and transcribe on a VFV server (default: [server] URL)")
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
     try:
         print(__doc__)  # Print the README at startup
-        controller = VoiceATC()
-        print(f"\nVFV initialized for airport: {controller.airport_code}")
+        if args.server:
+            airport = config.get('server', 'AIRPORT', fallback='').strip().upper() or None
+            controller = VoiceATC(airport_code=airport, interactive=False)
+            print(f"\nVFV server initialized for airport: {controller.airport_code}")
+            serve(
+                controller,
+                config.get('server', 'HOST', fallback='127.0.0.1'),
+                config.getint('server', 'PORT', fallback=8765)
+            )
+            return
+        if args.client is not None:
+            url = args.client or config.get('server', 'URL', fallback='http://127.0.0.1:8765')
+            controller = VoiceATC(server_url=url)
+            print(f"\nVFV client using server: {url}")
+        else:
+            controller = VoiceATC()
+            print(f"\nVFV initialized for airport: {controller.airport_code}")
         controller.run()
     except Exception as e:
         logger.critical(f"Fatal error: {str(e)}")
@@ -0,0 +1,133 @@
+"""
+VFV CPU auto-tune
+============================
+
+Sweeps the [cpu] settings from config.ini over the recordings in replay/
+and writes the fastest combination back to config.ini (only the [cpu] keys
+change; comments and the other sections are kept as written).
+
+Usage:
+    py -3.12 autotune.py
+
+Each combination runs in its own process because torch only allows the
+inter-op thread count to be set once per process.
+"""
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+CONFIG_FILE = "config.ini"
+REPLAY_DIR = "replay"
+
+
+def candidate_settings():
+    """Build the list of (intra, interop, cores, flush_denormal) combinations to try"""
+    cpu_count = os.cpu_count() or 1
+    intra_options = sorted({n for n in (1, 2, 4, max(1, cpu_count // 2), cpu_count) if n <= cpu_count})
+    candidates = []
+    for intra in intra_options:
+        for interop in (1, 2):
+            # Leave cores free for the audio and keyboard threads, or let the OS decide
+            pin_options = ['']
+            if intra < cpu_count:
+                pin_options.append(f"{cpu_count - intra}-{cpu_count - 1}")
+            for cores in pin_options:
+                for flush_denormal in (True, False):
+                    candidates.append((intra, interop, cores, flush_denormal))
+    return candidates
+
+
+def run_trial(intra: int, interop: int, cores: str, flush_denormal: bool, files: list):
+    """Load the model with the given settings and time it over the corpus (runs in a child process)"""
+    import VFV
+
+    # load_model applies the [cpu] section (core pinning included, as when VFV runs), so point VFV
+    # at a copy with the trial settings
+    trial_config = os.path.join(tempfile.mkdtemp(), CONFIG_FILE)
+    write_cpu_settings(CONFIG_FILE, trial_config, intra, interop, cores, flush_denormal)
+    VFV.CONFIG_FILE = trial_config
+
+    controller = VFV.VoiceATC(airport_code="GENERAL", interactive=False)
+    timings = []
+    for path in files:
+        frames = VFV.load_wav_frames(path)
+        start = time.perf_counter()
+        controller.transcribe_frames(frames)
+        timings.append(time.perf_counter() - start)
+    return sum(timings) / len(timings)
+
+
+def write_cpu_settings(source: str, dest: str, intra: int, interop: int, cores: str, flush_denormal: bool):
+    """Copy config.ini from source to dest with the [cpu] keys set, leaving every other line as written"""
+    settings = {
+        'INTRA_OP_THREADS': str(intra),
+        'INTEROP_THREADS': str(interop),
+        'ASR_CORES': cores,
+        'FLUSH_DENORMAL': str(flush_denormal).lower(),
+    }
+    with open(source, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+
+    start = next((i for i, line in enumerate(lines) if line.strip().lower() == '[cpu]'), None)
+    if start is None:
+        lines += ['', '[cpu]']
+        start = len(lines) - 1
+    end = next((i for i in range(start + 1, len(lines)) if lines[i].strip().startswith('[')), len(lines))
+    for i in range(start + 1, end):
+        key = lines[i].split('=', 1)[0].strip().upper()
+        if '=' in lines[i] and key in settings:
+            lines[i] = f"{key} = {settings.pop(key)}"
+    # Keys the section didn't have go after its last setting, before any blank lines
+    insert_at = end
+    while insert_at > start + 1 and not lines[insert_at - 1].strip():
+        insert_at -= 1
+    lines[insert_at:insert_at] = [f"{key} = {value}" for key, value in settings.items()]
+
+    with open(dest, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--trial':
+        intra, interop, cores, flush_denormal = json.loads(sys.argv[2])
+        files = sorted(glob.glob(os.path.join(REPLAY_DIR, '*.wav')))
+        print(json.dumps({'latency': run_trial(intra, interop, cores, flush_denormal, files)}))
+        return
+
+    files = sorted(glob.glob(os.path.join(REPLAY_DIR, '*.wav')))
+    if not files:
+        print(f"No .wav recordings found in '{REPLAY_DIR}'. Record some transmissions first.")
+        return
+
+    print(f"Tuning on {len(files)} recordings from '{REPLAY_DIR}'")
+    results = []
+    for settings in candidate_settings():
+        intra, interop, cores, flush_denormal = settings
+        label = f"intra={intra} interop={interop} cores={cores or 'any'} denormal={flush_denormal}"
+        proc = subprocess.run(
+            [sys.executable, __file__, '--trial', json.dumps(settings)],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0 or not proc.stdout.strip():
+            print(f"{label}: failed")
+            continue
+        latency = json.loads(proc.stdout.strip().splitlines()[-1])['latency']
+        print(f"{label}: {latency:.3f}s per transmission")
+        results.append((latency, settings))
+
+    if not results:
+        print("All trials failed, config.ini left unchanged")
+        return
+
+    latency, (intra, interop, cores, flush_denormal) = min(results)
+    write_cpu_settings(CONFIG_FILE, CONFIG_FILE, intra, interop, cores, flush_denormal)
+    print(f"\nFastest: intra={intra} interop={interop} cores={cores or 'any'} denormal={flush_denormal} "
+          f"({latency:.3f}s per transmission). Saved to {CONFIG_FILE}")
+
+
+if __name__ == "__main__":
+    main()
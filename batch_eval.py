@@ -0,0 +1,174 @@
+"""
+VFV batch evaluation
+============================
+
+Re-runs a folder of recorded transmissions (16 kHz mono 16-bit .wav, e.g.
+replay/) through transcribe_frames and format_command, sharded across a
+process pool with one Whisper model per worker. Every result is appended to
+a JSONL report as soon as it is ready:
+
+    {"file": "0001.wav", "transcript": "...", "command": ";452 D050", "expected": ";452 D050",
+     "correct": true, "timings": {"load": 0.001, "asr": 0.84, "format": 0.0003}, "worker": 4242}
+
+An optional <name>.json next to each recording holds {"expected": ";452 D050"}.
+Files already in the report are skipped, so an interrupted run picks up
+where it stopped; --fresh starts the report over.
+
+Usage:
+    py -3.12 batch_eval.py [folder] [--workers N] [--report batch_report.jsonl] [--airport JFK] [--fresh]
+
+Each worker gets an equal share of the CPU threads ([cpu] INTRA_OP_THREADS
+is ignored, for torch and ONNX alike) so the workers don't fight over cores.
+Workers print their warnings and errors instead of logging to vfv.log.
+"""
+import argparse
+import atexit
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import time
+
+REPORT_FILE = "batch_report.jsonl"
+
+controller = None  # This worker's VoiceATC
+
+
+def worker_logging(listener):
+    """Swap VFV's vfv.log listener for warnings on stderr, so workers don't all write and rotate one file"""
+    atexit.unregister(listener.stop)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(f'[worker {os.getpid()}] %(levelname)s - %(message)s'))
+    root.addHandler(handler)
+    root.setLevel(logging.WARNING)
+
+
+def init_worker(airport: str, threads: int):
+    """Load one model per worker process"""
+    global controller
+    import VFV
+
+    worker_logging(VFV.log_listener)
+    # No command cache (measure the parser, keep workers off command_cache.json) and no session archive
+    controller = VFV.VoiceATC(airport_code=airport, interactive=False, cpu_threads=threads, batch=True)
+
+
+def expected_command(path: str):
+    label = os.path.splitext(path)[0] + '.json'
+    if not os.path.exists(label):
+        return None
+    try:
+        with open(label, 'r', encoding='utf-8') as f:
+            return json.load(f).get('expected')
+    except Exception:
+        return None
+
+
+def evaluate(path: str) -> dict:
+    """Transcribe and format one recording (runs in a worker)"""
+    import VFV
+
+    result = {'file': os.path.basename(path), 'expected': expected_command(path), 'worker': os.getpid()}
+    timings = {}
+    try:
+        start = time.perf_counter()
+        frames = VFV.load_wav_frames(path)
+        timings['load'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        transcript = controller.transcribe_frames(frames)
+        timings['asr'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        command = controller.format_command(transcript) if transcript else None
+        timings['format'] = time.perf_counter() - start
+        result.update(transcript=transcript, command=command)
+    except Exception as e:
+        result['error'] = str(e)
+    if result['expected'] is not None:
+        result['correct'] = result.get('command') == result['expected']
+    result['timings'] = timings
+    return result
+
+
+def load_report(path: str) -> list:
+    """Results already written; drops a last line cut off by an interruption"""
+    if not os.path.exists(path):
+        return []
+    results = []
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    for line in lines:
+        try:
+            results.append(json.loads(line))
+        except json.JSONDecodeError:
+            break
+    if len(results) != len(lines) or (lines and not lines[-1].endswith('\n')):
+        with open(path, 'w', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+    return results
+
+
+def summarize(results: list, new: list, wall: float):
+    done = [r for r in results if 'error' not in r]
+    print(f"\n{len(results)} recordings, {len(results) - len(done)} errors")
+    labelled = [r for r in results if 'correct' in r]
+    if labelled:
+        correct = sum(r['correct'] for r in labelled)
+        print(f"Accuracy: {correct}/{len(labelled)} ({correct / len(labelled):.1%}) labelled commands")
+    for stage in ('load', 'asr', 'format'):
+        times = [r['timings'][stage] for r in done if stage in r.get('timings', {})]
+        if times:
+            print(f"  {stage:<7} avg {sum(times) / len(times) * 1000:9.1f} ms")
+    if new:
+        busy = sum(sum(r.get('timings', {}).values()) for r in new)
+        print(f"Wall time {wall:.1f}s for this run, {busy / wall:.1f}x the serial time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate recorded transmissions in parallel")
+    parser.add_argument('folder', nargs='?', default='replay')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--report', default=REPORT_FILE)
+    parser.add_argument('--airport', default='GENERAL')
+    parser.add_argument('--fresh', action='store_true', help="Ignore and overwrite an existing report")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.folder, '*.wav')))
+    if not files:
+        print(f"No .wav recordings found in '{args.folder}'.")
+        return
+    if args.fresh and os.path.exists(args.report):
+        os.remove(args.report)
+    results = load_report(args.report)
+    finished = {r['file'] for r in results}
+    pending = [path for path in files if os.path.basename(path) not in finished]
+    print(f"{len(files)} recordings in '{args.folder}', {len(finished)} already in {args.report}, "
+          f"{len(pending)} to go with {args.workers} workers")
+
+    new = []
+    start = time.perf_counter()
+    if pending:
+        workers = min(args.workers, len(pending))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with multiprocessing.Pool(workers, initializer=init_worker, initargs=(args.airport.upper(), threads)) as pool, \
+                open(args.report, 'a', encoding='utf-8') as report:
+            for i, result in enumerate(pool.imap_unordered(evaluate, pending), 1):
+                report.write(json.dumps(result) + '\n')
+                report.flush()
+                new.append(result)
+                mark = '' if 'correct' not in result else (' ok' if result['correct'] else ' MISS')
+                print(f"[{i}/{len(pending)}] {result['file']}: {result.get('command') or result.get('error')}{mark}")
+    summarize(results + new, new, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+VFV batching benchmark
+============================
+
+Reports decoding throughput (utterances per second) against batch size for
+the configured backend. Uses the recordings in replay/ when available,
+otherwise synthetic noise of typical transmission lengths.
+
+Usage:
+    py -3.12 bench_batch.py [max_batch_size]
+"""
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+import VFV
+
+
+def load_segments(controller, count: int = 16) -> list:
+    """Log-mel segments for the corpus, built the same way live recordings are"""
+    files = sorted(glob.glob(os.path.join(VFV.REPLAY_DIR, '*.wav')))
+    if files:
+        recordings = [VFV.load_wav_frames(path) for path in files]
+    else:
+        print(f"No recordings in '{VFV.REPLAY_DIR}', using synthetic audio")
+        rng = np.random.default_rng(0)
+        recordings = []
+        for i in range(count):
+            samples = (rng.standard_normal(16000 * (2 + i % 5)) * 3000).astype(np.int16).tobytes()
+            recordings.append([samples[j:j + 2048] for j in range(0, len(samples), 2048)])
+
+    features = controller.create_features() or VFV.StreamingFeatures(controller.n_mels, controller.mel_filters_path)
+    segments = []
+    for frames in recordings:
+        features.reset()
+        for data in frames:
+            features.add_chunk(data)
+        segments.append(features.finalize())
+    return segments
+
+
+def main():
+    max_batch = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    controller = VFV.VoiceATC(airport_code="GENERAL", interactive=False)
+    segments = load_segments(controller)
+    print(f"Backend: {controller.backend}, {len(segments)} utterances")
+
+    batch_size = 1
+    while batch_size <= max_batch:
+        start = time.perf_counter()
+        for i in range(0, len(segments), batch_size):
+            controller.decode_mel_batch(np.stack(segments[i:i + batch_size]))
+        elapsed = time.perf_counter() - start
+        print(f"batch {batch_size:>2}: {len(segments) / elapsed:6.2f} utterances/s "
+              f"({elapsed / len(segments):.3f}s per utterance)")
+        batch_size *= 2
+
+
+if __name__ == "__main__":
+    main()
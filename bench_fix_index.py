@@ -0,0 +1,102 @@
+"""
+VFV fix index benchmark
+============================
+
+Compares the old full-scan fix matching (fuzzy ratio over every variation,
+then metaphone of every variation) with the BK-tree/phonetic FixIndex at
+100, 10k and 100k synthetic fixes. Queries are misheard versions of random
+fixes; recall is how often the intended fix comes back first.
+
+Usage:
+    py -3.12 bench_fix_index.py [queries per size]
+"""
+import random
+import sys
+import time
+
+import phonetics
+from thefuzz import fuzz, process
+
+from fix_index import FixIndex
+from fix_variants import generate_variants, variant_entry
+
+SIZES = (100, 10_000, 100_000)
+SCAN_BUDGET_SECONDS = 20  # The full scan is very slow at 100k; stop early and report the average
+
+
+def synthetic_fixes(count: int, rng: random.Random) -> list:
+    """Pronounceable five-letter identifiers, like real fix names"""
+    consonants, vowels = 'BCDFGHJKLMNPRSTVWZ', 'AEIOUY'
+    fixes = set()
+    while len(fixes) < count:
+        pattern = rng.choice(['CVCVC', 'CVVCV', 'CVCCV', 'CCVVC'])
+        fixes.add(''.join(rng.choice(consonants if c == 'C' else vowels) for c in pattern))
+    return sorted(fixes)
+
+
+def mishear(fix: str, rng: random.Random) -> str:
+    """A spelling Whisper might produce: a generated variant, or one random letter changed"""
+    variants = generate_variants(fix)
+    if variants and rng.random() < 0.7:
+        return rng.choice(variants).upper()
+    i = rng.randrange(len(fix))
+    return fix[:i] + rng.choice('ABCDEFGHIJKLMNOPRSTUVWYZ') + fix[i + 1:]
+
+
+def scan_match(spoken: str, variations: dict):
+    """The matching extract_direct_fix did before FixIndex"""
+    all_possible = [form for written, spoken_list in variations.items() for form in spoken_list + [written]]
+    best = process.extractOne(spoken, all_possible, scorer=fuzz.token_set_ratio, score_cutoff=70)
+    if best:
+        for written, spoken_list in variations.items():
+            if best[0] in spoken_list or best[0] == written:
+                return written
+    spoken_meta = phonetics.metaphone(spoken)
+    for written, spoken_list in variations.items():
+        for variation in spoken_list + [written]:
+            if phonetics.metaphone(variation) == spoken_meta:
+                return written
+    return None
+
+
+def main():
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = random.Random(0)
+    for size in SIZES:
+        fixes = synthetic_fixes(size, rng)
+        variations = {}
+        start = time.perf_counter()
+        index = FixIndex()
+        for fix in fixes:
+            entry = variant_entry(fix)
+            variations[fix] = [v.upper() for v in entry['variants'][:3]]
+            index.add(fix, variations[fix], entry['keys'])
+        build = time.perf_counter() - start
+
+        targets = [rng.choice(fixes) for _ in range(queries)]
+        spoken = [mishear(fix, rng) for fix in targets]
+
+        start = time.perf_counter()
+        hits = 0
+        for target, query in zip(targets, spoken):
+            match = index.best(query)
+            hits += bool(match and match[0] == target)
+        index_ms = (time.perf_counter() - start) / queries * 1000
+        index_recall = hits / queries
+
+        start = time.perf_counter()
+        hits = done = 0
+        for target, query in zip(targets, spoken):
+            hits += scan_match(query, variations) == target
+            done += 1
+            if time.perf_counter() - start > SCAN_BUDGET_SECONDS:
+                break
+        scan_ms = (time.perf_counter() - start) / done * 1000
+
+        print(f"{size:>7} fixes ({index.tree.size} forms, built in {build:.1f}s): "
+              f"index {index_ms:8.2f} ms/query, recall {index_recall:.0%} | "
+              f"full scan {scan_ms:8.2f} ms/query, recall {hits / done:.0%} ({done} queries)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+VFV spoken number benchmark
+============================
+
+Golden check and timing for spoken_numbers.py against the number handling
+it replaces (number-word replacements + digit-joining phrase patterns +
+extract_altitude / heading / speed / squawk regexes).
+
+Each golden transcript has the VICE command it must produce. Both paths run
+the full preprocess_text + parse_command pipeline on it; the report lists
+every transcript where either path is wrong, then the per-transcript cost
+of each path. The typed values (kind, value, span) the parser returns are
+checked separately.
+
+Usage:
+    py -3.12 bench_numbers.py [timing rounds]
+"""
+import sys
+import time
+
+import VFV
+from spoken_numbers import NumberParser
+
+# (transcript as Whisper writes it, expected VICE command)
+GOLDEN = [
+    ("Skywest four five two, descend and maintain one one thousand.", ";452 D110"),
+    ("Skywest 452, descend and maintain 5,000 feet.", ";452 D050"),
+    ("Delta one two three, climb and maintain flight level two four zero.", ";123 C240"),
+    ("Delta 123, climb and maintain for thousand.", ";123 C040"),
+    ("Delta one two three, descend and maintain eleven thousand five hundred.", ";123 D115"),
+    ("American four five six, turn left heading three six zero.", ";456 l360"),
+    ("American 456, turn right heading zero niner zero.", ";456 r090"),
+    ("Jetblue five six seven, fly heading to seven zero.", ";567 H270"),
+    ("Westjet eight nine zero, reduce speed to two one zero knots.", ";890 S210"),
+    ("Westjet 890, maintain speed one eight zero.", ";890 S180"),
+    ("United seven eight niner, squawk four two one seven.", ";789 SQ4217"),
+    ("United 789, squawk for two won seven.", ";789 SQ4217"),
+    ("Southwest two three four, contact tower.", ";234 TO"),
+    ("Southwest 234, cleared to land runway two two left, contact tower.", ";234 TO"),
+    ("Skywest 452, cleared ILS runway two two left.", ";452 CI2L"),
+    ("Delta 123, expect RNAV runway one niner.", ";123 ER19"),
+    ("American 456, descend and maintain three thousand, turn left heading two seven zero.", ";456 D030 l270"),
+    ("Skywest four five two, climb and maintain one two thousand, speed two five zero knots.", ";452 C120 S250"),
+    ("Delta 123, ident.", ";123 ID"),
+]
+
+# (normalized transcript, expected [(kind, value)])
+TYPED = [
+    ("skywest 452 descend and maintain one one thousand", [('number', 452), ('altitude', 11000)]),
+    ("climb and maintain flight level two four zero", [('flight_level', 240)]),
+    ("turn left heading three six zero", [('heading', 360)]),
+    ("reduce speed to two one zero", [('speed', 210)]),
+    ("squawk four two one seven", [('squawk', 4217)]),
+    ("cleared to land runway two two left", [('runway', 22)]),
+    ("descend and maintain 5000 for traffic", [('altitude', 5000)]),
+    ("contact tower one one eight point three", [('number', 118), ('number', 3)]),
+]
+
+
+def run(controller: 'VFV.VoiceATC', parser_on: bool, parser: NumberParser, text_replacements, word_replacements):
+    """Point the controller at the new or the legacy number handling"""
+    controller.number_parser = parser if parser_on else None
+    controller.word_replacements = text_replacements if parser_on else word_replacements
+    return [controller.parse_command(controller.preprocess_text(text)) for text, _ in GOLDEN]
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    controller = VFV.VoiceATC(airport_code="GENERAL", interactive=False, text_only=True)
+    controller.command_cache = None
+    parser = NumberParser(controller.tables.number_vocabulary)
+    modes = {'legacy': False, 'parser': True}
+    args = (parser, controller.tables.text_replacements, controller.tables.word_replacements)
+
+    results = {name: run(controller, on, *args) for name, on in modes.items()}
+    for name in modes:
+        correct = sum(got == expected for got, (_, expected) in zip(results[name], GOLDEN))
+        print(f"{name:>7}: {correct}/{len(GOLDEN)} golden commands")
+    for i, (text, expected) in enumerate(GOLDEN):
+        if any(results[name][i] != expected for name in modes):
+            print(f"  {text}\n    expected {expected}, legacy {results['legacy'][i]}, parser {results['parser'][i]}")
+
+    typed_ok = 0
+    for text, expected in TYPED:
+        values = parser.parse(text).values
+        got = [(value.kind, value.value) for value in values]
+        if got == expected and all(text[value.start:value.end] for value in values):
+            typed_ok += 1
+        else:
+            print(f"  typed: '{text}' expected {expected}, got {got}")
+    print(f"  typed: {typed_ok}/{len(TYPED)} transcripts")
+
+    for name, on in modes.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            run(controller, on, *args)
+        per_text = (time.perf_counter() - start) / (rounds * len(GOLDEN)) * 1e6
+        print(f"{name:>7}: {per_text:8.1f} us per transcript (preprocess_text + parse_command)")
+
+    texts = [text.lower() for text, _ in GOLDEN]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            parser.parse(text)
+    per_text = (time.perf_counter() - start) / (rounds * len(texts)) * 1e6
+    print(f" parser: {per_text:8.1f} us per transcript (NumberParser.parse alone)")
+
+
+if __name__ == "__main__":
+    main()
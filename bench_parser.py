@@ -0,0 +1,104 @@
+"""
+VFV text parser benchmark
+============================
+
+Runs a labelled transcript corpus (synth_transcripts.py) through
+format_command with Whisper out of the picture and reports:
+
+- throughput: utterances per second through format_command
+- cost per function: preprocess_text, split_clauses, extract_callsign,
+  extract_altitude, _match_runway, extract_direct_fix, the spoken number
+  parser and parse_command (inclusive times, so nested calls count in both)
+- accuracy: exact VICE command matches, overall and per command kind,
+  with a sample of the misses
+
+The command cache is off so every utterance is parsed; run with the same
+corpus before and after a parser change to compare.
+
+Usage:
+    py -3.12 bench_parser.py [corpus.jsonl or count] [airport] [misses to show]
+        (defaults: 5000 freshly generated JFK transcripts, 10 misses)
+"""
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+
+import VFV
+from synth_transcripts import TranscriptGenerator
+
+PROFILED = ['format_command', 'preprocess_text', 'split_clauses', 'parse_command', 'extract_callsign', 'extract_altitude',
+            '_match_runway', 'extract_direct_fix']
+
+
+def load_corpus(source: str, airport: str) -> list:
+    if os.path.exists(source):
+        with open(source, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return TranscriptGenerator(airport).generate(int(source))
+
+
+def timed(stats: dict, name: str, function):
+    """Wrap a bound method so its calls and time add up in stats[name]"""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            entry = stats[name]
+            entry[0] += 1
+            entry[1] += time.perf_counter() - start
+    return wrapper
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else '5000'
+    airport = sys.argv[2].upper() if len(sys.argv) > 2 else 'JFK'
+    show = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    corpus = load_corpus(source, airport)
+    airport = corpus[0].get('airport', airport) if corpus else airport
+
+    controller = VFV.VoiceATC(airport_code=airport, interactive=False, text_only=True)
+    controller.command_cache = None
+    # "No valid callsign found" and fix suggestions would drown the report
+    logging.getLogger('vfv.console').setLevel(logging.ERROR)
+
+    start = time.perf_counter()
+    commands = [controller.format_command(item['text']) for item in corpus]
+    elapsed = time.perf_counter() - start
+    print(f"{len(corpus)} utterances ({airport}) in {elapsed:.2f}s: {len(corpus) / elapsed:,.0f} utterances/s, "
+          f"{elapsed / len(corpus) * 1e6:.0f} us each")
+
+    # Second pass with every profiled function wrapped
+    stats = defaultdict(lambda: [0, 0.0])
+    for name in PROFILED:
+        setattr(controller, name, timed(stats, name, getattr(controller, name)))
+    if controller.number_parser:
+        controller.number_parser.parse = timed(stats, 'number_parser.parse', controller.number_parser.parse)
+    for item in corpus:
+        controller.format_command(item['text'])
+    total = stats['format_command'][1]
+    print(f"\n{'function':<22}{'calls':>8}{'us/call':>10}{'share':>8}")
+    for name, (calls, seconds) in sorted(stats.items(), key=lambda entry: -entry[1][1]):
+        print(f"{name:<22}{calls:>8}{seconds / calls * 1e6:>10.1f}{seconds / total:>8.0%}")
+
+    by_kind = defaultdict(lambda: [0, 0])
+    misses = []
+    for item, command in zip(corpus, commands):
+        correct = command == item['expected']
+        for kind in item.get('kinds', []):
+            by_kind[kind][0] += correct
+            by_kind[kind][1] += 1
+        if not correct:
+            misses.append((item, command))
+    print(f"\nAccuracy: {len(corpus) - len(misses)}/{len(corpus)} ({1 - len(misses) / len(corpus):.1%}) exact commands")
+    for kind, (correct, count) in sorted(by_kind.items()):
+        print(f"  {kind:<10} {correct / count:6.1%} of {count}")
+    for item, command in misses[:show]:
+        print(f"  '{item['text']}'\n      expected {item['expected']}, got {command}")
+
+
+if __name__ == "__main__":
+    main()
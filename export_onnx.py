@@ -0,0 +1,220 @@
+"""
+VFV ONNX export
+============================
+
+Exports the Whisper model from config.ini to ONNX for the onnx backend:
+- onnx/<model>/encoder.onnx: mel -> per-layer cross-attention keys/values
+- onnx/<model>/decoder.onnx: tokens + self-attention KV cache -> logits + updated cache
+- *.int8.onnx: dynamically quantized int8 weights (with --int8)
+
+Usage:
+    py -3.12 export_onnx.py [--int8] [--verify]
+
+--verify transcribes every .wav in replay/ with both backends and compares the
+results against replay/<name>.txt reference transcripts when present
+(set [onnx] INT8 = true in config.ini to verify the int8 models).
+"""
+import configparser
+import glob
+import json
+import os
+import sys
+import time
+
+import torch
+import whisper
+from torch import nn
+
+CONFIG_FILE = "config.ini"
+ONNX_DIR = "onnx"
+REPLAY_DIR = "replay"
+OPSET = 17
+
+
+def attend(q: torch.Tensor, k: torch.Tensor, v: torch.Tensor, n_head: int, mask: torch.Tensor = None):
+    """Whisper's qkv_attention written out so it traces cleanly"""
+    n_batch, n_ctx, n_state = q.shape
+    scale = (n_state // n_head) ** -0.25
+    q = q.reshape(n_batch, n_ctx, n_head, n_state // n_head).permute(0, 2, 1, 3) * scale
+    k = k.reshape(n_batch, k.shape[1], n_head, n_state // n_head).permute(0, 2, 3, 1) * scale
+    v = v.reshape(n_batch, v.shape[1], n_head, n_state // n_head).permute(0, 2, 1, 3)
+    qk = q @ k
+    if mask is not None:
+        qk = qk + mask
+    w = torch.softmax(qk.float(), dim=-1).to(q.dtype)
+    return (w @ v).permute(0, 2, 1, 3).reshape(n_batch, n_ctx, n_state)
+
+
+class EncoderExport(nn.Module):
+    """Encoder plus the cross-attention key/value projections of every decoder block"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.encoder = model.encoder
+        self.blocks = model.decoder.blocks
+
+    def forward(self, mel: torch.Tensor):
+        audio_features = self.encoder(mel)
+        cross_k = torch.stack([block.cross_attn.key(audio_features) for block in self.blocks])
+        cross_v = torch.stack([block.cross_attn.value(audio_features) for block in self.blocks])
+        return cross_k, cross_v
+
+
+class DecoderExport(nn.Module):
+    """Text decoder with an explicit self-attention KV cache instead of forward hooks"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.decoder = model.decoder
+        self.n_head = model.dims.n_text_head
+
+    def forward(self, tokens, cross_k, cross_v, self_k, self_v):
+        decoder = self.decoder
+        offset = self_k.shape[2]
+        positions = torch.arange(tokens.shape[1]) + offset
+        x = decoder.token_embedding(tokens) + decoder.positional_embedding[positions]
+
+        # Causal mask over cached + new positions
+        key_positions = torch.arange(offset + tokens.shape[1])
+        future = key_positions[None, :] > positions[:, None]
+        mask = torch.zeros_like(future, dtype=torch.float32).masked_fill(future, float('-inf'))
+
+        new_k, new_v = [], []
+        for i, block in enumerate(decoder.blocks):
+            h = block.attn_ln(x)
+            k = torch.cat([self_k[i], block.attn.key(h)], dim=1)
+            v = torch.cat([self_v[i], block.attn.value(h)], dim=1)
+            new_k.append(k)
+            new_v.append(v)
+            x = x + block.attn.out(attend(block.attn.query(h), k, v, self.n_head, mask))
+
+            h = block.cross_attn_ln(x)
+            x = x + block.cross_attn.out(attend(block.cross_attn.query(h), cross_k[i], cross_v[i], self.n_head))
+            x = x + block.mlp(block.mlp_ln(x))
+
+        x = decoder.ln(x)
+        logits = (x @ decoder.token_embedding.weight.T).float()
+        return logits, torch.stack(new_k), torch.stack(new_v)
+
+
+def export(model, out_dir: str):
+    dims = model.dims
+    os.makedirs(out_dir, exist_ok=True)
+
+    mel = torch.zeros(1, dims.n_mels, dims.n_audio_ctx * 2)
+    torch.onnx.export(
+        EncoderExport(model), (mel,), os.path.join(out_dir, 'encoder.onnx'),
+        input_names=['mel'],
+        output_names=['cross_k', 'cross_v'],
+        dynamic_axes={'mel': {0: 'batch'}, 'cross_k': {1: 'batch'}, 'cross_v': {1: 'batch'}},
+        opset_version=OPSET,
+        dynamo=False
+    )
+
+    tokens = torch.zeros(1, 3, dtype=torch.long)
+    cross = torch.zeros(dims.n_text_layer, 1, dims.n_audio_ctx, dims.n_text_state)
+    past = torch.zeros(dims.n_text_layer, 1, 2, dims.n_text_state)
+    torch.onnx.export(
+        DecoderExport(model), (tokens, cross, cross, past, past), os.path.join(out_dir, 'decoder.onnx'),
+        input_names=['tokens', 'cross_k', 'cross_v', 'self_k', 'self_v'],
+        output_names=['logits', 'new_self_k', 'new_self_v'],
+        dynamic_axes={
+            'tokens': {0: 'batch', 1: 'n_tokens'},
+            'cross_k': {1: 'batch'},
+            'cross_v': {1: 'batch'},
+            'self_k': {1: 'batch', 2: 'n_past'},
+            'self_v': {1: 'batch', 2: 'n_past'},
+            'logits': {0: 'batch', 1: 'n_tokens'},
+            'new_self_k': {1: 'batch', 2: 'n_total'},
+            'new_self_v': {1: 'batch', 2: 'n_total'},
+        },
+        opset_version=OPSET,
+        dynamo=False
+    )
+
+    with open(os.path.join(out_dir, 'dims.json'), 'w') as f:
+        json.dump({
+            'dims': dims.__dict__,
+            'multilingual': model.is_multilingual,
+            'num_languages': model.num_languages,
+        }, f, indent=2)
+
+
+def quantize(out_dir: str):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    for name in ('encoder', 'decoder'):
+        quantize_dynamic(
+            os.path.join(out_dir, f'{name}.onnx'),
+            os.path.join(out_dir, f'{name}.int8.onnx'),
+            weight_type=QuantType.QInt8
+        )
+
+
+def verify():
+    """Transcribe the replay corpus with both backends and compare"""
+    import VFV
+
+    files = sorted(glob.glob(os.path.join(REPLAY_DIR, '*.wav')))
+    if not files:
+        print(f"No .wav recordings in '{REPLAY_DIR}' to verify against")
+        return
+
+    controllers = {
+        backend: VFV.VoiceATC(airport_code="GENERAL", interactive=False, backend=backend)
+        for backend in ('torch', 'onnx')
+    }
+
+    matches = {'torch': 0, 'onnx': 0, 'agree': 0}
+    references = 0
+    timings = {'torch': 0.0, 'onnx': 0.0}
+    for path in files:
+        frames = VFV.load_wav_frames(path)
+        texts = {}
+        for backend, controller in controllers.items():
+            start = time.perf_counter()
+            texts[backend] = controller.transcribe_frames(frames) or ""
+            timings[backend] += time.perf_counter() - start
+        matches['agree'] += texts['torch'] == texts['onnx']
+
+        reference_path = os.path.splitext(path)[0] + '.txt'
+        if os.path.exists(reference_path):
+            with open(reference_path, 'r', encoding='utf-8') as f:
+                reference = controllers['torch'].preprocess_text(f.read().strip())
+            references += 1
+            for backend in texts:
+                matches[backend] += texts[backend] == reference
+        if texts['torch'] != texts['onnx']:
+            print(f"{os.path.basename(path)}: torch '{texts['torch']}' vs onnx '{texts['onnx']}'")
+
+    print(f"\nBackends agree on {matches['agree']}/{len(files)} recordings")
+    if references:
+        print(f"Reference matches: torch {matches['torch']}/{references}, onnx {matches['onnx']}/{references}")
+    for backend, total in timings.items():
+        print(f"{backend}: {total / len(files):.3f}s per transmission")
+
+
+def main():
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    model_size = config.get('settings', 'MODEL_SIZE', fallback='base')
+    int8 = '--int8' in sys.argv
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    out_dir = os.path.join(script_dir, ONNX_DIR, model_size)
+    print(f"Exporting Whisper '{model_size}' to {out_dir}")
+    model = whisper.load_model(model_size, device='cpu', download_root=script_dir)
+    with torch.no_grad():
+        export(model.eval(), out_dir)
+    if int8:
+        print("Quantizing weights to int8...")
+        quantize(out_dir)
+    print("Export finished")
+
+    if '--verify' in sys.argv:
+        del model
+        verify()
+
+
+if __name__ == "__main__":
+    main()
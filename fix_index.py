@@ -0,0 +1,140 @@
+"""
+VFV fix index
+============================
+
+Approximate matching of spoken fixes without scanning every variation:
+
+- a BK-tree over all spoken forms, so an edit-distance search only visits
+  the part of the tree that can be within the distance limit
+- phonetic buckets (metaphone, NYSIIS, soundex keys from fix_variants.py)
+  that catch spellings too far apart in edit distance but alike in sound
+
+lookup() merges both candidate sets and scores each fix 0-100. best()
+searches radius 1 first and only widens the (much costlier) search when
+nothing close enough turns up.
+"""
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+from fix_variants import phonetic_keys
+
+try:
+    from rapidfuzz.distance.Levenshtein import distance as edit_distance  # installed with thefuzz
+except ImportError:
+    def edit_distance(a: str, b: str) -> int:
+        """Levenshtein distance"""
+        if len(a) < len(b):
+            a, b = b, a
+        previous = list(range(len(b) + 1))
+        for i, ca in enumerate(a, 1):
+            current = [i]
+            for j, cb in enumerate(b, 1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+            previous = current
+        return previous[-1]
+
+# Score added per matching phonetic key type
+PHONETIC_WEIGHTS = {'M': 15, 'N': 10, 'S': 5}
+
+
+class BKTree:
+    """Burkhard-Keller tree of words under edit distance"""
+
+    def __init__(self):
+        self.root = None  # [word, {distance: child}]
+        self.size = 0
+
+    def add(self, word: str):
+        if self.root is None:
+            self.root = [word, {}]
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [word, {}]
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """(distance, word) for every word within max_distance"""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= max_distance:
+                found.append((distance, node_word))
+            # Triangle inequality: only children at distance d +- max_distance can match
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return found
+
+
+class FixIndex:
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max_distance
+        self.tree = BKTree()
+        self.forms = defaultdict(list)  # SPOKEN FORM -> written fixes
+        self.spoken = defaultdict(list)  # written -> SPOKEN FORMS
+        self.buckets = defaultdict(list)  # phonetic key -> written fixes
+
+    def __len__(self) -> int:
+        return len(self.spoken)
+
+    def add(self, written: str, spoken_list: List[str], keys: Optional[List[str]] = None):
+        """Index a fix under its identifier and spoken forms (keys are computed if not given)"""
+        forms = [form.upper() for form in [written, *spoken_list]]
+        if keys is None:
+            keys = [key for form in forms for key in phonetic_keys(form)]
+        for form in dict.fromkeys(forms):
+            if written not in self.forms[form]:
+                self.forms[form].append(written)
+                self.spoken[written].append(form)
+                self.tree.add(form)
+        for key in dict.fromkeys(keys):
+            if written not in self.buckets[key]:
+                self.buckets[key].append(written)
+
+    def lookup(self, spoken: str, limit: int = 5, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Best (written, score) candidates for a spoken fix, highest score first"""
+        spoken = spoken.upper()
+        max_distance = self.max_distance if max_distance is None else max_distance
+        best = {}  # written -> edit score
+
+        def edit_score(form: str, distance: int) -> int:
+            return round(100 * (1 - distance / max(len(form), len(spoken), 1)))
+
+        for distance, form in self.tree.search(spoken, max_distance):
+            for written in self.forms[form]:
+                best[written] = max(best.get(written, 0), edit_score(form, distance))
+
+        bonus = defaultdict(int)
+        for key in phonetic_keys(spoken):
+            for written in self.buckets.get(key, ()):
+                bonus[written] += PHONETIC_WEIGHTS[key[0]]
+        # Sound-alikes outside the edit radius: single keys are coarse, so require metaphone and NYSIIS
+        for written, points in bonus.items():
+            if points >= PHONETIC_WEIGHTS['M'] + PHONETIC_WEIGHTS['N'] and written not in best:
+                best[written] = max(max(edit_score(form, edit_distance(spoken, form)), 0)
+                                    for form in self.spoken[written])
+
+        scored = [(written, min(100, score + bonus[written])) for written, score in best.items()]
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
+
+    def best(self, spoken: str, cutoff: int = 70) -> Optional[Tuple[str, int]]:
+        """Highest-scoring fix at or above cutoff, widening the edit radius one step at a time"""
+        for max_distance in range(1, self.max_distance + 1):
+            matches = self.lookup(spoken, limit=1, max_distance=max_distance)
+            if matches and matches[0][1] >= cutoff:
+                return matches[0]
+        return None
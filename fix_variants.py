@@ -0,0 +1,187 @@
+"""
+VFV fix variant generator
+============================
+
+Generates the spoken forms Whisper is likely to produce for fix identifiers,
+so new fixes don't need hand-typed misspellings in fixes.json:
+
+- sound-alike respellings of pronounceable five-letter names (COATE -> Koate, Cote, ...)
+- ICAO alphabet spellings for short identifiers (DPK -> Delta Papa Kilo)
+- substitutions mined from vfv.log, where a spoken fix was matched to a different identifier
+
+Each fix also gets its phonetic keys (metaphone, NYSIIS, soundex), so VFV
+matches by lookup instead of recomputing keys for every variation.
+
+Writes fix_variants.json for the identifiers in fixes.json and adds the
+variants to the partitions of the NASR fix database when it exists.
+
+Usage:
+    py -3.12 fix_variants.py [log file, default: vfv.log]
+"""
+import configparser
+import difflib
+import glob
+import json
+import os
+import re
+import sys
+from collections import Counter
+from typing import List, Optional
+
+import phonetics
+
+CONFIG_FILE = "config.ini"
+VARIANTS_FILE = "fix_variants.json"
+MAX_VARIANTS = 12
+
+# Spellings that sound alike: (written, spoken) substitutions applied anywhere in the name,
+# most plausible first (same sound, different spelling), then voicing/nasal confusions
+SOUND_ALIKES = [
+    ('OA', 'O'), ('OE', 'O'), ('OU', 'OW'), ('OW', 'OU'), ('OO', 'U'), ('U', 'OO'),
+    ('AY', 'AI'), ('AI', 'AY'), ('AY', 'EY'), ('EY', 'AY'), ('AE', 'A'),
+    ('EE', 'EA'), ('EA', 'EE'), ('EE', 'I'), ('IE', 'EE'), ('Y', 'I'), ('I', 'Y'),
+    ('C', 'K'), ('K', 'C'), ('CK', 'K'), ('Q', 'K'), ('X', 'KS'), ('PH', 'F'), ('F', 'PH'),
+    ('Z', 'S'), ('S', 'Z'), ('GH', ''), ('TH', 'T'), ('WR', 'R'), ('KN', 'N'),
+    ('D', 'T'), ('T', 'D'), ('V', 'B'), ('B', 'V'), ('M', 'N'), ('N', 'M'),
+]
+
+ICAO_ALPHABET = {
+    'A': 'Alpha', 'B': 'Bravo', 'C': 'Charlie', 'D': 'Delta', 'E': 'Echo', 'F': 'Foxtrot',
+    'G': 'Golf', 'H': 'Hotel', 'I': 'India', 'J': 'Juliet', 'K': 'Kilo', 'L': 'Lima',
+    'M': 'Mike', 'N': 'November', 'O': 'Oscar', 'P': 'Papa', 'Q': 'Quebec', 'R': 'Romeo',
+    'S': 'Sierra', 'T': 'Tango', 'U': 'Uniform', 'V': 'Victor', 'W': 'Whiskey', 'X': 'X-ray',
+    'Y': 'Yankee', 'Z': 'Zulu',
+}
+
+
+def phonetic_keys(word: str) -> List[str]:
+    """Metaphone, NYSIIS and soundex keys, prefixed M:/N:/S:"""
+    letters = re.sub(r'[^a-z]', '', word.lower())
+    keys = []
+    if not letters:
+        return keys
+    for prefix, algorithm in (('M', phonetics.metaphone), ('N', phonetics.nysiis), ('S', phonetics.soundex)):
+        try:
+            keys.append(f"{prefix}:{algorithm(letters)}")
+        except (IndexError, KeyError, ValueError):
+            continue  # phonetics fails on some very short or unusual words
+    return keys
+
+
+def mine_confusions(log_paths: List[str]) -> Counter:
+    """(written, spoken) substring substitutions from fixes VFV matched to a different spelling"""
+    confusions = Counter()
+    spoken = None
+    for path in log_paths:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    attempt = re.search(r'Attempting to match fix: (\w+)', line)
+                    if attempt:
+                        spoken = attempt.group(1).upper()
+                        continue
+                    command = re.search(r'Formatted command: ;\S+ (.*)', line)
+                    if command and spoken:
+                        fix = re.search(r'\bD([A-Z]{2,5})\b', command.group(1))
+                        if fix and fix.group(1) != spoken:
+                            matcher = difflib.SequenceMatcher(None, fix.group(1), spoken)
+                            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                                if tag != 'equal':
+                                    confusions[(fix.group(1)[i1:i2], spoken[j1:j2])] += 1
+                        spoken = None
+        except OSError:
+            continue
+    return confusions
+
+
+def respellings(ident: str, rules: List[tuple]) -> List[str]:
+    """Single substitutions first, then pairs, in rule order"""
+    def substitute(word: str):
+        for written, spoken in rules:
+            start = word.find(written) if written else -1
+            while start != -1:
+                yield word[:start] + spoken + word[start + len(written):]
+                start = word.find(written, start + 1)
+
+    seen = {ident}
+    singles = []
+    for word in substitute(ident):
+        if word and word not in seen:
+            seen.add(word)
+            singles.append(word)
+    doubles = []
+    for single in singles:
+        for word in substitute(single):
+            if word and word not in seen:
+                seen.add(word)
+                doubles.append(word)
+    # Endings Whisper often adds or drops
+    endings = [ident[:-1]] if ident.endswith('E') else [ident + 'E']
+    return singles + [word for word in endings if word not in seen] + doubles
+
+
+def generate_variants(ident: str, confusions: Optional[Counter] = None, name: str = '') -> List[str]:
+    """Likely spoken forms for one identifier (not including the identifier itself)"""
+    ident = ident.upper()
+    variants = []
+    if name:
+        variants.append(name.title())
+    if len(ident) <= 3 or not ident.isalpha():
+        variants.append(' '.join(ICAO_ALPHABET.get(c, c) for c in ident))
+    if len(ident) >= 4 and ident.isalpha():
+        mined = [rule for rule, count in (confusions or Counter()).most_common() if count >= 2]
+        variants.extend(word.title() for word in respellings(ident, mined + SOUND_ALIKES))
+    return list(dict.fromkeys(variants))[:MAX_VARIANTS]
+
+
+def variant_entry(ident: str, confusions: Optional[Counter] = None, name: str = '', extra: List[str] = ()) -> dict:
+    """Variants plus the phonetic keys of the identifier and every variant"""
+    variants = generate_variants(ident, confusions, name)
+    keys = []
+    for word in [ident, *extra, *variants]:
+        for key in phonetic_keys(word):
+            if key not in keys:
+                keys.append(key)
+    return {'variants': variants, 'keys': keys}
+
+
+def update_fixdb(path: str, confusions: Counter) -> int:
+    """Regenerate the variants column of every partition in the NASR fix database"""
+    count = 0
+    for partition in glob.glob(os.path.join(path, 'partitions', '*.json')):
+        with open(partition, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for row in data['fixes']:
+            entry = variant_entry(row[0], confusions, row[6] if len(row) > 6 else '')
+            row[4:6] = [entry['variants'], entry['keys']]
+            count += 1
+        with open(partition, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+    return count
+
+
+def main():
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    log_file = sys.argv[1] if len(sys.argv) > 1 else 'vfv.log'
+    confusions = mine_confusions(sorted(glob.glob(log_file + '*')))
+    print(f"Mined {sum(confusions.values())} substitutions ({len(confusions)} distinct) from {log_file}")
+
+    with open('fixes.json', 'r', encoding='utf-8-sig') as f:
+        fixes = json.load(f)
+    generated = {}
+    for entries in fixes.values():
+        for written, spoken in entries.items():
+            hand_written = [spoken] if isinstance(spoken, str) else spoken
+            generated[written.upper()] = variant_entry(written, confusions, extra=hand_written)
+    with open(VARIANTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'fixes': generated}, f, indent=1)
+    print(f"Wrote variants for {len(generated)} fixes.json identifiers to {VARIANTS_FILE}")
+
+    fixdb_dir = config.get('fixdb', 'DIR', fallback='fixdb')
+    if os.path.exists(os.path.join(fixdb_dir, 'manifest.json')):
+        print(f"Updated variants for {update_fixdb(fixdb_dir, confusions)} fixes in '{fixdb_dir}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+VFV fix database
+============================
+
+Runtime side of the FAA NASR fix/navaid database built by import_nasr.py.
+The database is split into one partition file per ARTCC; VFV opens only
+the partitions within RADIUS_NM of the selected airport and keeps the fixes
+inside that radius. When a spoken fix can't be matched, expand() doubles the
+radius and lazily loads the neighbouring partitions it now reaches.
+
+Layout of the database directory:
+    manifest.json            {"version", "effective", "partitions": {ARTCC: {"count", "bbox"}}}
+    airports.json            {FAA or ICAO id: [lat, lon, ARTCC]}
+    partitions/<ARTCC>.json  {"fixes": [[ident, lat, lon, kind, variants, phonetic keys, name], ...]}
+"""
+import json
+import logging
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FIXDB_VERSION = 2
+EARTH_RADIUS_NM = 3440.065
+
+
+def distance_nm(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in nautical miles"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bbox_distance_nm(lat: float, lon: float, bbox: List[float]) -> float:
+    """Distance from a point to the nearest edge of a [min_lat, min_lon, max_lat, max_lon] box (0 inside)"""
+    min_lat, min_lon, max_lat, max_lon = bbox
+    return distance_nm(lat, lon, min(max(lat, min_lat), max_lat), min(max(lon, min_lon), max_lon))
+
+
+class FixDatabase:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != FIXDB_VERSION:
+            raise ValueError(f"Fix database '{path}' has version {self.manifest.get('version')}, "
+                             f"expected {FIXDB_VERSION} - run import_nasr.py again")
+        with open(os.path.join(path, 'airports.json'), 'r', encoding='utf-8') as f:
+            self.airports = json.load(f)
+        self.partitions = {}  # ARTCC -> loaded fix rows
+        self.origin = None
+        self.radius_nm = 0.0
+        self.active = {}  # ident -> row (see layout above) within the current radius
+
+    @classmethod
+    def open(cls, path: str) -> Optional['FixDatabase']:
+        """The database at path, or None if it hasn't been imported"""
+        if not os.path.exists(os.path.join(path, 'manifest.json')):
+            return None
+        try:
+            return cls(path)
+        except Exception as e:
+            logger.error(f"Error opening fix database '{path}': {str(e)}")
+            return None
+
+    def locate(self, code: Optional[str]) -> Optional[Tuple[float, float, str]]:
+        """(lat, lon, ARTCC) for an FAA or ICAO airport id"""
+        if not code:
+            return None
+        entry = self.airports.get(code.upper())
+        return tuple(entry) if entry else None
+
+    def load_partition(self, artcc: str) -> list:
+        if artcc not in self.partitions:
+            with open(os.path.join(self.path, 'partitions', f"{artcc}.json"), 'r', encoding='utf-8') as f:
+                self.partitions[artcc] = json.load(f)['fixes']
+            logger.info(f"Loaded fix partition {artcc} ({len(self.partitions[artcc])} fixes)")
+        return self.partitions[artcc]
+
+    def select(self, code: str, radius_nm: float) -> Dict[str, list]:
+        """Activate the fixes within radius_nm of an airport; returns them by identifier"""
+        location = self.locate(code)
+        if not location:
+            return {}
+        self.origin = location
+        self.radius_nm = 0.0
+        self.active = {}
+        self.extend_to(radius_nm)
+        return self.active
+
+    def extend_to(self, radius_nm: float) -> List[str]:
+        """Grow the active radius, loading partitions it reaches; returns the newly activated identifiers"""
+        lat, lon, home = self.origin
+        added = []
+        for artcc, info in self.manifest['partitions'].items():
+            if artcc != home and bbox_distance_nm(lat, lon, info['bbox']) > radius_nm:
+                continue
+            for row in self.load_partition(artcc):
+                ident = row[0]
+                if ident in self.active:
+                    continue
+                if distance_nm(lat, lon, row[1], row[2]) <= radius_nm:
+                    self.active[ident] = row
+                    added.append(ident)
+        self.radius_nm = radius_nm
+        return added
+
+    def expand(self) -> List[str]:
+        """Double the active radius (lazy neighbour loading); returns the newly activated identifiers"""
+        if not self.origin:
+            return []
+        return self.extend_to(self.radius_nm * 2)
@@ -0,0 +1,170 @@
+"""
+VFV NASR importer
+============================
+
+Builds the partitioned fix database VFV uses for airports beyond fixes.json
+from the FAA 28-day NASR subscription CSV files (FIX_BASE.csv, NAV_BASE.csv
+and APT_BASE.csv). Download the "CSV Data" zip from
+https://www.faa.gov/air_traffic/flight_info/aeronav/aero_data/NASR_Subscription/
+and pass it (or the folder it was extracted to) to this script.
+
+Fixes and navaids are grouped into one partition per ARTCC; fixdb.py loads
+only the partitions near the selected airport. Spoken variants and phonetic
+keys come from fix_variants.py (using confusions mined from vfv.log).
+
+Usage:
+    py -3.12 import_nasr.py <CSV zip or folder> [output folder, default: fixdb]
+"""
+import configparser
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import zipfile
+from collections import defaultdict
+
+from fix_variants import mine_confusions, variant_entry
+from fixdb import FIXDB_VERSION
+
+CONFIG_FILE = "config.ini"
+
+# NASR column names (the first one present is used)
+COLUMNS = {
+    'fix_id': ['FIX_ID'],
+    'nav_id': ['NAV_ID'],
+    'nav_type': ['NAV_TYPE'],
+    'nav_name': ['NAME'],
+    'airport_id': ['ARPT_ID', 'SITE_ID'],
+    'icao_id': ['ICAO_ID'],
+    'lat': ['LAT_DECIMAL'],
+    'lon': ['LONG_DECIMAL'],
+    'fix_artcc': ['ARTCC_ID_LOW', 'ARTCC_ID_HIGH'],
+    'nav_artcc': ['LOW_ALT_ARTCC_ID', 'HIGH_ALT_ARTCC_ID'],
+    'airport_artcc': ['RESP_ARTCC_ID'],
+    'effective': ['EFF_DATE'],
+}
+
+
+def find_csv_files(source: str) -> dict:
+    """Text of FIX_BASE/NAV_BASE/APT_BASE.csv by file name, from a folder or a (nested) zip"""
+    wanted = {'FIX_BASE.csv', 'NAV_BASE.csv', 'APT_BASE.csv'}
+    found = {}
+
+    def scan_zip(archive: zipfile.ZipFile):
+        for name in archive.namelist():
+            base = os.path.basename(name)
+            if base in wanted and base not in found:
+                found[base] = archive.read(name).decode('utf-8-sig', errors='replace')
+            elif base.lower().endswith('.zip'):
+                scan_zip(zipfile.ZipFile(io.BytesIO(archive.read(name))))
+
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for base in files:
+                if base in wanted and base not in found:
+                    with open(os.path.join(root, base), 'r', encoding='utf-8-sig', errors='replace') as f:
+                        found[base] = f.read()
+    else:
+        with zipfile.ZipFile(source) as archive:
+            scan_zip(archive)
+
+    missing = wanted - set(found)
+    if missing:
+        raise FileNotFoundError(f"{', '.join(sorted(missing))} not found in '{source}'")
+    return found
+
+
+def rows(text: str):
+    return csv.DictReader(io.StringIO(text))
+
+
+def column(row: dict, key: str) -> str:
+    for name in COLUMNS[key]:
+        value = (row.get(name) or '').strip()
+        if value:
+            return value
+    return ''
+
+
+def coordinates(row: dict):
+    try:
+        return round(float(column(row, 'lat')), 5), round(float(column(row, 'lon')), 5)
+    except ValueError:
+        return None
+
+
+def import_nasr(source: str, output: str) -> dict:
+    files = find_csv_files(source)
+
+    airports = {}
+    effective = ''
+    for row in rows(files['APT_BASE.csv']):
+        location = coordinates(row)
+        artcc = column(row, 'airport_artcc')
+        if not location or not artcc:
+            continue
+        effective = effective or column(row, 'effective')
+        entry = [location[0], location[1], artcc]
+        airports[column(row, 'airport_id').upper()] = entry
+        icao = column(row, 'icao_id').upper()
+        if icao:
+            airports[icao] = entry
+
+    partitions = defaultdict(dict)
+    for row in rows(files['FIX_BASE.csv']):
+        location = coordinates(row)
+        ident = column(row, 'fix_id').upper()
+        if location and ident:
+            partitions[column(row, 'fix_artcc') or 'UNKNOWN'][ident] = [ident, *location, 'FIX', [], [], '']
+    for row in rows(files['NAV_BASE.csv']):
+        location = coordinates(row)
+        ident = column(row, 'nav_id').upper()
+        if location and ident:
+            kind = column(row, 'nav_type') or 'NAVAID'
+            name = column(row, 'nav_name')
+            partitions[column(row, 'nav_artcc') or 'UNKNOWN'].setdefault(ident, [ident, *location, kind, [], [], name])
+
+    confusions = mine_confusions(glob.glob('vfv.log*'))
+    for fixes in partitions.values():
+        for row in fixes.values():
+            entry = variant_entry(row[0], confusions, row[6])
+            row[4:6] = [entry['variants'], entry['keys']]
+
+    os.makedirs(os.path.join(output, 'partitions'), exist_ok=True)
+    manifest = {'version': FIXDB_VERSION, 'effective': effective, 'partitions': {}}
+    for artcc, fixes in sorted(partitions.items()):
+        entries = sorted(fixes.values())
+        lats = [fix[1] for fix in entries]
+        lons = [fix[2] for fix in entries]
+        manifest['partitions'][artcc] = {
+            'count': len(entries),
+            'bbox': [min(lats), min(lons), max(lats), max(lons)],
+        }
+        with open(os.path.join(output, 'partitions', f"{artcc}.json"), 'w', encoding='utf-8') as f:
+            json.dump({'fixes': entries}, f, separators=(',', ':'))
+
+    with open(os.path.join(output, 'airports.json'), 'w', encoding='utf-8') as f:
+        json.dump(airports, f, separators=(',', ':'))
+    with open(os.path.join(output, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    output = sys.argv[2] if len(sys.argv) > 2 else config.get('fixdb', 'DIR', fallback='fixdb')
+
+    manifest = import_nasr(sys.argv[1], output)
+    total = sum(info['count'] for info in manifest['partitions'].values())
+    print(f"Imported {total} fixes/navaids into {len(manifest['partitions'])} ARTCC partitions in '{output}'"
+          f" (effective {manifest['effective'] or 'unknown'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+VFV local LLM fallback
+============================
+
+When the rule-based parser can't build a command, the transcript and the
+few-shot examples in VoiceATC.command_examples are sent to a local
+llama.cpp server (CPU, quantized model, [ai] LOCAL_MODEL) under a strict
+deadline. The server's output is constrained by a GBNF grammar of VICE
+commands and validated again here before anything is typed into VICE.
+
+Start the server before VFV, e.g.:
+    llama-server -m llama-2-7b-chat.Q4_K_M.gguf --port 8080 -t 4
+(current llama.cpp only loads GGUF; convert older GGML files first)
+"""
+import http.client
+import json
+import logging
+import re
+import time
+from typing import Optional, Set
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# One VICE command token, as format_command builds them
+VICE_TOKEN = (r'(?:[DC]\d{3}|ED|EC|[lrH]\d{3}|S\d{2,3}|SS|S|TO|FC|I|CAC|CVS|ID|SH|RON'
+              r'|[EC][IRV]\d{1,2}[LRC]?|[EC](?:MTV|RIV)|D[A-Z]{2,5}|SQ\d{4})')
+VICE_COMMAND = re.compile(rf'^;([A-Z0-9]{{2,8}})((?: {VICE_TOKEN})+)$')
+
+# The same grammar for llama.cpp's constrained sampling
+VICE_GRAMMAR = r'''
+root ::= ";" id id id? id? id? id? id? id? (" " cmd)+ "\n"
+id ::= [A-Z0-9]
+d ::= [0-9]
+L ::= [A-Z]
+cmd ::= [DC] d d d | "ED" | "EC" | [lrH] d d d | "S" d d d? | "SS" | "S" | "TO" | "FC" | "I" | "CAC" | "CVS"
+      | "ID" | "SH" | "RON" | [EC] [IRV] d d? [LRC]? | [EC] ("MTV" | "RIV") | "D" L L L? L? L? | "SQ" d d d d
+'''
+
+
+def validate_command(command: str, text: str, known_fixes: Optional[Set[str]] = None) -> bool:
+    """Grammar check plus sanity checks against the transcript (no invented callsigns or fixes)"""
+    match = VICE_COMMAND.match(command)
+    if not match:
+        return False
+    digits = re.sub(r'\D', '', match.group(1))
+    if digits and digits not in re.sub(r'\D', '', text):
+        return False
+    if known_fixes is not None:
+        for token in match.group(2).split():
+            if re.fullmatch(r'D[A-Z]{2,5}', token) and token[1:] not in known_fixes:
+                return False
+    return True
+
+
+class LLMFallback:
+    def __init__(self, url: str, examples: str, deadline_ms: int = 1500, max_tokens: int = 32,
+                 cache_size: int = 256):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.examples = examples
+        self.deadline = deadline_ms / 1000
+        self.max_tokens = max_tokens
+        self.cache_size = cache_size
+        self.cache = {}  # transcript -> validated command or None (timeouts are not cached)
+        self.stats = {'calls': 0, 'accepted': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0,
+                      'cache_hits': 0, 'time': 0.0}
+
+    def prompt(self, text: str) -> str:
+        return ("Convert the air traffic control transmission to a VICE command.\n"
+                f"{self.examples.strip()}\n\n"
+                f'Transmission: "{text}"\n'
+                "Command: ")
+
+    def healthy(self) -> bool:
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=1)
+            conn.request('GET', '/health')
+            ok = conn.getresponse().status == 200
+            conn.close()
+            return ok
+        except Exception:
+            return False
+
+    def complete(self, text: str, known_fixes: Optional[Set[str]] = None) -> Optional[str]:
+        """A validated VICE command for the transcript, or None (also when the deadline passes)"""
+        if text in self.cache:
+            self.stats['cache_hits'] += 1
+            return self.cache[text]
+
+        self.stats['calls'] += 1
+        start = time.perf_counter()
+        command = None
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.deadline)
+            body = json.dumps({
+                'prompt': self.prompt(text),
+                'n_predict': self.max_tokens,
+                'temperature': 0,
+                'grammar': VICE_GRAMMAR,
+                'stop': ['\n'],
+                'cache_prompt': True,  # The examples prefix stays in the server's KV cache
+            })
+            conn.request('POST', '/completion', body=body, headers={'Content-Type': 'application/json'})
+            response = json.loads(conn.getresponse().read().decode('utf-8'))
+            conn.close()
+            command = response.get('content', '').strip()
+        except (TimeoutError, OSError) as e:
+            elapsed = time.perf_counter() - start
+            self.stats['time'] += elapsed
+            if elapsed >= self.deadline:
+                self.stats['timeouts'] += 1
+                logger.warning(f"LLM fallback missed its {self.deadline * 1000:.0f} ms deadline")
+            else:
+                self.stats['errors'] += 1
+                logger.error(f"LLM fallback failed: {str(e)}")
+            return None
+        except Exception as e:
+            self.stats['time'] += time.perf_counter() - start
+            self.stats['errors'] += 1
+            logger.error(f"LLM fallback failed: {str(e)}")
+            return None
+
+        elapsed = time.perf_counter() - start
+        self.stats['time'] += elapsed
+        if elapsed > self.deadline:
+            # Too late to be useful even though it answered
+            self.stats['timeouts'] += 1
+            logger.warning(f"LLM fallback answered after {elapsed * 1000:.0f} ms, discarded")
+            return None
+
+        if validate_command(command, text, known_fixes):
+            self.stats['accepted'] += 1
+            logger.info(f"LLM fallback: '{text}' -> {command} ({elapsed * 1000:.0f} ms)")
+        else:
+            self.stats['rejected'] += 1
+            logger.info(f"LLM fallback output rejected: '{command}' ({elapsed * 1000:.0f} ms)")
+            command = None
+
+        if len(self.cache) >= self.cache_size:
+            self.cache.pop(next(iter(self.cache)))
+        self.cache[text] = command
+        return command
+
+    def summary(self) -> str:
+        calls = self.stats['calls']
+        average = self.stats['time'] / calls * 1000 if calls else 0.0
+        return (f"LLM fallback: {calls} calls, {self.stats['accepted']} accepted, {self.stats['rejected']} rejected, "
+                f"{self.stats['timeouts']} timeouts, {self.stats['cache_hits']} cache hits, avg {average:.0f} ms")
@@ -0,0 +1,326 @@
+"""
+VFV log miner
+============================
+
+Streams vfv.log (and its rotated copies vfv.log.1, vfv.log.2, ...) and
+archived session.jsonl files line by line, so logs of any size are mined in
+constant memory, and turns them into candidate corrections:
+
+- misrecognitions: what preprocess_text rewrote, from the raw Whisper text
+  aligned word by word with the normalized text ("sky watch" -> "skywest"),
+  so you can see which word_replacements actually fire
+- unknown words: words of transmissions that produced no command (or only
+  one from the LLM fallback) that never occur in transmissions that parsed,
+  with the closest known word as the candidate replacement
+- fix confusions: spoken fixes matched to a different identifier, and
+  spoken fixes that matched nothing but look like one of the suggestions
+
+Candidates are ranked by count x similarity and written in the formats VFV
+loads, ready to be reviewed and copied over:
+
+    {"word_replacements": [["\\b(?:sky\\s?watch|sky\\s?word)\\b", "skywest"], ...],  -> tables.json
+     "fixes": {"JFK": {"COATE": ["Koat", "Coat"]}},                                -> fixes.json
+     "unresolved_fixes": {"KOWTA": 4}, "stats": {...}}
+
+Logs written before VFV logged the raw and normalized text separately still
+give unknown words and fix confusions. Don't pass an archive session together
+with the log of the same period, or its transmissions are counted twice.
+
+Usage:
+    py -3.12 mine_logs.py [log files / archive folders ...] [--airport JFK] [--min-count 2] [--output mined_rules.json]
+        (default: vfv.log and its rotated copies)
+"""
+import argparse
+import ast
+import difflib
+import glob
+import json
+import os
+import re
+from collections import Counter, OrderedDict
+from typing import Iterator, List, Optional
+
+from vfv_tables import load_tables
+
+OUTPUT_FILE = "mined_rules.json"
+RAW_PAIRS = 64  # Raw texts waiting for their "Transcribed text" line (a batch logs them all first)
+SIMILARITY = 0.75  # Minimum difflib ratio between an unknown word and the candidate replacement
+FIX_SIMILARITY = 0.6
+SHOW = 15
+
+MESSAGE = re.compile(r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d+ - \w+ - (.*)$')
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+class Transmission:
+    """What one transcript went through, as far as the log shows"""
+
+    def __init__(self, text: str, raw: Optional[str] = None, airport: str = 'GENERAL'):
+        self.text = text
+        self.raw = raw
+        self.airport = airport
+        self.command = None
+        self.llm = False
+        self.fix_matches = []  # (spoken, identifier)
+        self.unmatched_fixes = []  # (spoken, [similar identifiers])
+        self.fix_attempt = None
+
+    @property
+    def parsed(self) -> bool:
+        return bool(self.command) and not self.llm
+
+
+def log_files(path: str) -> List[str]:
+    """vfv.log plus its rotated copies, oldest first"""
+    rotated = [name for name in glob.glob(path + '.*') if name.rsplit('.', 1)[1].isdigit()]
+    rotated.sort(key=lambda name: int(name.rsplit('.', 1)[1]), reverse=True)
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+def read_log(path: str, airport: str) -> Iterator[Transmission]:
+    current = None
+    raws = OrderedDict()  # normalized text -> raw text
+    raw = None
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = MESSAGE.match(line.rstrip('\n'))
+            if not match:
+                continue
+            message = match.group(1)
+
+            if message.startswith("Raw Whisper output: '"):
+                raw = message[len("Raw Whisper output: '"):-1]
+            elif message.startswith("Normalized text: '") and raw is not None:
+                raws[message[len("Normalized text: '"):-1]] = raw
+                if len(raws) > RAW_PAIRS:
+                    raws.popitem(last=False)
+                raw = None
+            elif message.startswith("Loading FAA fixes for airport: "):
+                airport = message.split(': ', 1)[1].strip()
+            elif message.startswith("Transcribed text ("):
+                if current:
+                    yield current
+                text = message.split('): ', 1)[1] if '): ' in message else ''
+                current = Transmission(text, raws.pop(text, None), airport)
+            elif current is None:
+                continue
+            elif message.startswith("Attempting to match fix: "):
+                current.fix_attempt = message.split(': ', 1)[1].strip().upper()
+            elif message.startswith("Matched fix '"):
+                fix = re.match(r"Matched fix '(.+)' -> (\w+)", message)
+                if fix:
+                    current.fix_matches.append((fix.group(1).upper(), fix.group(2).upper()))
+                    current.fix_attempt = None
+            elif "No match for '" in message:
+                fix = re.search(r"No match for '(.+)'\. Similar fixes: (\[.*\])", message)
+                if fix:
+                    try:
+                        similar = ast.literal_eval(fix.group(2))
+                    except (ValueError, SyntaxError):
+                        similar = []
+                    current.unmatched_fixes.append((fix.group(1).upper(), similar))
+                    current.fix_attempt = None
+            elif message.startswith("LLM fallback: '"):
+                current.llm = True
+            elif message.startswith("Formatted command: "):
+                current.command = message.split(': ', 1)[1].strip()
+                # An exact lookup of a variant doesn't log a match, only the identifier in the command.
+                # Fix tokens are letters only ("D050" is an altitude); none is new if any is the attempt itself
+                fixes = re.findall(r'\bD([A-Z]{2,5})\b', current.command)
+                if current.fix_attempt and fixes and current.fix_attempt not in fixes:
+                    current.fix_matches.append((current.fix_attempt, fixes[0]))
+                yield current
+                current = None
+    if current:
+        yield current
+
+
+def read_session(path: str, airport: str) -> Iterator[Transmission]:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut off when VFV stopped
+            if not record.get('text'):
+                continue
+            transmission = Transmission(record['text'], record.get('raw'), airport)
+            transmission.command = record.get('command')
+            yield transmission
+
+
+def transmissions(sources: List[str], airport: str) -> Iterator[Transmission]:
+    for source in sources:
+        if os.path.isdir(source):
+            for session in sorted(glob.glob(os.path.join(source, '**', 'session.jsonl'), recursive=True)):
+                yield from read_session(session, airport)
+        elif source.endswith('.jsonl'):
+            yield from read_session(source, airport)
+        else:
+            for path in [source] if source.rsplit('.', 1)[-1].isdigit() else log_files(source):
+                for transmission in read_log(path, airport):
+                    airport = transmission.airport  # The next rotated file continues the same session
+                    yield transmission
+
+
+def words(text: Optional[str]) -> List[str]:
+    return WORD.findall((text or '').lower())
+
+
+class Miner:
+    def __init__(self):
+        self.stats = Counter()
+        self.rewrites = Counter()  # (raw words, normalized words)
+        self.known = Counter()  # Words of transmissions that parsed
+        self.failed = Counter()  # Words and word pairs of transmissions that didn't
+        self.fix_confusions = Counter()  # (airport, identifier, spoken)
+        self.unmatched = Counter()  # (airport, spoken)
+        self.suggestions = {}  # (airport, spoken) -> similar identifiers
+
+    def add(self, transmission: Transmission):
+        self.stats['transmissions'] += 1
+        self.stats['parsed' if transmission.parsed else 'llm' if transmission.command else 'no command'] += 1
+        if transmission.raw is not None:
+            self.stats['with raw text'] += 1
+            self.align(words(transmission.raw), words(transmission.text))
+
+        tokens = words(transmission.text)
+        if transmission.parsed:
+            self.known.update(tokens)
+        else:
+            self.failed.update(tokens)
+            self.failed.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+        for spoken, ident in transmission.fix_matches:
+            if spoken.replace(' ', '') != ident:
+                self.fix_confusions[(transmission.airport, ident, spoken)] += 1
+        for spoken, similar in transmission.unmatched_fixes:
+            self.unmatched[(transmission.airport, spoken)] += 1
+            self.suggestions[(transmission.airport, spoken)] = similar
+
+    def align(self, raw: List[str], normalized: List[str]):
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, raw, normalized, autojunk=False).get_opcodes():
+            if tag != 'equal':
+                self.rewrites[(' '.join(raw[i1:i2]), ' '.join(normalized[j1:j2]))] += 1
+
+    def replacement_candidates(self, vocabulary: Counter, min_count: int) -> List[tuple]:
+        """(count x similarity, unknown word or pair, replacement, count), best first"""
+        known = [word for word, _ in vocabulary.most_common(5000) if len(word) > 2]
+        candidates = []
+        for spoken, count in self.failed.items():
+            if count < min_count or not spoken.replace(' ', '').isalpha() or spoken in vocabulary or any(part in vocabulary for part in spoken.split()[1:2]):
+                continue  # A pair with a known second word is the first word's problem
+            joined = spoken.replace(' ', '')
+            match = difflib.get_close_matches(joined, known, n=1, cutoff=SIMILARITY)
+            if match and match[0] != joined:
+                similarity = difflib.SequenceMatcher(None, joined, match[0]).ratio()
+                candidates.append((count * similarity, spoken, match[0], count))
+        candidates.sort(key=lambda c: -c[0])
+        return candidates
+
+    def fix_candidates(self, fixes: dict, min_count: int) -> List[tuple]:
+        """(score, airport, identifier, spoken, count) for spoken forms fixes.json doesn't list yet"""
+        def listed(airport, ident, spoken):
+            variants = (fixes.get(airport, {}).get(ident) or []) + (fixes.get('GENERAL', {}).get(ident) or [])
+            return spoken in {v.upper() for v in variants}
+
+        candidates = [(count, airport, ident, spoken, count)
+                      for (airport, ident, spoken), count in self.fix_confusions.items()
+                      if count >= min_count and not listed(airport, ident, spoken)]
+        for (airport, spoken), count in self.unmatched.items():
+            if count < min_count:
+                continue
+            similar = [(difflib.SequenceMatcher(None, spoken, ident.upper()).ratio(), ident.upper())
+                       for ident in self.suggestions.get((airport, spoken), [])]
+            if similar:
+                similarity, ident = max(similar)
+                if similarity >= FIX_SIMILARITY and not listed(airport, ident, spoken):
+                    candidates.append((count * similarity, airport, ident, spoken, count))
+        candidates.sort(key=lambda c: -c[0])
+        return candidates
+
+
+def known_vocabulary(miner: Miner, tables) -> Counter:
+    """Words of parsed transmissions plus every word the tables produce or recognise"""
+    vocabulary = Counter(miner.known)
+    for _, replacement in tables.word_replacements + tables.phrase_patterns:
+        vocabulary.update(word for word in words(replacement) if word not in vocabulary)
+    for phrase in tables.protected_phrases:
+        vocabulary.update(word for word in words(phrase) if word not in vocabulary)
+    for airport in (tables.fixes or {}).values():
+        for ident, spoken in airport.items():
+            vocabulary.update(word for word in words(' '.join([ident, *spoken])) if word not in vocabulary)
+    vocabulary.update(word for word in tables.number_vocabulary if ' ' not in word and word not in vocabulary)
+    return vocabulary
+
+
+def replacement_rules(candidates: List[tuple]) -> List[list]:
+    """tables.json word_replacements entries, one per replacement, best replacement first"""
+    grouped = OrderedDict()
+    for _, spoken, replacement, _ in candidates:
+        grouped.setdefault(replacement, []).append(spoken)
+    rules = []
+    for replacement, spellings in grouped.items():
+        alternatives = '|'.join(re.escape(s).replace(' ', r'\s?') for s in spellings)
+        rules.append([rf'\b(?:{alternatives})\b', replacement])
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mine vfv.log and archived sessions for candidate corrections")
+    parser.add_argument('sources', nargs='*', default=['vfv.log'])
+    parser.add_argument('--airport', default='GENERAL', help="Airport of transmissions whose log doesn't say")
+    parser.add_argument('--min-count', type=int, default=2)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    miner = Miner()
+    for transmission in transmissions(args.sources, args.airport.upper()):
+        miner.add(transmission)
+    stats = miner.stats
+    if not stats['transmissions']:
+        print(f"No transmissions found in {', '.join(args.sources)}.")
+        return
+    print(f"{stats['transmissions']} transmissions: {stats['parsed']} parsed, {stats['llm']} by the LLM fallback, "
+          f"{stats['no command']} without a command ({stats['with raw text']} with raw Whisper text)")
+
+    if miner.rewrites:
+        print("\nMost frequent corrections by preprocess_text (raw -> normalized):")
+        for (raw, normalized), count in miner.rewrites.most_common(SHOW):
+            print(f"  {count:6d}  '{raw}' -> '{normalized}'")
+
+    tables = load_tables()
+    words_candidates = miner.replacement_candidates(known_vocabulary(miner, tables), args.min_count)
+    if words_candidates:
+        print("\nUnknown words in transcripts that didn't parse (candidate replacements):")
+        for score, spoken, replacement, count in words_candidates[:SHOW]:
+            print(f"  {count:6d}  '{spoken}' -> '{replacement}' (score {score:.1f})")
+
+    fixes = tables.fixes or {}
+    fix_candidates = miner.fix_candidates(fixes, args.min_count)
+    if fix_candidates:
+        print("\nSpoken fixes to add to fixes.json:")
+        for score, airport, ident, spoken, count in fix_candidates[:SHOW]:
+            print(f"  {count:6d}  {airport} {ident}: '{spoken.title()}' (score {score:.1f})")
+    unresolved = {spoken: count for (_, spoken), count in miner.unmatched.most_common()
+                  if count >= args.min_count and not any(c[3] == spoken for c in fix_candidates)}
+
+    fix_rules = {}
+    for _, airport, ident, spoken, _ in fix_candidates:
+        fix_rules.setdefault(airport, {}).setdefault(ident, []).append(spoken.title())
+    result = {
+        'word_replacements': replacement_rules(words_candidates),
+        'fixes': fix_rules,
+        'unresolved_fixes': unresolved,
+        'misrecognitions': [[raw, normalized, count] for (raw, normalized), count in miner.rewrites.most_common()
+                            if count >= args.min_count],
+        'stats': dict(stats),
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nWrote {len(result['word_replacements'])} replacement and {len(fix_candidates)} fix variant "
+          f"candidates to {args.output}; review them before copying into tables.json / fixes.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+ONNX Runtime backend for VFV
+============================
+
+Runs the Whisper encoder/decoder exported by export_onnx.py on CPU with
+ONNX Runtime instead of PyTorch eager mode. Decoding mirrors
+whisper.decode with temperature 0, without timestamps and with the
+default token suppression, so transcripts match the PyTorch backend.
+"""
+import json
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+import onnxruntime as ort
+from whisper.tokenizer import get_tokenizer
+
+
+class OnnxWhisper:
+    def __init__(self, model_dir: str, int8: bool = False, threads: int = 0):
+        with open(os.path.join(model_dir, 'dims.json'), 'r') as f:
+            meta = json.load(f)
+        self.dims = meta['dims']
+        self.n_mels = self.dims['n_mels']
+        self.n_layer = self.dims['n_text_layer']
+        self.n_state = self.dims['n_text_state']
+        self.n_ctx = self.dims['n_text_ctx']
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        suffix = '.int8.onnx' if int8 else '.onnx'
+        providers = ['CPUExecutionProvider']
+        self.encoder = ort.InferenceSession(os.path.join(model_dir, 'encoder' + suffix), options, providers=providers)
+        self.decoder = ort.InferenceSession(os.path.join(model_dir, 'decoder' + suffix), options, providers=providers)
+
+        self.tokenizer = get_tokenizer(
+            meta['multilingual'],
+            num_languages=meta['num_languages'],
+            language='en',
+            task='transcribe'
+        )
+        self.suppress_tokens = self._get_suppress_tokens()
+        self.blank_tokens = self.tokenizer.encode(" ") + [self.tokenizer.eot]
+
+    def _get_suppress_tokens(self) -> np.ndarray:
+        """Same set whisper uses for suppress_tokens='-1'"""
+        tokenizer = self.tokenizer
+        tokens = list(tokenizer.non_speech_tokens) + [
+            tokenizer.transcribe,
+            tokenizer.translate,
+            tokenizer.sot,
+            tokenizer.sot_prev,
+            tokenizer.sot_lm,
+        ]
+        if tokenizer.no_speech is not None:
+            tokens.append(tokenizer.no_speech)
+        return np.array(sorted(set(tokens)), dtype=np.int64)
+
+    def initial_tokens(self, prompt: Optional[str] = None) -> list:
+        tokens = list(self.tokenizer.sot_sequence_including_notimestamps)
+        if prompt:
+            prompt_tokens = self.tokenizer.encode(" " + prompt.strip())
+            tokens = [self.tokenizer.sot_prev] + prompt_tokens[-(self.n_ctx // 2 - 1):] + tokens
+        return tokens
+
+    def encode(self, mel: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Run the encoder and return the per-layer cross-attention keys and values"""
+        if mel.ndim == 2:
+            mel = mel[None]
+        cross_k, cross_v = self.encoder.run(None, {'mel': mel.astype(np.float32)})
+        return cross_k, cross_v
+
+    def decode(self, mel: np.ndarray, prompt: Optional[str] = None) -> Tuple[str, float, float]:
+        """Greedy-decode one (n_mels, 3000) segment. Returns (text, no_speech_prob, avg_logprob)"""
+        return self.decode_batch(mel[None], prompt)[0]
+
+    def decode_batch(self, mels: np.ndarray, prompt: Optional[str] = None) -> List[Tuple[str, float, float]]:
+        """Greedy-decode a (batch, n_mels, 3000) stack in one encoder pass and a shared decoder loop"""
+        n_batch = mels.shape[0]
+        cross_k, cross_v = self.encode(mels)
+        initial = self.initial_tokens(prompt)
+        sample_begin = len(initial)
+        sot_index = initial.index(self.tokenizer.sot)
+        eot = self.tokenizer.eot
+
+        self_k = np.zeros((self.n_layer, n_batch, 0, self.n_state), dtype=np.float32)
+        self_v = np.zeros_like(self_k)
+        step_tokens = np.array([initial] * n_batch, dtype=np.int64)
+        sampled = [[] for _ in range(n_batch)]
+        finished = np.zeros(n_batch, dtype=bool)
+        sum_logprobs = np.zeros(n_batch)
+        no_speech_probs = [float('nan')] * n_batch
+
+        for i in range(self.n_ctx // 2):
+            logits, self_k, self_v = self.decoder.run(None, {
+                'tokens': step_tokens,
+                'cross_k': cross_k,
+                'cross_v': cross_v,
+                'self_k': self_k,
+                'self_v': self_v,
+            })
+            logits = logits.astype(np.float32)
+
+            if i == 0 and self.tokenizer.no_speech is not None:
+                probs_at_sot = _softmax(logits[:, sot_index])
+                no_speech_probs = probs_at_sot[:, self.tokenizer.no_speech].tolist()
+
+            logits = logits[:, -1]
+            if i == 0:
+                logits[:, self.blank_tokens] = -np.inf
+            logits[:, self.suppress_tokens] = -np.inf
+
+            next_tokens = np.argmax(logits, axis=-1)
+            logprobs = _log_softmax(logits)
+            for row in range(n_batch):
+                if finished[row]:
+                    # Finished rows keep emitting eot, as whisper's GreedyDecoder does
+                    next_tokens[row] = eot
+                    continue
+                sum_logprobs[row] += logprobs[row, next_tokens[row]]
+                if next_tokens[row] == eot:
+                    finished[row] = True
+                else:
+                    sampled[row].append(int(next_tokens[row]))
+
+            if finished.all() or sample_begin + i + 1 > self.n_ctx:
+                break
+            step_tokens = next_tokens[:, None].astype(np.int64)
+
+        return [
+            (self.tokenizer.decode(tokens).strip(), no_speech_prob, logprob / (len(tokens) + 1))
+            for tokens, no_speech_prob, logprob in zip(sampled, no_speech_probs, sum_logprobs)
+        ]
+
+
+def _log_softmax(x: np.ndarray) -> np.ndarray:
+    x = x - np.max(x, axis=-1, keepdims=True)
+    return x - np.log(np.exp(x).sum(axis=-1, keepdims=True))
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    return np.exp(_log_softmax(x))
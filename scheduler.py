@@ -0,0 +1,110 @@
+"""
+VFV scheduling
+============================
+
+Queues that sit between capture (one thread per seat, or one HTTP request
+per client) and the transcription worker.
+
+Items put as an Utterance carry the time the transmission ended and a
+latency budget; one still queued when its budget runs out is discarded
+instead of decoded. Queued items can also be cancelled (a "disregard")
+and in-flight ones dropped by the worker (superseded by a newer command).
+Every discarded item is counted as dropped, expired or cancelled and
+handed to the queue's on_discard callback.
+"""
+from collections import Counter, OrderedDict, deque
+from queue import Empty
+from threading import Condition
+from typing import Callable, List, Optional
+import time
+
+REASONS = ('dropped', 'expired', 'cancelled')
+
+
+class Utterance:
+    """A transmission on its way to the worker, with its deadline"""
+
+    def __init__(self, item, seat: str = 'default', received: Optional[float] = None, budget: Optional[float] = None):
+        self.item = item
+        self.seat = seat
+        self.received = time.time() if received is None else received  # time.time() clock, like PTT events
+        self.deadline = self.received + budget if budget else None
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        return self.deadline is not None and (time.time() if now is None else now) > self.deadline
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.received
+
+
+class FairQueue:
+    """Round-robin queue across seats so one busy seat can't starve the others.
+
+    Same get/get_nowait/qsize interface as queue.Queue; put takes the seat name.
+    """
+
+    def __init__(self, on_discard: Optional[Callable] = None):
+        self.cond = Condition()
+        self.queues = OrderedDict()
+        self.stats = Counter()  # dropped / expired / cancelled
+        self.on_discard = on_discard  # Called with (item, reason) outside the queue lock
+
+    def put(self, item, seat: str = 'default'):
+        with self.cond:
+            self.queues.setdefault(seat, deque()).append(item)
+            self.cond.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.cond:
+                while not any(self.queues.values()):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise Empty
+                    self.cond.wait(remaining)
+                item = self._pop()
+            if isinstance(item, Utterance) and item.expired():
+                # Over budget before it was even decoded; discarded now (outside the lock), not after the next wait
+                self.discard(item, 'expired')
+                continue
+            return item
+
+    def _pop(self):
+        for seat, items in self.queues.items():
+            if items:
+                # Serve this seat, then send it to the back of the line
+                self.queues.move_to_end(seat)
+                return items.popleft()
+
+    def get_nowait(self):
+        return self.get(timeout=0)
+
+    def cancel(self, seat: str, predicate: Callable = lambda item: True, latest_only: bool = False) -> List:
+        """Remove the seat's queued items that match predicate (only the newest with latest_only)"""
+        with self.cond:
+            items = self.queues.get(seat, deque())
+            matching = [item for item in items if predicate(item)]
+            if latest_only:
+                matching = matching[-1:]
+            for item in matching:
+                items.remove(item)
+        for item in matching:
+            self.discard(item, 'cancelled')
+        return matching
+
+    def discard(self, item, reason: str):
+        """Count an item that won't be completed (also for items the worker already took)"""
+        with self.cond:
+            self.stats[reason] += 1
+        if self.on_discard:
+            self.on_discard(item, reason)
+
+    def counts(self) -> dict:
+        with self.cond:
+            return {reason: self.stats[reason] for reason in REASONS}
+
+    def qsize(self) -> int:
+        with self.cond:
+            return sum(len(items) for items in self.queues.values())
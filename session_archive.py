@@ -0,0 +1,187 @@
+"""
+VFV session archive
+============================
+
+Opt-in record of every transmission ([archive] ENABLED): the audio, the raw
+Whisper text, the normalized text and the command sent to VICE. Each launch
+writes one session folder:
+
+    archive/<YYYYMMDD-HHMMSS>/
+        session.jsonl        one line per transmission
+                             {"id", "time", "seat", "audio", "seconds", "raw", "text", "command"}
+        00001_<seat>.flac    16 kHz mono 16-bit audio (.npz when soundfile isn't installed)
+
+The capture and ASR threads only put a reference on a bounded queue; a
+background thread compresses and writes. When the writer falls behind the
+transmission is dropped (and counted) rather than making anyone wait. The
+oldest sessions are deleted once the archive grows past [archive] MAX_MB.
+
+Export a session into replay/ (wav plus <name>.json with the command as the
+expected label) for autotune.py and batch_eval.py:
+
+Usage:
+    py -3.12 session_archive.py export <session folder> [replay folder]
+    py -3.12 session_archive.py list
+"""
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+import wave
+from queue import Full, Queue
+from threading import Thread
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = "archive"
+SAMPLE_RATE = 16000
+PRUNE_EVERY = 50  # Check the archive size every N writes
+
+
+def folder_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class SessionArchive:
+    def __init__(self, root: str = ARCHIVE_DIR, audio_format: str = 'flac', max_mb: float = 2000,
+                 queue_size: int = 64):
+        self.root = root
+        self.audio_format = audio_format if audio_format == 'npz' or soundfile else 'npz'
+        if audio_format != self.audio_format:
+            logger.warning("soundfile is not installed, archiving audio as .npz instead of FLAC")
+        self.max_bytes = max_mb * 1024 * 1024
+        name = time.strftime('%Y%m%d-%H%M%S')
+        self.path = os.path.join(root, name)
+        suffix = 1
+        while os.path.exists(self.path):
+            suffix += 1
+            self.path = os.path.join(root, f"{name}-{suffix}")
+        os.makedirs(self.path)
+        self.queue = Queue(maxsize=queue_size)
+        self.count = 0
+        self.dropped = 0
+        self.prune()
+        self.writer = Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+        logger.info(f"Archiving transmissions to {self.path} ({self.audio_format})")
+
+    def submit(self, seat: str, frames: List[bytes], raw: Optional[str], text: Optional[str],
+               command: Optional[str]):
+        """Queue one transmission; never blocks"""
+        try:
+            self.queue.put_nowait((time.time(), seat, frames, raw, text, command))
+        except Full:
+            self.dropped += 1
+            logger.warning(f"Archive writer behind, dropped a transmission ({self.dropped} so far)")
+
+    def write_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            try:
+                self.write(*item)
+            except Exception as e:
+                logger.error(f"Error archiving transmission: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    def write(self, timestamp: float, seat: str, frames: List[bytes], raw: Optional[str], text: Optional[str],
+              command: Optional[str]):
+        self.count += 1
+        samples = np.frombuffer(b''.join(frames), dtype=np.int16)
+        name = f"{self.count:05d}_{''.join(c if c.isalnum() else '-' for c in seat)}.{self.audio_format}"
+        audio_path = os.path.join(self.path, name)
+        if self.audio_format == 'flac':
+            soundfile.write(audio_path, samples, SAMPLE_RATE, format='FLAC', subtype='PCM_16')
+        else:
+            np.savez_compressed(audio_path, samples=samples, rate=SAMPLE_RATE)
+        record = {'id': self.count, 'time': timestamp, 'seat': seat, 'audio': name,
+                  'seconds': round(len(samples) / SAMPLE_RATE, 2), 'raw': raw, 'text': text, 'command': command}
+        with open(os.path.join(self.path, 'session.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+        if self.count % PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        """Delete the oldest sessions (never the current one) while the archive is over MAX_MB"""
+        sessions = sorted(s for s in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, s)))
+        sizes = {s: folder_size(os.path.join(self.root, s)) for s in sessions}
+        total = sum(sizes.values())
+        for session in sessions:
+            if total <= self.max_bytes or os.path.join(self.root, session) == self.path:
+                break
+            shutil.rmtree(os.path.join(self.root, session), ignore_errors=True)
+            total -= sizes[session]
+            logger.info(f"Archive over {self.max_bytes / 1024 / 1024:.0f} MB, removed session {session}")
+
+    def close(self, timeout: float = 5.0):
+        """Write what is still queued (called at exit)"""
+        self.queue.put(None)
+        self.writer.join(timeout)
+        logger.info(f"Archived {self.count} transmissions, dropped {self.dropped}")
+
+
+def read_audio(path: str) -> np.ndarray:
+    """int16 samples of an archived transmission"""
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return data['samples']
+    return soundfile.read(path, dtype='int16')[0]
+
+
+def export(session: str, replay: str = "replay") -> int:
+    """Write a session's transmissions as replay/ wavs with their commands as expected labels"""
+    os.makedirs(replay, exist_ok=True)
+    prefix = os.path.basename(os.path.normpath(session))
+    count = 0
+    with open(os.path.join(session, 'session.jsonl'), 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            stem = os.path.join(replay, f"{prefix}_{os.path.splitext(record['audio'])[0]}")
+            with wave.open(stem + '.wav', 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(SAMPLE_RATE)
+                wf.writeframes(read_audio(os.path.join(session, record['audio'])).tobytes())
+            with open(stem + '.json', 'w', encoding='utf-8') as label:
+                json.dump({'expected': record['command'], 'transcript': record['text'], 'raw': record['raw']}, label)
+            count += 1
+    return count
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == 'export':
+        replay = sys.argv[3] if len(sys.argv) > 3 else "replay"
+        count = export(sys.argv[2], replay)
+        print(f"Exported {count} transmissions to {replay} (check the expected commands in the .json labels)")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'list':
+        for session in sorted(os.listdir(ARCHIVE_DIR)) if os.path.isdir(ARCHIVE_DIR) else []:
+            path = os.path.join(ARCHIVE_DIR, session)
+            records = os.path.join(path, 'session.jsonl')
+            count = sum(1 for _ in open(records, encoding='utf-8')) if os.path.exists(records) else 0
+            print(f"{path}: {count} transmissions, {folder_size(path) / 1024 / 1024:.1f} MB")
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+VFV spoken numbers
+============================
+
+One left-to-right pass over a transcript that writes ATC number phraseology
+as digits and returns typed values with their spans:
+
+    "descend and maintain one one thousand"  -> altitude 11000
+    "climb and maintain flight level two four zero" -> flight_level 240
+    "turn left heading three six zero"       -> heading 360
+    "reduce speed to two one zero"           -> speed 210
+    "squawk four two one seven"              -> squawk 4217
+
+The vocabulary is the number entries of tables.json. Unlike those entries
+applied as plain replacements, words that are also ordinary English ("to",
+"for", "won", "ate", ...) only become digits inside a number, before
+"thousand"/"hundred", or right after a keyword that is always followed by a
+number - so "cleared to land" and "contact tower" are left alone.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Number spellings that are also ordinary words
+ORDINARY_WORDS = {'hero', 'won', 'wan', 'too', 'to', 'true', 'threw', 'free', 'through', 'for', 'fore',
+                  'sicks', 'sex', 'sax', 'ate', 'tin'}
+# Never start a number: "descend to", "reduce speed to", "for traffic"
+PREPOSITIONS = {'to', 'too', 'for', 'fore'}
+SCALES = {'thousand': 1000, 'hundred': 100}
+
+# Keyword -> kind of the number that follows it
+TRIGGERS = {
+    'heading': 'heading', 'squawk': 'squawk', 'speed': 'speed', 'runway': 'runway',
+    'maintain': 'altitude', 'descend': 'altitude', 'climb': 'altitude', 'altitude': 'altitude',
+}
+# Kinds always spoken digit by digit with this many digits
+DIGIT_COUNTS = {'heading': 3, 'squawk': 4, 'flight_level': 3}
+# Words that may stand between a keyword and its number
+FILLERS = {'and', 'to', 'at', 'turn', 'left', 'right', 'fly', 'reduce', 'increase', 'maintain', 'of', 'flight'}
+
+WORD = re.compile(r'\d[\d,]*\d|\w+')
+
+
+class NumberValue(NamedTuple):
+    kind: str  # altitude, flight_level, heading, speed, squawk, runway or number
+    value: int  # Feet for altitude, hundreds of feet for flight_level
+    digits: str  # As written into the text, keeping leading zeros (heading 090, squawk 0457)
+    start: int  # Span of the spoken number in the input text
+    end: int
+
+
+class ParseResult(NamedTuple):
+    text: str
+    values: List[NumberValue]
+
+    def first(self, *kinds: str) -> Optional[NumberValue]:
+        return next((value for value in self.values if value.kind in kinds), None)
+
+
+class NumberParser:
+    def __init__(self, vocabulary: Dict[str, str]):
+        """vocabulary maps spoken spellings ("niner", "for ty") to digits ("9", "40")"""
+        self.words = {}  # single word -> digits
+        self.phrases = {}  # (word, word) -> digits, e.g. Whisper's "ze ro"
+        self.phrase_starts = set()
+        for spoken, digits in vocabulary.items():
+            parts = tuple(spoken.lower().split())
+            if len(parts) == 1:
+                self.words[parts[0]] = digits
+            elif len(parts) == 2:
+                self.phrases[parts] = digits
+                self.phrase_starts.add(parts[0])
+
+    def tokens(self, text: str) -> List[Tuple[str, int, int, Optional[str]]]:
+        """(word, start, end, digits or None) with two-word spellings joined"""
+        matches = list(WORD.finditer(text))
+        tokens = []
+        i = 0
+        while i < len(matches):
+            match = matches[i]
+            word = match.group()
+            if word in self.phrase_starts and i + 1 < len(matches):
+                pair = (word, matches[i + 1].group())
+                if pair in self.phrases:
+                    tokens.append((' '.join(pair), match.start(), matches[i + 1].end(), self.phrases[pair]))
+                    i += 2
+                    continue
+            digits = word.replace(',', '')
+            if not digits.isdecimal():
+                digits = self.words.get(word)
+            tokens.append((word, match.start(), match.end(), digits))
+            i += 1
+        return tokens
+
+    def parse(self, text: str) -> ParseResult:
+        """Digits written into the (lowercase) text, plus every number found in it"""
+        tokens = self.tokens(text)
+        values = []
+        pieces = []
+        last = 0
+        kind = None  # Kind announced by the most recent keyword, until a word that isn't a filler
+        i = 0
+        while i < len(tokens):
+            word, _, _, digits = tokens[i]
+            if digits is None or not self.starts_number(tokens, i, kind):
+                if word in TRIGGERS:
+                    kind = TRIGGERS[word]
+                elif word == 'level' and i and tokens[i - 1][0] == 'flight':
+                    kind = 'flight_level'
+                elif word not in FILLERS:
+                    kind = None
+                i += 1
+                continue
+
+            end = self.number_end(tokens, i, kind)
+            number_kind = kind or 'number'
+            if end < len(tokens) and tokens[end][0] in ('knots', 'knot'):
+                number_kind = 'speed'
+            value, written, scaled = self.evaluate(tokens[i:end])
+            values.append(NumberValue(number_kind, value, written, tokens[i][1], tokens[end - 1][2]))
+            if end - i > 1 or tokens[i][0] != written:
+                pieces.append(text[last:tokens[i][1]])
+                # "11 thousand" keeps the form extract_altitude and the callsign checks know
+                pieces.append(f"{value // 1000} thousand" if scaled and value % 1000 == 0 else written)
+                last = tokens[end - 1][2]
+            kind = None
+            i = end
+        pieces.append(text[last:])
+        return ParseResult(''.join(pieces), values)
+
+    def starts_number(self, tokens: list, i: int, kind: Optional[str]) -> bool:
+        word = tokens[i][0]
+        if word not in ORDINARY_WORDS:
+            return True
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+        if following and following[0] in SCALES:
+            return True
+        if kind in DIGIT_COUNTS:
+            return True  # "heading to seven zero", "squawk for two one seven"
+        return bool(following and following[3] is not None and word not in PREPOSITIONS)
+
+    def number_end(self, tokens: list, start: int, kind: Optional[str]) -> int:
+        """Index after the last token of the number starting at start"""
+        expected = DIGIT_COUNTS.get(kind, 0)
+        count = 0
+        i = start
+        while i < len(tokens):
+            word, _, _, digits = tokens[i]
+            if word in SCALES:
+                if i == start:
+                    break
+            elif digits is None:
+                break
+            elif i > start and word in ORDINARY_WORDS:
+                # "5000 for traffic": an ordinary word only continues a number that isn't finished yet
+                following = tokens[i + 1] if i + 1 < len(tokens) else None
+                if not (count < expected or (following and (following[3] is not None or following[0] in SCALES))):
+                    break
+            if digits is not None:
+                count += len(digits)
+            i += 1
+        return i
+
+    @staticmethod
+    def evaluate(tokens: list) -> Tuple[int, str, bool]:
+        """(value, digits, whether "thousand"/"hundred" was spoken) for the tokens of one number"""
+        total = 0
+        digits = ''
+        tens = False  # Last token was "twenty".."ninety", so a following digit fills its zero
+        scaled = False
+        for word, _, _, piece in tokens:
+            if word in SCALES:
+                total += int(digits or '1') * SCALES[word]
+                digits = ''
+                tens = False
+                scaled = True
+                continue
+            if tens and len(piece) == 1 and piece != '0':
+                digits = digits[:-1] + piece
+            else:
+                digits += piece
+            tens = not word[0].isdigit() and len(piece) == 2 and piece.endswith('0') and piece != '10'
+        if scaled:
+            total += int(digits or '0')
+            return total, str(total), True
+        return int(digits or '0'), digits, False
@@ -0,0 +1,211 @@
+"""
+VFV synthetic transcripts
+============================
+
+Builds labelled corpora of noisy, Whisper-like transcripts so the text side
+of VFV can be tested and benchmarked without audio. Every line of the output
+is one transmission with the VICE command it should produce:
+
+    {"text": "Sky west four five two, descend and maintain 11,000.", "expected": ";452 D110",
+     "kinds": ["altitude"], "airport": "JFK"}
+
+The pieces come from the repo's own data:
+- airlines VFV recognises in callsigns, plus GA N-numbers in the ICAO alphabet
+- fixes of the airport and their spoken variations from fixes.json
+- ILS, RNAV and visual approaches, altitudes, headings, speeds and squawks,
+  written as digits or spoken as words
+- misrecognitions: the alternatives of tables.json word_replacements entries
+  ("sky watch" for skywest, "niner"/"nyne" for 9, "decent" for descend), put
+  back in place of the word they correct
+
+Usage:
+    py -3.12 synth_transcripts.py [count] [airport] [output]   (defaults: 10000 JFK synthetic.jsonl)
+"""
+import json
+import random
+import re
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from vfv_tables import load_tables
+
+# Airlines extract_callsign recognises (spoken name as Whisper writes it)
+AIRLINES = ['Skywest', 'Westjet', 'American', 'Delta', 'United', 'Southwest', 'Jetblue', 'Envoy']
+ICAO_LETTERS = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel', 'india', 'juliet',
+                'kilo', 'lima', 'mike', 'november', 'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango',
+                'uniform', 'victor', 'whiskey', 'xray', 'yankee', 'zulu']
+DIGIT_WORDS = ['zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'niner']
+APPROACHES = {'ILS': 'I', 'RNAV': 'R', 'visual': 'V'}
+SIDES = {'left': 'L', 'right': 'R', 'center': 'C'}
+# parse_command emits commands in this order
+ORDER = ['altitude', 'heading', 'speed', 'contact', 'approach', 'direct', 'intercept', 'ident', 'squawk']
+
+GA_SHARE = 0.15  # Transmissions to N-number callsigns
+SPOKEN_NUMBER_SHARE = 0.5  # Numbers spoken as words rather than written as digits
+NOISE_RATE = 0.15  # Chance each correctable word is replaced by a misrecognition
+
+
+def misrecognitions(word_replacements: List[tuple]) -> Dict[str, List[str]]:
+    """correct word -> misheard spellings, from the plain-word entries of word_replacements"""
+    variants = defaultdict(list)
+    for pattern, replacement in word_replacements:
+        text = pattern.pattern.replace(r'\b', '')
+        group = re.fullmatch(r'\(\?:(.*)\)', text)
+        for spelling in (group.group(1).split('|') if group else [text]):
+            spelling = re.sub(r'\\s[?*+]', ' ', spelling)
+            # Regexes, the mangled-number forms ("i10t") and removals ("radar contact" -> "") aren't usable
+            if (not replacement or re.search(r'[\\\[\](){}.*+?^$|\d]', spelling)
+                    or spelling != spelling.strip() or spelling == replacement):
+                continue
+            variants[replacement].append(spelling)
+    return dict(variants)
+
+
+class TranscriptGenerator:
+    def __init__(self, airport: str, seed: int = 0, noise_rate: float = NOISE_RATE):
+        self.rng = random.Random(seed)
+        self.airport = airport
+        self.noise_rate = noise_rate
+        tables = load_tables()
+        fixes = dict((tables.fixes or {}).get('GENERAL', {}))
+        fixes.update((tables.fixes or {}).get(airport, {}))
+        self.fixes = sorted(fixes.items())  # [(written, [spoken variations])]
+        self.misheard = misrecognitions(tables.word_replacements)
+        # Longest phrases first so "climb and maintain" wins over "maintain"
+        self.noisy_words = sorted((w for w in self.misheard if not w.isdigit() and len(w) > 1),
+                                  key=lambda w: -len(w))
+        self.noise_pattern = re.compile(r'\b(' + '|'.join(map(re.escape, self.noisy_words)) + r')\b')
+
+    def say_digits(self, digits: str) -> str:
+        """Digit-by-digit ATC phraseology, sometimes with a misheard digit"""
+        words = []
+        for digit in digits:
+            word = DIGIT_WORDS[int(digit)]
+            if self.rng.random() < self.noise_rate:
+                word = self.rng.choice(self.misheard.get(digit, [word]))
+            words.append(word)
+        return ' '.join(words)
+
+    def number(self, digits: str) -> str:
+        return self.say_digits(digits) if self.rng.random() < SPOKEN_NUMBER_SHARE else digits
+
+    def callsign(self):
+        """(spoken callsign, VICE callsign)"""
+        if self.rng.random() < GA_SHARE:
+            digits = str(self.rng.randint(1, 999))
+            letters = ''.join(self.rng.choice('ABCDEFGHJKLMPRSTUVWXYZ') for _ in range(self.rng.randint(0, 2)))
+            if self.rng.random() < SPOKEN_NUMBER_SHARE:
+                spoken = ' '.join(['november', self.say_digits(digits)] +
+                                  [ICAO_LETTERS[ord(c) - ord('A')] for c in letters])
+            else:
+                spoken = f"N{digits}{letters}"
+            return spoken, f"N{digits}{letters}"
+        flight = str(self.rng.randint(10, 9999))
+        return f"{self.rng.choice(AIRLINES)} {self.number(flight)}", flight
+
+    def altitude(self):
+        if self.rng.random() < 0.2:
+            level = self.rng.randrange(180, 410, 10)
+            phrase, value = f"flight level {self.say_digits(str(level))}", level
+        else:
+            thousands = self.rng.randint(2, 17)
+            if self.rng.random() < SPOKEN_NUMBER_SHARE:
+                phrase = f"{self.say_digits(str(thousands))} thousand"
+            else:
+                phrase = f"{thousands * 1000:,}"
+            value = thousands * 10
+        verb = self.rng.choice(['descend', 'climb'])
+        return f"{verb} and maintain {phrase}", f"{verb[0].upper()}{value:03d}"
+
+    def heading(self):
+        heading = self.rng.randrange(10, 370, 10) if self.rng.random() < 0.8 else self.rng.randint(1, 360)
+        turn = self.rng.choice(['left', 'right', None])
+        prefix = f"turn {turn} heading" if turn else "fly heading"
+        return f"{prefix} {self.number(f'{heading:03d}')}", f"{turn[0] if turn else 'H'}{heading:03d}"
+
+    def speed(self):
+        speed = self.rng.randrange(160, 290, 10)
+        phrase = self.rng.choice(['reduce speed to {} knots', 'increase speed to {} knots', 'maintain {} knots'])
+        return phrase.format(self.number(str(speed))), f"S{speed}"
+
+    def contact(self):
+        if self.rng.random() < 0.6:
+            return "contact tower", "TO"
+        return f"contact {self.rng.choice(['approach', 'departure', 'center'])}", "FC"
+
+    def approach(self):
+        name, prefix = self.rng.choice(list(APPROACHES.items()))
+        number = str(self.rng.randint(1, 36))
+        side = self.rng.choice([None, *SIDES])
+        spoken_side = f" {side}" if side else ''
+        verb = self.rng.choice(['expect', 'cleared'])
+        runway = f"{number[-1]}{SIDES[side]}" if side else number  # parse_command keeps one digit with a side
+        return f"{verb} {name} runway {self.number(number)}{spoken_side}", f"{verb[0].upper()}{prefix}{runway}"
+
+    def direct(self):
+        if not self.fixes:
+            return None
+        written, spoken = self.rng.choice(self.fixes)
+        name = self.rng.choice(spoken) if spoken else written
+        return f"{self.rng.choice(['cleared', 'proceed'])} direct {name}", f"D{written.upper()}"
+
+    def squawk(self):
+        code = ''.join(self.rng.choice('01234567') for _ in range(4))
+        return f"squawk {self.number(code)}", f"SQ{code}"
+
+    def add_noise(self, text: str) -> str:
+        def replace(match):
+            if self.rng.random() < self.noise_rate:
+                return self.rng.choice(self.misheard[match.group(1)])
+            return match.group(1)
+        return self.noise_pattern.sub(replace, text)
+
+    def transmission(self) -> Optional[dict]:
+        kinds = self.rng.sample(ORDER[:6], self.rng.choice([1, 1, 1, 2, 2, 3]))
+        extras = {'intercept': ("intercept localizer", "I"), 'ident': ("ident", "ID")}
+        if self.rng.random() < 0.1:
+            kinds.append(self.rng.choice(list(extras)))
+        if self.rng.random() < 0.1:
+            kinds.append('squawk')
+
+        spoken_callsign, callsign = self.callsign()
+        parts = {}
+        for kind in kinds:
+            part = extras[kind] if kind in extras else getattr(self, kind)()
+            if part:
+                parts[kind] = part
+        if not parts:
+            return None
+
+        # The direct fix swallows the rest of the transmission, so it goes last like controllers say it
+        spoken_order = sorted(parts, key=lambda kind: kind == 'direct')
+        text = f"{spoken_callsign}, " + ", ".join(parts[kind][0] for kind in spoken_order)
+        text = self.add_noise(text.lower())
+        text = text[0].upper() + text[1:] + "."
+        expected = f";{callsign} " + " ".join(parts[kind][1] for kind in ORDER if kind in parts)
+        return {'text': text, 'expected': expected, 'kinds': [k for k in ORDER if k in parts],
+                'airport': self.airport}
+
+    def generate(self, count: int) -> List[dict]:
+        corpus = []
+        while len(corpus) < count:
+            item = self.transmission()
+            if item:
+                corpus.append(item)
+        return corpus
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    airport = sys.argv[2].upper() if len(sys.argv) > 2 else 'JFK'
+    output = sys.argv[3] if len(sys.argv) > 3 else 'synthetic.jsonl'
+    corpus = TranscriptGenerator(airport).generate(count)
+    with open(output, 'w', encoding='utf-8') as f:
+        for item in corpus:
+            f.write(json.dumps(item) + '\n')
+    print(f"Wrote {len(corpus)} transcripts for {airport} to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import threading
+import time
+
+from scheduler import FairQueue, Utterance
+
+
+def test_expired_item_in_empty_queue_is_discarded_right_away():
+    discarded = threading.Event()
+    reasons = []
+
+    def on_discard(item, reason):
+        reasons.append(reason)
+        discarded.set()
+
+    queue = FairQueue(on_discard=on_discard)
+    queue.put(Utterance('stale', 'A', received=time.time() - 10, budget=1), 'A')
+    worker = threading.Thread(target=queue.get, daemon=True)  # Blocks with no timeout once the queue is empty
+    worker.start()
+
+    assert discarded.wait(1.0)
+    assert reasons == ['expired']
+    assert queue.counts()['expired'] == 1
+    assert worker.is_alive()
+
+    queue.put('next', 'A')
+    worker.join(1.0)
+    assert not worker.is_alive()
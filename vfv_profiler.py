@@ -0,0 +1,153 @@
+"""
+VFV on-demand profiler
+============================
+
+Profiles the next N transmissions of a running VFV (or VFV server) without
+a restart: press [profiling] HOTKEY, or create the [profiling] CONTROL_FILE
+next to VFV.py (optionally containing the number of transmissions):
+
+    echo 10 > profile.request
+
+The processing thread runs cProfile and tracemalloc across transcription
+(transcribe_audio / the batched decode) and format_command for those
+transmissions, then writes to [profiling] DIR:
+
+    <YYYYMMDD-HHMMSS>.pstats      python -m pstats, snakeviz
+    <YYYYMMDD-HHMMSS>.collapsed   folded stacks for flamegraph.pl, speedscope, inferno
+    <YYYYMMDD-HHMMSS>.memory.txt  peak traced memory and the top allocation sites
+
+and turns both off again. While nothing is requested the only cost is one
+check for the control file per batch.
+"""
+import cProfile
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+console = logging.getLogger('vfv.console')  # Echoed to the terminal by VFV's log listener
+
+PROFILE_DIR = "profiles"
+CONTROL_FILE = "profile.request"
+TOP_ALLOCATIONS = 25
+MIN_SECONDS = 1e-6  # Shorter stacks are left out of the .collapsed file
+
+
+def frame_name(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == '~':
+        return name  # Built-ins: "<built-in method time.sleep>"
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, int]:
+    """Folded "caller;callee;... microseconds" stacks from cProfile's caller graph.
+
+    cProfile only keeps caller -> callee edges, so a function's own time is
+    split across the stacks it was reached by in proportion to each edge's
+    cumulative time.
+    """
+    table = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in table.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in table.items() if not entry[4]]
+    stacks = {}
+
+    def walk(func, path: List[str], scale: float, seen: frozenset):
+        own = table[func][2]
+        path = path + [frame_name(func)]
+        key = ';'.join(path)
+        stacks[key] = stacks.get(key, 0) + own * scale
+        for callee, edge_total in callees.get(func, []):
+            # Recursion is folded into the first frame; paths under a microsecond are dropped
+            if callee in seen or not table[callee][3] or scale * edge_total < MIN_SECONDS:
+                continue
+            walk(callee, path, scale * edge_total / table[callee][3], seen | {callee})
+
+    for root in roots:
+        walk(root, [], 1.0, frozenset([root]))
+    return {stack: round(seconds * 1e6) for stack, seconds in stacks.items() if seconds >= MIN_SECONDS}
+
+
+class UtteranceProfiler:
+    def __init__(self, directory: str = PROFILE_DIR, control_file: str = CONTROL_FILE, utterances: int = 5):
+        self.directory = directory
+        self.control_file = control_file
+        self.utterances = utterances
+        self.requested = 0  # Set from the hotkey thread, picked up by the processing thread
+        self.remaining = 0
+        self.profile = None
+        self.start_snapshot = None
+        self.lock = threading.Lock()
+
+    def request(self, count: int = 0):
+        """Profile the next count transmissions (default [profiling] UTTERANCES)"""
+        with self.lock:
+            self.requested = count or self.utterances
+        console.info(f"Profiling requested for the next {self.requested} transmission(s)")
+
+    def check_control_file(self):
+        if not os.path.exists(self.control_file):
+            return
+        try:
+            with open(self.control_file, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+            os.remove(self.control_file)
+        except OSError as e:
+            logger.error(f"Couldn't read {self.control_file}: {str(e)}")
+            return
+        self.request(int(content) if content.isdigit() else 0)
+
+    def begin(self) -> bool:
+        """Called by the processing thread before each batch; True while profiling"""
+        if self.profile is None:
+            self.check_control_file()
+            if not self.requested:
+                return False
+            with self.lock:
+                self.remaining, self.requested = self.requested, 0
+            tracemalloc.start()
+            self.start_snapshot = tracemalloc.take_snapshot()
+            self.profile = cProfile.Profile()
+            logger.info(f"Profiling the next {self.remaining} transmission(s)")
+        self.profile.enable()
+        return True
+
+    def end(self, transmissions: int):
+        """Called after the batch begin() returned True for"""
+        self.profile.disable()
+        self.remaining -= transmissions
+        if self.remaining <= 0:
+            self.finish()
+
+    def finish(self):
+        profile, self.profile = self.profile, None
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stem = os.path.join(self.directory, time.strftime('%Y%m%d-%H%M%S'))
+            profile.dump_stats(stem + '.pstats')
+            stats = pstats.Stats(profile)
+            with open(stem + '.collapsed', 'w', encoding='utf-8') as f:
+                for stack, microseconds in sorted(collapsed_stacks(stats).items()):
+                    f.write(f"{stack} {microseconds}\n")
+            with open(stem + '.memory.txt', 'w', encoding='utf-8') as f:
+                f.write(f"Traced memory: {current / 1024 / 1024:.1f} MB at the end, "
+                        f"{peak / 1024 / 1024:.1f} MB peak\n\n")
+                f.write("Allocations still held, by growth since profiling started:\n")
+                for stat in snapshot.compare_to(self.start_snapshot, 'lineno')[:TOP_ALLOCATIONS]:
+                    f.write(f"{stat}\n")
+            console.info(f"Profile written to {stem}.pstats / .collapsed / .memory.txt "
+                         f"({stats.total_tt:.3f}s profiled, {peak / 1024 / 1024:.1f} MB peak)")
+        except Exception as e:
+            logger.error(f"Error writing profile: {str(e)}")
+        finally:
+            self.start_snapshot = None
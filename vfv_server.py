@@ -0,0 +1,206 @@
+"""
+VFV server mode
+============================
+
+One resident VoiceATC (model, fixes, parser) serving many controller seats
+over a local HTTP API:
+
+    POST /transcribe?seat=<name>   body: raw PCM in the FASTER_AUDIO_SETTINGS
+                                   format (16 kHz mono 16-bit), optionally sent
+                                   with chunked transfer encoding while the PTT
+                                   key is still held
+                                   -> {"text": ..., "command": ...}
+    GET  /health                   -> {"status": "ok", "pending": <queued jobs>}
+
+Clients (py VFV.py --client) record locally, stream the audio here and type
+the returned command into their own VICE window.
+"""
+import http.client
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue
+
+from scheduler import FairQueue
+from threading import Event, Thread
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = 2048  # 1024 16-bit samples, the same chunking record_audio uses
+
+
+class TranscriptionJob:
+    def __init__(self, seat: str, frames: list, mel: Optional[tuple]):
+        self.seat = seat
+        self.frames = frames
+        self.mel = mel
+        self.received = time.perf_counter()
+        self.done = Event()
+        self.result = {'text': None, 'command': None}
+
+
+class TranscriptionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, controller):
+        super().__init__(address, RequestHandler)
+        self.controller = controller
+        self.jobs = FairQueue()
+        self.worker = Thread(target=self.process_jobs, daemon=True)
+        self.worker.start()
+
+    def process_jobs(self):
+        """Single model worker; pending transmissions from all seats are decoded as micro-batches"""
+        while True:
+            batch = self.controller.collect_batch(self.jobs)
+            profiling = self.controller.profiler.begin()
+            logger.info(f"Processing {len(batch)} queued transmission(s)")
+            try:
+                texts = self.controller.transcribe_batch([(job.frames, job.mel) for job in batch])
+                raw_texts = self.controller.last_raw_texts
+            except Exception as e:
+                logger.error(f"Error transcribing batch: {str(e)}")
+                texts = raw_texts = [None] * len(batch)
+            for job, text, raw in zip(batch, texts, raw_texts):
+                try:
+                    job.result['text'] = text
+                    if text:
+                        job.result['command'] = self.controller.format_command(text)
+                except Exception as e:
+                    logger.error(f"Error processing transmission from seat {job.seat}: {str(e)}")
+                finally:
+                    job.result['latency'] = time.perf_counter() - job.received
+                    job.done.set()
+                self.controller.archive_transmission(job.seat, job.frames, raw, text, job.result['command'])
+            if profiling:
+                self.controller.profiler.end(len(batch))
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        logger.info(f"{self.client_address[0]} - {format % args}")
+
+    def send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def iter_body(self):
+        """Yield the request body as it arrives (chunked or Content-Length)"""
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    # Skip trailers up to the terminating blank line
+                    while self.rfile.readline().strip():
+                        pass
+                    return
+                data = self.rfile.read(size)
+                self.rfile.readline()
+                yield data
+        else:
+            remaining = int(self.headers.get('Content-Length', 0))
+            while remaining > 0:
+                data = self.rfile.read(min(remaining, 65536))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self.send_json(200, {'status': 'ok', 'pending': self.server.jobs.qsize()})
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/transcribe':
+            self.send_json(404, {'error': 'not found'})
+            return
+        seat = parse_qs(url.query).get('seat', ['default'])[0]
+
+        # Build features while the client is still streaming
+        features = self.server.controller.create_features()
+        frames = []
+        pending = b''
+        for data in self.iter_body():
+            pending += data
+            while len(pending) >= CHUNK_BYTES:
+                chunk, pending = pending[:CHUNK_BYTES], pending[CHUNK_BYTES:]
+                frames.append(chunk)
+                if features:
+                    features.add_chunk(chunk)
+        if len(pending) >= 2:
+            chunk = pending[:len(pending) - len(pending) % 2]
+            frames.append(chunk)
+            if features:
+                features.add_chunk(chunk)
+
+        mel = None
+        if features and features.duration < 30:
+            mel = (features.finalize(), features.mean_amplitude)
+
+        job = TranscriptionJob(seat, frames, mel)
+        self.server.jobs.put(job, seat)
+        job.done.wait()
+        self.send_json(200, job.result)
+
+
+def serve(controller, host: str = '127.0.0.1', port: int = 8765):
+    server = TranscriptionServer((host, port), controller)
+    print(f"VFV server listening on http://{host}:{port}")
+    logger.info(f"VFV server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down server...")
+    finally:
+        server.server_close()
+
+
+class StreamingUpload:
+    """Client side: streams PTT audio to the server while recording and collects the reply"""
+
+    def __init__(self, url: str, seat: str = 'default'):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.path = f"/transcribe?seat={seat}"
+        self.chunks = Queue()
+        self.response = None
+        self.thread = Thread(target=self._upload, daemon=True)
+        self.thread.start()
+
+    def _body(self):
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    def _upload(self):
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            conn.request('POST', self.path, body=self._body(),
+                         headers={'Content-Type': 'application/octet-stream'}, encode_chunked=True)
+            self.response = json.loads(conn.getresponse().read().decode('utf-8'))
+            conn.close()
+        except Exception as e:
+            logger.error(f"Upload to VFV server failed: {str(e)}")
+            self.response = {'text': None, 'command': None, 'error': str(e)}
+
+    def send(self, chunk: bytes):
+        self.chunks.put(chunk)
+
+    def finish(self) -> dict:
+        """Close the audio stream and wait for the transcript/command"""
+        self.chunks.put(None)
+        self.thread.join()
+        return self.response
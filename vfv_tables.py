@@ -0,0 +1,153 @@
+"""
+VFV text tables
+============================
+
+The transcript correction tables (tables.json), the FAA fixes (fixes.json)
+and their generated spoken variants (fix_variants.json) are parsed once and
+stored in tables.cache together with a hash of those files. Later launches
+load the cache directly; editing any of them (or bumping TABLES_VERSION)
+triggers an automatic rebuild.
+
+Usage:
+    py -3.12 vfv_tables.py     (rebuild tables.cache now)
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+TABLES_FILE = "tables.json"
+FIXES_FILE = "fixes.json"
+VARIANTS_FILE = "fix_variants.json"
+TABLES_CACHE = "tables.cache"
+TABLES_VERSION = 2  # Bump when the cached layout below changes
+# word_replacements entries that spell a number ("niner" -> "9", "for ty" -> "40")
+NUMBER_ENTRY = re.compile(r'^(?=.*[a-z])[a-z0-9 ]+$')
+
+
+class Tables:
+    """Parsed tables plus the compiled regexes preprocess_text applies"""
+
+    def __init__(self, data: dict):
+        self.source_hash = data['source_hash']
+        self.protected_phrases = data['protected_phrases']
+        self.airline_patterns = data['airline_patterns']
+        self.number_words = data['number_words']
+        # airport -> {written: [spoken variations]}, None if fixes.json couldn't be read
+        self.fixes = data['fixes']
+        self.fixes_error = data['fixes_error']
+        # airport -> {NORMALIZED SPOKEN FORM: WRITTEN}
+        self.fix_index = data['fix_index']
+        # IDENT -> {"variants": [...], "keys": [...]} from fix_variants.py
+        self.generated_variants = data['generated_variants']
+        # Compiled regex objects can't be stored in compiled form, so compile them once here
+        self.word_replacements = [(re.compile(p), r) for p, r in data['word_replacements']]
+        self.phrase_patterns = [(re.compile(p), r) for p, r in data['phrase_patterns']]
+        # Number spellings ("niner" -> "9") for spoken_numbers.py, and the replacements without them
+        self.number_vocabulary = dict(self.number_words)
+        self.text_replacements = []
+        for (pattern, replacement), compiled in zip(data['word_replacements'], self.word_replacements):
+            if NUMBER_ENTRY.match(pattern) and replacement.isdigit():
+                self.number_vocabulary[pattern] = replacement
+            else:
+                self.text_replacements.append(compiled)
+
+
+def source_hash(*paths: str) -> str:
+    digest = hashlib.sha1(f"v{TABLES_VERSION}".encode())
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(b'<missing>')
+    return digest.hexdigest()
+
+
+def build_tables(tables_path: str, fixes_path: str, variants_path: str, digest: str) -> dict:
+    """Parse tables.json, fixes.json and fix_variants.json into the cached layout"""
+    with open(tables_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data['source_hash'] = digest
+
+    fixes, fixes_error, fix_index = None, None, {}
+    try:
+        with open(fixes_path, 'r', encoding='utf-8-sig') as f:
+            raw = json.load(f)
+        fixes = {}
+        for airport, entries in raw.items():
+            fixes[airport] = {}
+            fix_index[airport] = {}
+            for written, spoken in entries.items():
+                # Handle both single string and list of variations
+                variations = [spoken] if isinstance(spoken, str) else spoken
+                fixes[airport][written] = variations
+                for variation in variations:
+                    clean_var = re.sub(r'[^\w\s-]', '', variation.upper()).strip()
+                    if clean_var:
+                        fix_index[airport][clean_var] = written.upper()
+    except FileNotFoundError:
+        fixes_error = f"FAA fixes file '{fixes_path}' not found"
+    except json.JSONDecodeError as e:
+        fixes_error = f"JSON decode error at line {e.lineno}, column {e.colno}: {e}"
+    except Exception as e:
+        fixes_error = f"Error reading '{fixes_path}': {str(e)}"
+
+    data['fixes'] = fixes
+    data['fixes_error'] = fixes_error
+    data['fix_index'] = fix_index
+
+    data['generated_variants'] = {}
+    if os.path.exists(variants_path):
+        try:
+            with open(variants_path, 'r', encoding='utf-8') as f:
+                data['generated_variants'] = json.load(f)['fixes']
+        except Exception as e:
+            logger.error(f"Error reading '{variants_path}': {str(e)}")
+    return data
+
+
+def load_tables(tables_path: str = TABLES_FILE, fixes_path: str = FIXES_FILE,
+                variants_path: str = VARIANTS_FILE, cache_path: str = TABLES_CACHE) -> Tables:
+    """Load tables.cache, rebuilding it from the JSON sources if it is missing or stale"""
+    start = time.perf_counter()
+    digest = source_hash(tables_path, fixes_path, variants_path)
+    data = None
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('source_hash') != digest:
+                logger.info(f"'{cache_path}' is stale, rebuilding")
+                data = None
+        except Exception as e:
+            logger.error(f"Error reading '{cache_path}': {str(e)}")
+            data = None
+
+    if data is None:
+        data = build_tables(tables_path, fixes_path, variants_path, digest)
+        try:
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.error(f"Error writing '{cache_path}': {str(e)}")
+
+    tables = Tables(data)
+    logger.info(f"Loaded text tables in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return tables
+
+
+if __name__ == "__main__":
+    if os.path.exists(TABLES_CACHE):
+        os.remove(TABLES_CACHE)
+    tables = load_tables()
+    print(f"Rebuilt {TABLES_CACHE}: {len(tables.word_replacements)} word replacements, "
+          f"{len(tables.phrase_patterns)} phrase patterns, "
+          f"{sum(len(index) for index in tables.fix_index.values())} fix variations")